@@ -3,8 +3,12 @@ import random
 
 import pyautogui
 
+from . import colors
 from . import common
-from .window_helpers import ensure_game_window, screen_point_from_offset, sleep_with_stop
+from . import config
+from . import geometry
+from . import templates
+from .window_helpers import ensure_game_window, get_game_window, screen_point_from_offset, sleep_with_stop
 
 
 def click_play_button(stop_event):
@@ -26,12 +30,22 @@ def click_play_button(stop_event):
     )
 
     try:
-        common.PLAY_BUTTON_IDLE_COLOR = pyautogui.pixel(x, y)
-        common.log("DEBUG", f"Captured idle Ranked button color: {common.PLAY_BUTTON_IDLE_COLOR}")
+        if common.get_value("PLAY_BUTTON_IDLE_SPREAD") is None:
+            # first cycle: full signature (several frames), the spread sets the tolerance
+            idle_color, idle_spread = colors.sample(x, y, stop_event)
+            common.set_value("PLAY_BUTTON_IDLE_SPREAD", idle_spread)
+        else:
+            idle_color = pyautogui.pixel(x, y)[:3]
+        common.set_value("PLAY_BUTTON_IDLE_COLOR", idle_color)
+        common.log("DEBUG", f"Captured idle Ranked button color: {common.get_value('PLAY_BUTTON_IDLE_COLOR')}")
+        # we are in the lobby: first run also captures the Ranked button template
+        win = get_game_window()
+        if win is not None:
+            templates.learn("ranked_button", win, geometry.to_window(play_offset, win), True)
     except Exception as e:
         common.log("WARN", f"Could not read Ranked button color: {e}")
 
-    common.input_backend.move_to(x, y, duration=0.25)
+    common.get_input_backend().move_to(x, y, duration=0.25)
     try:
         pos_now = pyautogui.position()
         common.log("DEBUG", f"Arrived at button, current position = {pos_now}")
@@ -40,25 +54,28 @@ def click_play_button(stop_event):
 
     dx = random.randint(-6, 6)
     dy = random.randint(-6, 6)
-    common.input_backend.move_to(x + dx, y + dy, duration=0.12)
-    common.input_backend.move_to(x, y, duration=0.10)
+    common.get_input_backend().move_to(x + dx, y + dy, duration=0.12)
+    common.get_input_backend().move_to(x, y, duration=0.10)
 
-    common.input_backend.click_at(x, y, button="left")
+    common.get_input_backend().click_at(x, y, button="left")
     common.log("ACTION", "Clicked 'Ranked Match' button (or attempted, depending on mode).")
 
 
-def click_left_n_times(n, interval, stop_event):
-    if not ensure_game_window(stop_event):
-        return
-
-    # choose a safe base position (play button); fallback = current mouse pos
+def safe_click_point():
+    """Where menu-advancing clicks go: the Ranked button, else the current mouse position."""
     pos = None
-    if common.PLAY_BUTTON_OFFSET is not None:
-        pos = screen_point_from_offset(common.PLAY_BUTTON_OFFSET)
-
+    if common.get_value("PLAY_BUTTON_OFFSET") is not None:
+        pos = screen_point_from_offset(common.get_value("PLAY_BUTTON_OFFSET"))
     if pos is None:
         pos = pyautogui.position()
+    return pos
+
+
+def click_left_n_times(n, interval, stop_event):
+    if not ensure_game_window(stop_event):
+        return
 
+    pos = safe_click_point()
     x, y = pos
     common.log(
         "ACTION",
@@ -68,39 +85,34 @@ def click_left_n_times(n, interval, stop_event):
     for _ in range(n):
         if stop_event.is_set():
             return
-        common.input_backend.click_at(x, y, button="left")
+        common.get_input_backend().click_at(x, y, button="left")
         sleep_with_stop(interval, stop_event)
 
 
 def post_match_clicks(stop_event):
     if not ensure_game_window(stop_event):
         return
+    s = config.active()
 
-    # same safe base coord logic
-    pos = None
-    if common.PLAY_BUTTON_OFFSET is not None:
-        pos = screen_point_from_offset(common.PLAY_BUTTON_OFFSET)
-    if pos is None:
-        pos = pyautogui.position()
-
+    pos = safe_click_point()
     x, y = pos
 
     common.log(
         "ACTION",
-        f"End of match: sending {common.POST_MATCH_CLICKS} clicks at {pos} "
+        f"End of match: sending {s.POST_MATCH_CLICKS} clicks at {pos} "
         f"to return to menu."
     )
 
-    for _ in range(common.POST_MATCH_CLICKS):
+    for _ in range(s.POST_MATCH_CLICKS):
         if stop_event.is_set():
             return
 
-        common.input_backend.click_at(x, y, button="left")
+        common.get_input_backend().click_at(x, y, button="left")
 
-        if not common.LVL_75_PLUS:
+        if not s.LVL_75_PLUS:
             common.send_enter()
 
-        sleep_with_stop(common.POST_MATCH_CLICK_INTERVAL, stop_event)
+        sleep_with_stop(s.POST_MATCH_CLICK_INTERVAL, stop_event)
 
 
 def press_auto_mode(stop_event):
@@ -0,0 +1,108 @@
+# base/autocalib.py
+
+import time
+
+from . import colors
+from . import common
+from . import frame_diff
+from . import geometry
+from . import templates
+
+# ========== AUTO-CALIBRATION ==========
+#
+# Finds the UI elements in one captured frame of the game window instead of
+# asking the user to hover each one through a 10 s countdown. Every element
+# is searched over the whole frame with its reference template (templates.py,
+# rescaled when it was captured at another window size); a hit scoring at
+# least AUTOCALIB_MIN_SCORE becomes the new offset (normalized client
+# coordinates, see geometry.py), and for color probes the color signature
+# sampled there (colors.py) becomes the new color and spread.
+#
+# Only elements that are on screen can be found (Ranked in the lobby, Cancel
+# while searching, the end button on the results screen), and only once a
+# template exists: the very first calibration on a machine is still manual.
+
+# template name -> (offset setting, color setting or None, spread setting or None)
+ELEMENTS = {
+    "ranked_button": ("PLAY_BUTTON_OFFSET", None, None),
+    "cancel_button": ("ANNUL_PIXEL_OFFSET", "ANNUL_PIXEL_COLOR", "ANNUL_PIXEL_SPREAD"),
+    "end_button": ("END_BUTTON_OFFSET", "END_BUTTON_COLOR", "END_BUTTON_SPREAD"),
+}
+
+def available() -> bool:
+    return common.AUTOCALIB_ENABLED and templates.available()
+
+
+def locate(name: str, frame):
+    """
+    Best position of element `name` in `frame`: (score, (x, y)) in window
+    pixels, or None when there is no template or the best hit is too weak.
+    """
+    result = templates.find(name, frame)
+    if result is None:
+        return None
+    score, pos = result
+    if score < common.AUTOCALIB_MIN_SCORE:
+        common.log("DEBUG", f"Auto-calibration: '{name}' not on screen (best score {score:.3f}).")
+        return None
+    return score, pos
+
+
+def calibrate(win, names=None, apply: bool = True) -> dict:
+    """
+    Locate `names` (default: every element in ELEMENTS) in a fresh capture
+    of `win`. Returns {setting name: value} for what was found and, if
+    `apply`, sets those values for this session (common.set_value).
+    """
+    if not available():
+        return {}
+
+    start = time.perf_counter()
+    try:
+        frame_diff.tick(win, max_age=0.0)
+    except Exception as e:
+        common.log("WARN", f"Auto-calibration: could not capture the game window: {e}")
+        return {}
+    frame = frame_diff.latest_frame(win)
+    if frame is None:
+        return {}
+
+    transform = geometry.transform_for(win)
+    found = {}
+    for name in names or ELEMENTS:
+        hit = locate(name, frame)
+        if hit is None:
+            continue
+        score, (x, y) = hit
+        offset_key, color_key, spread_key = ELEMENTS[name]
+        offset = transform.from_window(x, y)
+        found[common.mode_setting(offset_key)] = offset
+        if color_key is not None:
+            sx, sy = transform.to_screen(offset)
+            color, spread = colors.sample(sx, sy)
+            found[common.mode_setting(color_key)] = color
+            found[common.mode_setting(spread_key)] = spread
+        common.log("DEBUG", f"Auto-calibration: '{name}' at {(x, y)} (score {score:.3f}).")
+
+    if apply:
+        for key, value in found.items():
+            common.set_value(key, value)
+
+    elapsed = (time.perf_counter() - start) * 1000
+    if found:
+        values = ", ".join(f"{k}={v}" for k, v in found.items())
+        common.log("INFO", f"Auto-calibration found {values} in {elapsed:.0f} ms.")
+    else:
+        common.log("DEBUG", f"Auto-calibration found nothing ({elapsed:.0f} ms).")
+    return found
+
+
+def wait_for(win, name: str, stop_event, timeout: float, interval: float = 0.5) -> dict:
+    """Retry calibrate(win, [name]) until it finds `name`, `timeout` passes or stop."""
+    deadline = time.monotonic() + timeout
+    while not stop_event.is_set():
+        found = calibrate(win, [name])
+        if found or time.monotonic() >= deadline:
+            return found
+        stop_event.wait(interval)
+    return {}
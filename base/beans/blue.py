@@ -2,17 +2,22 @@
 
 import threading
 
-import pyautogui
-
 from .. import common
+from .. import config
+from .. import stages
+from .. import tracing
 from ..window_helpers import ensure_game_window, sleep_with_stop
 
 
+class _Desync(Exception):
+    """A checked step never reached its stage: the game and the loop are out of step."""
+
+
 def _press(key: str):
     """
     Press a key using the shared input backend if present, otherwise pyautogui.
     """
-    backend = getattr(common, "input_backend", None)
+    backend = common.get_input_backend()
 
     if backend is not None:
         try:
@@ -32,7 +37,54 @@ def _press(key: str):
                 "falling back to pyautogui."
             )
 
-    pyautogui.press(key)
+    common.get_pyautogui().press(key)
+
+
+# stages confirmed on screen in closed-loop mode (see stages.py)
+_STAGES = ("menu_open", "training_started", "result_shown", "training_ready")
+
+
+def _step(name: str, key: str, delay: float, stop_event: threading.Event, stage=None) -> bool:
+    """
+    One traced trainer step: press `key`, then wait `delay` seconds, or
+    until `stage` is on screen if given (closed loop, `delay` = timeout,
+    _Desync if it never shows up).
+    Returns False when a stop was requested.
+    """
+    verdict = None
+    with tracing.span(name, cat="blue"):
+        if stage is None:
+            _press(key)
+            sleep_with_stop(delay, stop_event)
+        else:
+            stage.begin()
+            _press(key)
+            verdict = stage.wait(delay, stop_event)
+    if verdict is False and not stop_event.is_set():
+        raise _Desync(stage.name)
+    return not stop_event.is_set()
+
+
+def _resync(spot, s, stop_event: threading.Event) -> bool:
+    """
+    Get back in front of the training after a missed step: ESC until the
+    'spot' scene is on screen. False if it can't be reached.
+    """
+    if not spot.learned:
+        # nothing to compare with: back out once and carry on
+        _press("esc")
+        sleep_with_stop(s.BLUE_RESYNC_WAIT, stop_event)
+        return True
+
+    for attempt in range(1, s.BLUE_RESYNC_ATTEMPTS + 1):
+        if stop_event.is_set() or spot.on_screen():
+            return True
+        with tracing.span("resync", cat="blue", attempt=attempt):
+            _press("esc")
+            if spot.wait(s.BLUE_RESYNC_WAIT, stop_event):
+                common.log("STATE", f"Blue Beans: back in front of the training (attempt {attempt}).")
+                return True
+    return False
 
 def run_blue_beans_trainer(stop_event: threading.Event):
     """
@@ -41,29 +93,19 @@ def run_blue_beans_trainer(stop_event: threading.Event):
     Port of your prototype, integrated with:
       - ensure_game_window()
       - sleep_with_stop()
-      - common.input_backend
+      - common.get_input_backend()
       - common.log()
-    """
-
-    # ---- Load timing config once at start ----
-    initial_delay  = float(getattr(common, "BLUE_INITIAL_DELAY", 5.0))
 
-    d_enter1       = float(getattr(common, "BLUE_ENTER1_DELAY", 1.2))
-    d_enter2       = float(getattr(common, "BLUE_ENTER2_DELAY", 0.7))
-    d_up           = float(getattr(common, "BLUE_UP_DELAY", 0.3))
-    d_enter3       = float(getattr(common, "BLUE_ENTER3_DELAY", 0.3))
-    d_enter4       = float(getattr(common, "BLUE_ENTER4_DELAY", 7.0))
-
-    d_a1           = float(getattr(common, "BLUE_A1_DELAY", 4.5))
-    d_s1           = float(getattr(common, "BLUE_S1_DELAY", 8.5))
-    d_a2           = float(getattr(common, "BLUE_A2_DELAY", 4.0))
-    d_s2           = float(getattr(common, "BLUE_S2_DELAY", 10.0))
-    d_a3           = float(getattr(common, "BLUE_A3_DELAY", 3.0))
-    d_s3           = float(getattr(common, "BLUE_S3_DELAY", 5.0))
-    d_a4           = float(getattr(common, "BLUE_A4_DELAY", 12.0))
+    With BLUE_CLOSED_LOOP (and NumPy) the menu, training start, result and
+    training reset are confirmed on screen and the delays before them only
+    act as timeouts; a step that never shows up sends the loop back in front
+    of the training to restart the cycle. The variant is chosen at start;
+    both log beans/hour.
+    """
 
-    d_enter5       = float(getattr(common, "BLUE_ENTER5_DELAY", 1.5))
-    d_cooldown     = float(getattr(common, "BLUE_COOLDOWN_DELAY", 70.0))
+    # ---- Timing config: pinned at start, refreshed at the start of each cycle ----
+    s = config.pin()
+    initial_delay  = s.BLUE_INITIAL_DELAY
 
     common.log(
         "STATE",
@@ -81,7 +123,14 @@ def run_blue_beans_trainer(stop_event: threading.Event):
         common.log("ERROR", "Blue Beans: game window not found / not focusable, aborting.")
         return
 
-    common.log("STATE", "Blue Beans trainer loop started.")
+    closed_loop = s.BLUE_CLOSED_LOOP and stages.available()
+    stage = {name: stages.Stage("Blue Beans", name) for name in _STAGES} if closed_loop else {}
+    spot = stages.Scene("Blue Beans", "spot")
+    rate = stages.CycleRate(
+        f"Blue Beans ({'closed' if closed_loop else 'open'}-loop)", s.BLUE_BEANS_PER_CYCLE
+    )
+    in_step = True  # the previous cycle ended where it should (in front of the training)
+    common.log("STATE", f"Blue Beans trainer loop started ({'closed' if closed_loop else 'open'}-loop).")
 
     while not stop_event.is_set():
         # Re-ensure window each cycle
@@ -89,68 +138,69 @@ def run_blue_beans_trainer(stop_event: threading.Event):
             common.log("ERROR", "Blue Beans: lost game window, stopping.")
             break
 
-        # === SEQUENCE ===================================================
-        _press("enter")
-        sleep_with_stop(d_enter1, stop_event)
-        if stop_event.is_set(): break
+        s = config.refresh(common.log)
+        d_enter1, d_enter2, d_up = s.BLUE_ENTER1_DELAY, s.BLUE_ENTER2_DELAY, s.BLUE_UP_DELAY
+        d_enter3, d_enter4 = s.BLUE_ENTER3_DELAY, s.BLUE_ENTER4_DELAY
+        d_a1, d_s1, d_a2, d_s2 = s.BLUE_A1_DELAY, s.BLUE_S1_DELAY, s.BLUE_A2_DELAY, s.BLUE_S2_DELAY
+        d_a3, d_s3, d_a4 = s.BLUE_A3_DELAY, s.BLUE_S3_DELAY, s.BLUE_A4_DELAY
+        d_enter5, d_cooldown = s.BLUE_ENTER5_DELAY, s.BLUE_COOLDOWN_DELAY
+
+        if closed_loop:
+            if in_step:
+                spot.observe()
+            if spot.on_screen() is False and not _resync(spot, s, stop_event):
+                common.log("ERROR", "Blue Beans: can't get back in front of the training. Stopping.")
+                break
+        in_step = False
 
-        _press("enter")
-        sleep_with_stop(d_enter2, stop_event)
-        if stop_event.is_set(): break
-
-        _press("up")
-        sleep_with_stop(d_up, stop_event)
-        if stop_event.is_set(): break
-
-        _press("enter")
-        sleep_with_stop(d_enter3, stop_event)
-        if stop_event.is_set(): break
-
-        _press("enter")
-        sleep_with_stop(d_enter4, stop_event)
-        if stop_event.is_set(): break
-
-        _press("a")
-        sleep_with_stop(d_a1, stop_event)
-        if stop_event.is_set(): break
-
-        _press("s")
-        sleep_with_stop(d_s1, stop_event)
-        if stop_event.is_set(): break
-
-        _press("a")
-        sleep_with_stop(d_a2, stop_event)
-        if stop_event.is_set(): break
-
-        _press("s")
-        sleep_with_stop(d_s2, stop_event)
-        if stop_event.is_set(): break
-
-        _press("a")
-        sleep_with_stop(d_a3, stop_event)
-        if stop_event.is_set(): break
-
-        _press("s")
-        sleep_with_stop(d_s3, stop_event)
-        if stop_event.is_set(): break
-
-        _press("a")
-        sleep_with_stop(d_a4, stop_event)
-        if stop_event.is_set(): break
-
-        _press("enter")
-        sleep_with_stop(d_enter5, stop_event)
-        if stop_event.is_set(): break
-
-        _press("enter")
+        # === SEQUENCE ===================================================
+        try:
+            if not _step("enter1", "enter", d_enter1, stop_event, stage.get("menu_open")): break
+            if not _step("enter2", "enter", d_enter2, stop_event): break
+            if not _step("up", "up", d_up, stop_event): break
+            if not _step("enter3", "enter", d_enter3, stop_event): break
+            if not _step("enter4", "enter", d_enter4, stop_event, stage.get("training_started")): break
+
+            if not _step("a1", "a", d_a1, stop_event): break
+            if not _step("s1", "s", d_s1, stop_event): break
+            if not _step("a2", "a", d_a2, stop_event): break
+            if not _step("s2", "s", d_s2, stop_event): break
+            if not _step("a3", "a", d_a3, stop_event): break
+            if not _step("s3", "s", d_s3, stop_event): break
+            if not _step("a4", "a", d_a4, stop_event, stage.get("result_shown")): break
+
+            if not _step("enter5", "enter", d_enter5, stop_event): break
+        except _Desync as e:
+            common.log("WARN", f"Blue Beans: step '{e}' never showed up (dropped input?). Resynchronizing.")
+            rate.cycle_failed()
+            if not _resync(spot, s, stop_event):
+                common.log("ERROR", "Blue Beans: can't get back in front of the training. Stopping.")
+                break
+            continue
+
+        with tracing.span("enter6", cat="blue"):
+            _press("enter")
+        rate.cycle_done()
 
         common.log(
             "ACTION",
-            f"Blue Beans: beans obtained, waiting {d_cooldown:.1f}s for training reset…"
+            f"Blue Beans: beans obtained, waiting up to {d_cooldown:.1f}s for training reset…"
         )
 
-        # Cooldown before restarting loop
-        sleep_with_stop(d_cooldown, stop_event)
-
+        # Cooldown before restarting loop (closed loop: until the training is available again)
+        in_step = True
+        with tracing.span("cooldown", cat="blue"):
+            ready = stage.get("training_ready")
+            if ready is None:
+                sleep_with_stop(d_cooldown, stop_event)
+            else:
+                grace = min(s.BLUE_READY_GRACE, d_cooldown)
+                sleep_with_stop(grace, stop_event)
+                if not stop_event.is_set():
+                    ready.begin()
+                    # not ready in time: checked against 'spot' at the next cycle
+                    in_step = ready.wait(d_cooldown - grace, stop_event) is not False
+
+    rate.summary()
     common.log("STATE", "Blue Beans trainer stopped.")
 
@@ -3,70 +3,141 @@
 from threading import Event
 
 from .. import common
+from .. import config
+from .. import stages
+from .. import tracing
 from .. import window_helpers as wh
 
+# steps checked on screen in closed-loop mode (see stages.py)
+_STAGES = ("menu_open", "training_started", "v_pressed", "hold_done", "hold_result", "cycle_done")
 
-def _tap(key: str, delay: float, stop_event: Event) -> bool:
+
+class _Desync(Exception):
+    """A checked step never reached its stage: the game and the loop are out of step."""
+
+
+def _tap(key: str, delay: float, stop_event: Event, stage=None) -> bool:
     """
     Press a single key through the unified input backend,
     then sleep for `delay` seconds, but always respecting stop_event.
+    With a `stage`, wait only until it is on screen (`delay` = timeout)
+    and raise _Desync if it never shows up.
     """
     if stop_event.is_set():
         return False
 
-    common.input_backend.press_key(key)
-    wh.sleep_with_stop(delay, stop_event)
+    verdict = None
+    with tracing.span(f"tap_{key}", cat="pink"):
+        if stage is not None:
+            stage.begin()
+        common.get_input_backend().press_key(key)
+        if stage is None:
+            wh.sleep_with_stop(delay, stop_event)
+        else:
+            verdict = stage.wait(delay, stop_event)
+    if verdict is False and not stop_event.is_set():
+        raise _Desync(stage.name)
     return not stop_event.is_set()
 
 
-def _hold_v(stop_event: Event) -> bool:
+@tracing.traced("pink")
+def _hold_v(stop_event: Event, stage=None) -> bool:
     """
     Proper HOLD implementation for V:
     - kb/mouse: real 'v' keyDown / keyUp
     - gamepad: hold mapped button (triangle / X) for ~2s
+    With a `stage`, release as soon as the hold has completed on screen
+    (PINK_V_HOLD_DURATION = timeout), _Desync if it never does.
     """
     if stop_event.is_set():
         return False
 
-    hold_time = common.PINK_V_HOLD_DURATION
+    hold_time = config.active().PINK_V_HOLD_DURATION
+
+    backend = common.get_input_backend()
 
-    if common.input_backend.mode == "kbmouse":
-        import pyautogui
+    def wait_hold():
+        if stage is None:
+            wh.sleep_with_stop(hold_time, stop_event)
+            return None
+        return stage.wait(hold_time, stop_event)
+
+    if stage is not None:
+        stage.begin()
+
+    if backend.mode == "kbmouse":
+        pyautogui = common.get_pyautogui()
         pyautogui.keyDown("v")
-        wh.sleep_with_stop(hold_time, stop_event)
+        verdict = wait_hold()
         pyautogui.keyUp("v")
-        return not stop_event.is_set()
-
-    # --- gamepad mode ---
-    if common.input_backend.pad_type == "ds4":
-        btn = "triangle"   # V -> triangle
     else:
-        btn = "x"          # V -> X on Xbox layout
+        # --- gamepad mode ---
+        if backend.pad_type == "ds4":
+            btn = "triangle"   # V -> triangle
+        else:
+            btn = "x"          # V -> X on Xbox layout
 
-    common.input_backend.hold_button_name(btn)
-    wh.sleep_with_stop(hold_time, stop_event)
-    common.input_backend.release_button_name(btn)
+        backend.hold_button_name(btn)
+        verdict = wait_hold()
+        backend.release_button_name(btn)
 
+    if verdict is False and not stop_event.is_set():
+        raise _Desync(stage.name)
     return not stop_event.is_set()
 
 
+def _resync(track, s, stop_event: Event) -> bool:
+    """
+    Get back in front of the training after a missed step: ESC until the
+    'track' scene is on screen. False if it can't be reached.
+    """
+    if not track.learned:
+        # nothing to compare with: back out once and carry on
+        common.get_input_backend().press_key("esc")
+        wh.sleep_with_stop(s.PINK_RESYNC_WAIT, stop_event)
+        return True
+
+    for attempt in range(1, s.PINK_RESYNC_ATTEMPTS + 1):
+        if stop_event.is_set() or track.on_screen():
+            return True
+        with tracing.span("resync", cat="pink", attempt=attempt):
+            common.get_input_backend().press_key("esc")
+            if track.wait(s.PINK_RESYNC_WAIT, stop_event):
+                common.log("STATE", f"Pink Beans: back in front of the training (attempt {attempt}).")
+                return True
+    return False
+
+
 def run_pink_beans_trainer(stop_event: Event) -> None:
     """
     Pink Beans trainer loop.
     [...]
+    With PINK_CLOSED_LOOP (and NumPy) every long step is checked on screen:
+    animations and the V hold last only as long as they actually run, and a
+    step that never shows up (dropped input) sends the loop back to the
+    training spot to restart the cycle instead of running it out of step.
     """
+    s = config.pin()
     common.log(
         "STATE",
         'Pink Beans trainer starting in '
-        f'{common.PINK_INITIAL_DELAY:.1f} seconds. '
+        f'{s.PINK_INITIAL_DELAY:.1f} seconds. '
         'Make sure you are in front of the "Courtyard Track" training before we begin.'
     )
-    wh.sleep_with_stop(common.PINK_INITIAL_DELAY, stop_event)
+    wh.sleep_with_stop(s.PINK_INITIAL_DELAY, stop_event)
     if stop_event.is_set():
         common.log("STATE", "Pink Beans trainer cancelled before start.")
         return
 
-    common.log("STATE", "Pink Beans trainer loop started.")
+    closed_loop = s.PINK_CLOSED_LOOP and stages.available()
+    stage = {name: stages.Stage("Pink Beans", name) for name in _STAGES} if closed_loop else {}
+    track = stages.Scene("Pink Beans", "track")
+    rate = stages.CycleRate(
+        f"Pink Beans ({'closed' if closed_loop else 'open'}-loop)", s.PINK_BEANS_PER_CYCLE
+    )
+    in_step = True  # the previous cycle ended where it should (in front of the training)
+
+    common.log("STATE", f"Pink Beans trainer loop started ({'closed' if closed_loop else 'open'}-loop).")
 
     while not stop_event.is_set():
         # Make sure game window exists + is focused before each cycle
@@ -76,61 +147,90 @@ def run_pink_beans_trainer(stop_event: Event) -> None:
         else:
             common.log("DEBUG", "Game window found, proceeding...")
 
-        # ----- MAIN SEQUENCE -----
-
-        # enter
-        if not _tap("enter", common.PINK_ENTER1_DELAY, stop_event):
-            break
-
-        # enter
-        if not _tap("enter", common.PINK_ENTER2_DELAY, stop_event):
-            break
-
-        # up
-        if not _tap("up", common.PINK_UP_DELAY, stop_event):
-            break
-
-        # enter
-        if not _tap("enter", common.PINK_ENTER3_DELAY, stop_event):
-            break
-
-        # enter → wait animation
-        if not _tap("enter", common.PINK_ENTER4_DELAY, stop_event):
-            break
-
-        # esc (simple tap)
-        if stop_event.is_set():
-            break
-        common.input_backend.press_key("esc")
-        wh.sleep_with_stop(common.PINK_ESC_AFTER_DELAY, stop_event)
-        if stop_event.is_set():
-            break
-
-        # single 'v' press
-        common.input_backend.press_key("v")
-        wh.sleep_with_stop(common.PINK_V_AFTER_DELAY, stop_event)
-        if stop_event.is_set():
-            break
-
-        # hold v (keyboard: real hold, gamepad: triangle/X)
-        if not _hold_v(stop_event):
-            break
-
-        # extra wait after the hold
-        if stop_event.is_set():
-            break
-        wh.sleep_with_stop(common.PINK_AFTER_HOLD_DELAY, stop_event)
-        if stop_event.is_set():
-            break
-
-        # down
-        if not _tap("down", common.PINK_DOWN_DELAY, stop_event):
-            break
-
-        # final enter
-        if not _tap("enter", common.PINK_FINAL_ENTER_DELAY, stop_event):
-            break
-
+        # settings saved since the last cycle apply from here
+        s = config.refresh(common.log)
+
+        if closed_loop:
+            if in_step:
+                track.observe()
+            if track.on_screen() is False and not _resync(track, s, stop_event):
+                common.log("ERROR", "Pink Beans: can't get back in front of the training. Stopping.")
+                break
+        in_step = False
+
+        try:
+            # ----- MAIN SEQUENCE -----
+
+            # enter
+            if not _tap("enter", s.PINK_ENTER1_DELAY, stop_event, stage.get("menu_open")):
+                break
+
+            # enter
+            if not _tap("enter", s.PINK_ENTER2_DELAY, stop_event):
+                break
+
+            # up
+            if not _tap("up", s.PINK_UP_DELAY, stop_event):
+                break
+
+            # enter
+            if not _tap("enter", s.PINK_ENTER3_DELAY, stop_event):
+                break
+
+            # enter → wait animation
+            if not _tap("enter", s.PINK_ENTER4_DELAY, stop_event, stage.get("training_started")):
+                break
+
+            # esc (simple tap)
+            if stop_event.is_set():
+                break
+            with tracing.span("tap_esc", cat="pink"):
+                common.get_input_backend().press_key("esc")
+                wh.sleep_with_stop(s.PINK_ESC_AFTER_DELAY, stop_event)
+            if stop_event.is_set():
+                break
+
+            # single 'v' press
+            if not _tap("v", s.PINK_V_AFTER_DELAY, stop_event, stage.get("v_pressed")):
+                break
+
+            # hold v (keyboard: real hold, gamepad: triangle/X)
+            if not _hold_v(stop_event, stage.get("hold_done")):
+                break
+
+            # extra wait after the hold
+            if stop_event.is_set():
+                break
+            with tracing.span("after_hold", cat="pink"):
+                after_hold = stage.get("hold_result")
+                if after_hold is None:
+                    wh.sleep_with_stop(s.PINK_AFTER_HOLD_DELAY, stop_event)
+                else:
+                    after_hold.begin()
+                    if after_hold.wait(s.PINK_AFTER_HOLD_DELAY, stop_event) is False and not stop_event.is_set():
+                        raise _Desync(after_hold.name)
+            if stop_event.is_set():
+                break
+
+            # down
+            if not _tap("down", s.PINK_DOWN_DELAY, stop_event):
+                break
+
+            # final enter
+            if not _tap("enter", s.PINK_FINAL_ENTER_DELAY, stop_event, stage.get("cycle_done")):
+                break
+
+        except _Desync as e:
+            common.log("WARN", f"Pink Beans: step '{e}' never showed up (dropped input?). Resynchronizing.")
+            rate.cycle_failed()
+            if not _resync(track, s, stop_event):
+                common.log("ERROR", "Pink Beans: can't get back in front of the training. Stopping.")
+                break
+            continue
+
+        in_step = True
+        rate.cycle_done()
         common.log("STATE", "Pink Beans cycle completed.")
 
-    common.log("STATE", "Pink Beans trainer stopped.")
\ No newline at end of file
+    rate.summary()
+    common.log("STATE", "Pink Beans trainer stopped.")
@@ -4,6 +4,11 @@ import time
 import pyautogui
 
 from . import common
+from . import config
+from . import instance
+from . import navigator
+from . import stages
+from . import tracing
 from .window_helpers import sleep_with_stop, capture_offsets_if_needed
 from .status_checks import (
     is_still_searching,
@@ -15,11 +20,12 @@ from .actions import click_play_button, click_left_n_times, press_auto_mode, pos
 
 
 def bot_main(stop_event):
+    s = config.pin()  # tuning snapshot; newer settings are picked up at the refresh() safe points
     try:
-        common.log("INFO", f"Bot will start in {common.DELAY_BEFORE_START} seconds.")
+        common.log("INFO", f"Bot will start in {s.DELAY_BEFORE_START} seconds.")
         common.log("INFO", "Make sure the game window is open (windowed 1024x576).")
         common.log("INFO", "Fail-safe: move the mouse to any screen corner to stop PyAutoGUI.")
-        sleep_with_stop(common.DELAY_BEFORE_START, stop_event)
+        sleep_with_stop(s.DELAY_BEFORE_START, stop_event)
         if stop_event.is_set():
             common.log("INFO", "Bot start cancelled.")
             return
@@ -30,109 +36,146 @@ def bot_main(stop_event):
 
         session_start = time.time()
         matches_this_session = 0
+        nav = navigator.Navigator()
 
         while not stop_event.is_set():
+            s = config.refresh(common.log)
+            cycle_start = time.time()
 
-            click_play_button(stop_event)
+            with tracing.span("queue", cat="state"):
+                click_play_button(stop_event)
             if stop_event.is_set():
                 break
 
-            common.log("STATE", f"Waiting {common.FIRST_WAIT} seconds for initial matchmaking search...")
-            sleep_with_stop(common.FIRST_WAIT, stop_event)
+            common.log("STATE", f"Waiting {s.FIRST_WAIT} seconds for initial matchmaking search...")
+            with tracing.span("first_wait", cat="state"):
+                sleep_with_stop(s.FIRST_WAIT, stop_event)
             if stop_event.is_set():
                 break
 
-            while not stop_event.is_set() and is_still_searching(stop_event):
-                common.log("STATE", f"Still searching for an opponent, waiting another {common.SEARCH_CHECK_INTERVAL} seconds...")
-                sleep_with_stop(common.SEARCH_CHECK_INTERVAL, stop_event)
+            with tracing.span("searching", cat="state"):
+                while not stop_event.is_set() and is_still_searching(stop_event):
+                    s = config.refresh(common.log)
+                    common.log("STATE", f"Still searching for an opponent, waiting another {s.SEARCH_CHECK_INTERVAL} seconds...")
+                    sleep_with_stop(s.SEARCH_CHECK_INTERVAL, stop_event)
 
             if stop_event.is_set():
                 break
 
-            if is_back_in_lobby(stop_event):
+            with tracing.span("search_result", cat="state"):
+                back_in_lobby = is_back_in_lobby(stop_event)
+                search_failed = not back_in_lobby and detect_search_failed_popup(stop_event)
+
+            if back_in_lobby:
                 common.log("STATE", "Search ended but lobby is visible (cancelled / no match). Re-queuing.")
                 continue
 
-            if detect_search_failed_popup(stop_event):
+            if search_failed:
                 common.log("STATE", "Matchmaking failed (no opponent). Closing popup and re-queuing.")
-                click_left_n_times(3, 0.3, stop_event)
+                with tracing.span("search_failed", cat="state"):
+                    click_left_n_times(3, 0.3, stop_event)
                 continue
 
             common.log("STATE", "Opponent found. Running pre-match sequence.")
 
-            click_left_n_times(10, 1.0, stop_event)
-            if stop_event.is_set():
-                break
-
-            sleep_with_stop(4, stop_event)
+            fell_back = False  # the navigator gave up somewhere in this cycle
+            with tracing.span("pre_match", cat="state"):
+                if s.NAV_CLOSED_LOOP:
+                    reached = nav.to_formation(stop_event)
+                else:
+                    click_left_n_times(10, 1.0, stop_event)
+                    if not stop_event.is_set():
+                        sleep_with_stop(4, stop_event)
+                    reached = navigator.FORMATION
+            if reached is None and not stop_event.is_set():
+                # gave up / focus failed: the blind sequence, as before the navigator
+                common.log("WARN", "Navigator didn't reach the formation screen. Running the blind pre-match sequence.")
+                fell_back = True
+                with tracing.span("pre_match_blind", cat="state"):
+                    click_left_n_times(10, 1.0, stop_event)
+                    if not stop_event.is_set():
+                        sleep_with_stop(4, stop_event)
             if stop_event.is_set():
                 break
+            if reached == navigator.LOBBY:
+                common.log("STATE", "Back in the lobby before the match started (opponent left?). Re-queuing.")
+                continue
 
             common.log("ACTION", "Skipping formation screen (ALT / START)...")
-            common.skip_formation()
+            with tracing.span("formation", cat="state"):
+                common.skip_formation()
 
-            common.log("STATE", f"Waiting {common.SECOND_WAIT} seconds before enabling auto-mode (U)...")
-            sleep_with_stop(common.SECOND_WAIT, stop_event)
+            common.log("STATE", f"Waiting {s.SECOND_WAIT} seconds before enabling auto-mode (U)...")
+            with tracing.span("second_wait", cat="state"):
+                sleep_with_stop(s.SECOND_WAIT, stop_event)
             if stop_event.is_set():
                 break
 
-            press_auto_mode(stop_event)
+            with tracing.span("auto_mode", cat="state"):
+                press_auto_mode(stop_event)
             if stop_event.is_set():
                 break
 
             match_start = time.time()
-            HARD_LIMIT = common.MATCH_DURATION + common.MATCH_TIMEOUT_MARGIN
+            HARD_LIMIT = s.MATCH_DURATION + s.MATCH_TIMEOUT_MARGIN
 
             common.log(
                 "STATE",
                 f"Match in progress… checking for end button every "
-                f"{int(common.SEARCH_CHECK_INTERVAL)}s (timeout at {HARD_LIMIT:.0f}s)."
+                f"{int(s.SEARCH_CHECK_INTERVAL)}s (timeout at {HARD_LIMIT:.0f}s)."
             )
 
             timed_out = False
-
-            while not stop_event.is_set():
-                elapsed = time.time() - match_start
-
-                if is_match_over(stop_event):
-                    common.log("STATE", "Detected end-screen! Starting post-match actions...")
-                    break
-
-                if elapsed >= HARD_LIMIT:
-                    timed_out = True
+            with tracing.span("match", cat="state"):
+                while not stop_event.is_set():
+                    elapsed = time.time() - match_start
+
+                    if is_match_over(stop_event):
+                        common.log("STATE", "Detected end-screen! Starting post-match actions...")
+                        break
+
+                    if elapsed >= HARD_LIMIT:
+                        timed_out = True
+                        common.log(
+                            "WARN",
+                            f"No end button after {elapsed:.0f}s (limit {HARD_LIMIT:.0f}s). "
+                            "Assuming match is stuck / failed, forcing post-match cleanup."
+                        )
+                        break
+
+                    s = config.refresh(common.log)
                     common.log(
-                        "WARN",
-                        f"No end button after {elapsed:.0f}s (limit {HARD_LIMIT:.0f}s). "
-                        "Assuming match is stuck / failed, forcing post-match cleanup."
+                        "STATE",
+                        f"Match still in progress ({elapsed:.0f}s elapsed), "
+                        f"checking again in {int(s.SEARCH_CHECK_INTERVAL)}s..."
                     )
-                    break
-
-                common.log(
-                    "STATE",
-                    f"Match still in progress ({elapsed:.0f}s elapsed), "
-                    f"checking again in {int(common.SEARCH_CHECK_INTERVAL)}s..."
-                )
-                sleep_with_stop(common.SEARCH_CHECK_INTERVAL, stop_event)
+                    sleep_with_stop(s.SEARCH_CHECK_INTERVAL, stop_event)
 
             if stop_event.is_set():
                 break
 
             match_duration = time.time() - match_start
             common.log("INFO", f"Match finished (or timed out) in {match_duration:.1f} seconds.")
-            common.stats_queue.put(match_duration)
+            stats = {"duration": match_duration, "timestamp": time.time()}
+            ctx = instance.current()
+            if ctx is not None:
+                ctx.record_match(match_duration)
+                stats["instance"] = ctx.name
+            common.stats_channel.publish(stats)
 
             # update session counters
+            s = config.refresh(common.log)
             matches_this_session += 1
             elapsed_minutes = (time.time() - session_start) / 60.0
 
-            if common.MAX_MATCHES_PER_RUN is not None and matches_this_session >= common.MAX_MATCHES_PER_RUN:
-                common.log("STATE", f"Reached max matches per run ({common.MAX_MATCHES_PER_RUN}). Stopping bot.")
+            if s.MAX_MATCHES_PER_RUN is not None and matches_this_session >= s.MAX_MATCHES_PER_RUN:
+                common.log("STATE", f"Reached max matches per run ({s.MAX_MATCHES_PER_RUN}). Stopping bot.")
                 break
 
-            if common.MAX_RUNTIME_MINUTES is not None and elapsed_minutes >= common.MAX_RUNTIME_MINUTES:
+            if s.MAX_RUNTIME_MINUTES is not None and elapsed_minutes >= s.MAX_RUNTIME_MINUTES:
                 common.log(
                     "STATE",
-                    f"Reached max runtime ({elapsed_minutes:.1f} / {common.MAX_RUNTIME_MINUTES:.1f} min). Stopping bot."
+                    f"Reached max runtime ({elapsed_minutes:.1f} / {s.MAX_RUNTIME_MINUTES:.1f} min). Stopping bot."
                 )
                 break
 
@@ -141,9 +184,17 @@ def bot_main(stop_event):
             else:
                 common.log("STATE", "End-screen confirmed. Running post-match clicks...")
 
-            post_match_clicks(stop_event)
+            with tracing.span("post_match", cat="state", timed_out=timed_out):
+                in_lobby = s.NAV_CLOSED_LOOP and nav.to_lobby(stop_event)
+                if not in_lobby and not stop_event.is_set():
+                    fell_back = fell_back or s.NAV_CLOSED_LOOP
+                    post_match_clicks(stop_event)
+                    in_lobby = is_back_in_lobby(stop_event)
             if stop_event.is_set():
                 break
+            # checked visually: the match ended on its own and the clicks got us back to the lobby
+            # (without the navigator having to fall back to the blind sequence)
+            stages.report_cycle("Ranked", not timed_out and in_lobby and not fell_back, time.time() - cycle_start)
 
             common.log("INFO", "Cycle completed. Going back to menu and starting over.\n")
 
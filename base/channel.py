@@ -0,0 +1,81 @@
+# base/channel.py
+
+import threading
+from collections import deque
+
+# ========== PUBLISH / SUBSCRIBE CHANNEL ==========
+#
+# Replacement for the old module-level queue.Queue + 90 ms GUI poll.
+#
+# - publish() is called from any thread (bot, trainers, watchers).
+# - sinks see every item synchronously on the publisher thread (console, file).
+# - ready listeners get ONE wake-up per burst: the first publish after a
+#   drain() fires them, later publishes just buffer until someone drains.
+#   The GUI hooks a queued Qt signal here and drains once per frame, so an
+#   idle bot costs nothing and a DEBUG burst costs one repaint.
+
+
+class Channel:
+
+    def __init__(self, name: str, maxlen: int | None = None):
+        self.name = name
+        self._items: deque = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._pending = False
+        self._sinks: list = []
+        self._ready_listeners: list = []
+
+    def publish(self, item):
+        for sink in self._sinks:
+            try:
+                sink(item)
+            except Exception:
+                pass
+
+        with self._lock:
+            self._items.append(item)
+            if self._pending or not self._ready_listeners:
+                return
+            self._pending = True
+            listeners = list(self._ready_listeners)
+
+        for cb in listeners:
+            try:
+                cb()
+            except Exception:
+                pass
+
+    def drain(self) -> list:
+        """Take everything buffered so far; re-arms the ready notification."""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            self._pending = False
+        return items
+
+    def add_sink(self, fn):
+        """fn(item) for every published item, on the publisher's thread."""
+        self._sinks = self._sinks + [fn]
+
+    def remove_sink(self, fn):
+        self._sinks = [s for s in self._sinks if s is not fn]
+
+    def on_ready(self, callback):
+        """
+        callback() once per burst, on the publisher's thread. It should only
+        schedule a drain() (e.g. emit a queued Qt signal), never block.
+        """
+        with self._lock:
+            self._ready_listeners.append(callback)
+            fire = bool(self._items) and not self._pending
+            if fire:
+                self._pending = True
+        if fire:
+            callback()
+
+    def off_ready(self, callback):
+        with self._lock:
+            self._ready_listeners = [c for c in self._ready_listeners if c is not callback]
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,206 @@
+# base/cli.py
+
+import argparse
+import importlib
+import signal
+import sys
+import threading
+
+from . import common
+from . import hotkeys
+from . import window_watcher
+
+# ========== HEADLESS RUNNER ==========
+#
+#   python -m base.cli ranked|ramen|blue|pink [--log-file PATH]
+#   python -m base.cli ranked --instances N [--stagger SECONDS]
+#   python -m base.cli ranked|ramen|blue|pink --tune [--steps NAME,...]
+#
+# Same workers as the GUI, without PySide6: nothing in here (or in the
+# worker modules) may import Qt. Logs go to stdout through common.log() and,
+# optionally, to a file sink on the log channel. Ctrl+C (or STOP_HOTKEY, see
+# hotkeys.py) sets the stop event; a second Ctrl+C exits immediately.
+
+MODES = {
+    # mode: (module, entry point, thread name)
+    "ranked": (".bot", "bot_main", "bot_thread"),
+    "ramen": (".ramen", "run_ramen_trainer", "ramen_thread"),
+    "blue": (".beans.blue", "run_blue_beans_trainer", "blue_beans_thread"),
+    "pink": (".beans.pink", "run_pink_beans_trainer", "pink_beans_thread"),
+}
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m base.cli",
+        description="Run a bot/trainer mode without the GUI.",
+    )
+    parser.add_argument("mode", choices=sorted(MODES))
+    parser.add_argument(
+        "--log-file",
+        metavar="PATH",
+        help="also append every log line to this file (UTF-8)",
+    )
+    parser.add_argument(
+        "--instances",
+        type=int,
+        default=1,
+        metavar="N",
+        help="ranked only: drive N game windows from this process",
+    )
+    parser.add_argument(
+        "--stagger",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="delay between instance starts (default: INSTANCE_STAGGER)",
+    )
+    parser.add_argument(
+        "--isolated",
+        action="store_true",
+        help="run the worker in a child process, restarted if it crashes",
+    )
+    parser.add_argument(
+        "--tune",
+        action="store_true",
+        help="shrink the mode's delays to the smallest that still work (see tuner.py)",
+    )
+    parser.add_argument(
+        "--steps",
+        metavar="NAME,...",
+        help="with --tune: only these delay settings (default: all of the mode's)",
+    )
+    args = parser.parse_args(argv)
+    if args.instances < 1:
+        parser.error("--instances must be at least 1")
+    if args.instances > 1 and args.mode != "ranked":
+        parser.error("--instances is only supported for ranked mode")
+    if args.instances > 1 and args.isolated:
+        parser.error("--isolated can't be combined with --instances")
+    if args.tune and (args.instances > 1 or args.isolated):
+        parser.error("--tune can't be combined with --instances or --isolated")
+    if args.steps and not args.tune:
+        parser.error("--steps is only used with --tune")
+    return args
+
+
+def _open_file_sink(path: str):
+    f = open(path, "a", encoding="utf-8")
+
+    def sink(item):
+        _level, line = item
+        f.write(line)
+        f.flush()
+
+    common.log_channel.add_sink(sink)
+    return f, sink
+
+
+def _log_window_state(state):
+    if not state.exists:
+        common.log("WARN", "Game window: not found.")
+    elif state.minimized:
+        common.log("WARN", "Game window: minimized.")
+    else:
+        common.log(
+            "INFO",
+            f"Game window: {'active' if state.active else 'inactive'} "
+            f"({state.client_width}x{state.client_height} client area)."
+        )
+
+
+def _install_stop_handler(stop_event: threading.Event):
+    def handler(signum, frame):
+        if stop_event.is_set():
+            common.log("WARN", "CLI: second interrupt, exiting now.")
+            raise SystemExit(130)
+        common.log("INFO", "CLI: stop requested, waiting for the worker to finish...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handler)
+    if hasattr(signal, "SIGBREAK"):  # Ctrl+Break on Windows consoles
+        signal.signal(signal.SIGBREAK, handler)
+
+
+def _run_supervised(entry, args, stop_event: threading.Event) -> int:
+    from .supervisor import Supervisor
+
+    sup = Supervisor(entry, args.instances, stagger=args.stagger)
+    if not sup.start():
+        return 1
+    common.log("INFO", "Press Ctrl+C to stop all instances.")
+
+    while sup.is_alive():
+        sup.join(0.25)
+        if stop_event.is_set():
+            sup.stop()
+
+    for ctx in sup.contexts:
+        common.log("INFO", f"Instance {ctx.name}: {ctx.stats['matches']} match(es).")
+    common.log("INFO", "CLI: all instances finished.")
+    return 0
+
+
+def main(argv=None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    module_name, entry_name, thread_name = MODES[args.mode]
+
+    log_file = sink = None
+    if args.log_file:
+        log_file, sink = _open_file_sink(args.log_file)
+
+    stop_hotkey = None
+    try:
+        common.log("INFO", f"IEVR Helper {common.APP_VERSION} (headless) - mode: {args.mode}")
+
+        entry = getattr(importlib.import_module(module_name, __package__), entry_name)
+        from .tuner import apply_profile
+        apply_profile(args.mode)  # before --tune too: it starts from this machine's delays
+        stop_event = threading.Event()
+        _install_stop_handler(stop_event)
+        stop_hotkey = hotkeys.install(stop_event.set)
+
+        if args.instances > 1:
+            return _run_supervised(entry, args, stop_event)
+
+        watcher = window_watcher.get_watcher()
+        watcher.subscribe(_log_window_state)
+
+        if args.tune:
+            from .tuner import Tuner
+            names = [n.strip().upper() for n in args.steps.split(",") if n.strip()] if args.steps else None
+            code = Tuner(args.mode, entry, stop_event, names).run()
+            watcher.stop()
+            return code
+
+        if args.isolated:
+            from .process_pool import ProcessWorker
+            worker = ProcessWorker(args.mode, stop_event, name=thread_name)
+        else:
+            worker = threading.Thread(
+                target=entry, args=(stop_event,), daemon=True, name=thread_name
+            )
+        worker.start()
+        if not args.isolated:
+            from .watchdog import watch
+            watch(worker, stop_event)
+        common.log("INFO", f"{thread_name} started from CLI. Press Ctrl+C to stop.")
+
+        # join with a timeout so the main thread keeps receiving signals
+        while worker.is_alive():
+            worker.join(0.25)
+
+        common.log("INFO", "CLI: worker finished.")
+        watcher.stop()
+        return 0
+
+    finally:
+        if stop_hotkey is not None:
+            stop_hotkey.close()
+        if sink is not None:
+            common.log_channel.remove_sink(sink)
+            log_file.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# base/colors.py
+
+import math
+import statistics
+import time
+
+from . import common
+
+# ========== COLOR SIGNATURES ==========
+#
+# A calibrated color used to be one pixel read at one instant, which can land
+# on an animation frame or an anti-aliased edge. Now a (2r+1)^2 patch around
+# the probe point is captured over COLOR_SAMPLE_FRAMES frames and reduced to
+#
+#   median  per-channel median of every sample  -> stored as the *_COLOR
+#   spread  per-channel 90th percentile of |sample - median| -> *_SPREAD
+#
+# and each probe derives its tolerance from the spread (tolerance()), in its
+# own distance metric. Settings without a spread (older calibrations) keep
+# the probe's historical fixed threshold.
+
+
+def _patch(x: int, y: int, radius: int):
+    size = 2 * radius + 1
+    img = common.get_pyautogui().screenshot(region=(x - radius, y - radius, size, size))
+    return [px[:3] for px in img.convert("RGB").getdata()]
+
+
+def _percentile(values, q: float):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def signature(samples):
+    """[(r, g, b)] -> (median, spread), both (r, g, b) int tuples."""
+    median = tuple(int(statistics.median(s[c] for s in samples)) for c in range(3))
+    spread = tuple(
+        int(_percentile([abs(s[c] - median[c]) for s in samples], 0.9))
+        for c in range(3)
+    )
+    return median, spread
+
+
+def sample(x: int, y: int, stop_event=None, frames: int | None = None,
+           radius: int | None = None, interval: float | None = None):
+    """
+    Color signature of the screen around (x, y): (median, spread).
+    Takes about frames * interval seconds.
+    """
+    frames = max(1, int(common.COLOR_SAMPLE_FRAMES if frames is None else frames))
+    radius = max(0, int(common.COLOR_SAMPLE_RADIUS if radius is None else radius))
+    interval = common.COLOR_SAMPLE_INTERVAL if interval is None else interval
+
+    samples = []
+    for i in range(frames):
+        if stop_event is not None and stop_event.is_set():
+            break
+        if i:
+            time.sleep(interval)
+        samples.extend(_patch(int(x), int(y), radius))
+    if not samples:
+        samples = [common.get_pyautogui().pixel(int(x), int(y))[:3]]
+
+    median, spread = signature(samples)
+    common.log("DEBUG", f"Color signature at ({x}, {y}): median={median}, spread={spread} ({len(samples)} samples)")
+    return median, spread
+
+
+def tolerance(spread, metric: str, default: float) -> float:
+    """
+    Match threshold for a probe from its calibrated `spread`:
+      metric "channel"   -> max per-channel difference,
+      metric "euclidean" -> RGB distance.
+    `default` (the old fixed threshold) is used when there is no spread.
+    """
+    if not spread:
+        return float(default)
+    k, margin = common.COLOR_TOL_K, common.COLOR_TOL_MARGIN
+    if metric == "channel":
+        tol = k * max(spread) + margin
+    else:
+        tol = k * math.sqrt(sum(s * s for s in spread)) + margin * math.sqrt(3)
+    return float(max(common.COLOR_TOL_MIN, min(common.COLOR_TOL_MAX, tol)))
@@ -1,19 +1,24 @@
-import queue
 from datetime import datetime
 import os
-import sys
 import platform
 import json
-import urllib.request
+import threading
 import time
 
-import pyautogui
 from .tools import resource_path
+from . import config
+from . import tracing
+from . import instance
+from .channel import Channel
 
 # ========== LOGGING ==========
 
-log_queue = queue.Queue()
-stats_queue = queue.Queue()
+# publish/subscribe: the GUI is woken up only when something arrives.
+# The log buffer is bounded so a run without a GUI draining it can't grow forever.
+log_channel = Channel("log", maxlen=10000)
+stats_channel = Channel("stats")
+# one item per finished trainer / ranked cycle (stages.report_cycle), used by the tuner
+cycle_channel = Channel("cycles", maxlen=1000)
 
 
 def log(level: str, msg: str):
@@ -27,6 +32,9 @@ def log(level: str, msg: str):
         "ERROR": "🛑 ",
     }
     icon = icons.get(level, "")
+    ctx = instance.current()
+    if ctx is not None:
+        msg = f"[{ctx.name}] {msg}"
     full = f"[{ts}] [{level:5}] {icon}{msg}"
 
     # Print to console, but be robust to non-UTF-8 terminals (PyInstaller + cp1252)
@@ -37,8 +45,8 @@ def log(level: str, msg: str):
         safe = full.encode("ascii", "ignore").decode("ascii", "ignore")
         print(safe)
 
-    # Internal queue keeps full Unicode (GUI log is fine)
-    log_queue.put((level.upper(), full + "\n"))
+    # Internal channel keeps full Unicode (GUI log is fine)
+    log_channel.publish((level.upper(), full + "\n"))
 
 # virtual gamepad (optional, for CHIAKI4DECK mode)
 vg = None
@@ -94,172 +102,162 @@ GITHUB_REPO = "veerack/ievr-automatch"
 APP_RELEASE_URL = f"https://github.com/{GITHUB_REPO}/releases"
 APP_LATEST_RELEASE_API = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
 
-# ---------------- SETTINGS IMPORT (DEV + FROZEN) ----------------
+# ---------------- SETTINGS (base/settings.json, see config.py) ----------------
 
-def _load_settings_module():
-    """
-    Load settings, preferring the external base/settings.py
-    when running as a PyInstaller exe.
-    """
-    import importlib.util
-
-    # If running as PyInstaller exe, look for ./base/settings.py
-    if getattr(sys, "frozen", False):
-        exe_dir = os.path.dirname(sys.executable)
-        base_dir = os.path.join(exe_dir, "base")
-        settings_path = os.path.join(base_dir, "settings.py")
-
-        if os.path.exists(settings_path):
-            spec = importlib.util.spec_from_file_location(
-                "user_settings", settings_path
-            )
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            return module
-
-        # Fallback to bundled defaults if external file missing
-        from base import settings as module
-        return module
+# cfg is what settings.json holds. Session-only values (apply_settings:
+# calibration profiles, timing profiles, tuner candidates) are a layer on
+# top of it: published with it, kept across saves and reloads, never written.
+cfg = config.load(report=log)
+_session: dict = {}
 
-    # --- normal dev / non-frozen ---
-    try:
-        from base import settings as module
-    except ImportError:
-        import settings as module
-    return module
 
+def _layered(settings):
+    if not _session:
+        return settings
+    data = config.to_dict(settings)
+    data.update(_session)
+    return config.from_dict(data)[0]
 
-settings = _load_settings_module()
-cfg = settings
 
-def reload_settings():
+def _publish(settings):
     """
-    Reload the settings module (dev or frozen) and update `cfg`.
-    Uses the already-imported `settings` object, so it works
-    whether it's `base.settings` or plain `settings`.
+    Make `settings` (+ the session layer) current: every Settings field
+    becomes a module global here (common.SEARCH_CHECK_INTERVAL, ...),
+    refreshed on each save/reload. This module itself reads them through
+    get_value() (or cfg), as the names only exist at runtime.
     """
-    global settings, cfg
-    settings = _load_settings_module()
+    global cfg
     cfg = settings
+    current = _layered(settings)
+    config.publish(current)
+    g = globals()
+    for name in config.FIELDS:
+        g[name] = getattr(current, name)
 
-# ========== GLOBAL CONFIG FROM settings.py ==========
-
-GAME_WINDOW_TITLE = getattr(cfg, "GAME_WINDOW_TITLE", "Inazuma Eleven: Victory Road")
-AUTO_MODE_KEY = getattr(cfg, "AUTO_MODE_KEY", "u")
-CHIAKI4DECK = getattr(cfg, "CHIAKI4DECK", False)
-
-DELAY_BEFORE_START = getattr(cfg, "DELAY_BEFORE_START", 5.0)
-FIRST_WAIT = getattr(cfg, "FIRST_WAIT", 15.0)
-SECOND_WAIT = getattr(cfg, "SECOND_WAIT", 80.0)
-MATCH_DURATION = getattr(cfg, "MATCH_DURATION", 780.0)
-POST_MATCH_CLICKS = getattr(cfg, "POST_MATCH_CLICKS", 20)
-POST_MATCH_CLICK_INTERVAL = getattr(cfg, "POST_MATCH_CLICK_INTERVAL", 0.3)
-SEARCH_CHECK_INTERVAL = getattr(cfg, "SEARCH_CHECK_INTERVAL", 20.0)
-
-PLAY_BUTTON_OFFSET = getattr(cfg, "PLAY_BUTTON_OFFSET", (292, 247))
-ANNUL_PIXEL_OFFSET = getattr(cfg, "ANNUL_PIXEL_OFFSET", (499, 375))
-ANNUL_PIXEL_COLOR = getattr(cfg, "ANNUL_PIXEL_COLOR", (250, 253, 254))
-
-PLAY_BUTTON_OFFSET_CHIAKI = getattr(cfg, "PLAY_BUTTON_OFFSET_CHIAKI", (358, 263))
-ANNUL_PIXEL_OFFSET_CHIAKI = getattr(cfg, "ANNUL_PIXEL_OFFSET_CHIAKI", (475, 384))
-ANNUL_PIXEL_COLOR_CHIAKI = getattr(cfg, "ANNUL_PIXEL_COLOR_CHIAKI", (0, 174, 206))
-
-END_BUTTON_OFFSET = getattr(cfg, "END_BUTTON_OFFSET", (60, 57))
-END_BUTTON_COLOR = getattr(cfg, "END_BUTTON_COLOR", (172, 158, 48))
-
-LVL_75_PLUS = getattr(cfg, "LVL_75_PLUS", False)
-MATCH_TIMEOUT_MARGIN = getattr(cfg, "MATCH_TIMEOUT_MARGIN", 120.0)
-
-MAX_MATCHES_PER_RUN = getattr(cfg, "MAX_MATCHES_PER_RUN", None)
-MAX_RUNTIME_MINUTES = getattr(cfg, "MAX_RUNTIME_MINUTES", None)
-
-PLAY_BUTTON_IDLE_COLOR = getattr(cfg, "PLAY_BUTTON_IDLE_COLOR", None)
 
-RAMEN_INITIAL_DELAY = getattr(cfg, "RAMEN_INITIAL_DELAY", 10.0)
-RAMEN_FIRST_ENTER_COUNT = getattr(cfg, "RAMEN_FIRST_ENTER_COUNT", 4)
-RAMEN_FIRST_ENTER_DELAY = getattr(cfg, "RAMEN_FIRST_ENTER_DELAY", 1.0)
-RAMEN_AFTER_FIRST_WAIT = getattr(cfg, "RAMEN_AFTER_FIRST_WAIT", 5.0)
+_publish(cfg)
 
-RAMEN_W_MIN = getattr(cfg, "RAMEN_W_MIN", 7)
-RAMEN_W_MAX = getattr(cfg, "RAMEN_W_MAX", 8)
-RAMEN_W_DELAY = getattr(cfg, "RAMEN_W_DELAY", 1.5)
 
-RAMEN_LONG_WAIT_MIN = getattr(cfg, "RAMEN_LONG_WAIT_MIN", 15.0)
-RAMEN_LONG_WAIT_MAX = getattr(cfg, "RAMEN_LONG_WAIT_MAX", 16.0)
-
-RAMEN_FINAL_ENTER_COUNT = getattr(cfg, "RAMEN_FINAL_ENTER_COUNT", 2)
-RAMEN_FINAL_ENTER_DELAY = getattr(cfg, "RAMEN_FINAL_ENTER_DELAY", 1.5)
-RAMEN_AFTER_FINAL_WAIT = getattr(cfg, "RAMEN_AFTER_FINAL_WAIT", 5.0)
-
-# ================= PINK BEANS TRAINER =================
-
-PINK_INITIAL_DELAY = getattr(cfg, "PINK_INITIAL_DELAY", 5.0)
-
-PINK_ENTER1_DELAY = getattr(cfg, "PINK_ENTER1_DELAY", 1.2)
-PINK_ENTER2_DELAY = getattr(cfg, "PINK_ENTER2_DELAY", 0.7)
-PINK_UP_DELAY = getattr(cfg, "PINK_UP_DELAY", 0.1)
-PINK_ENTER3_DELAY = getattr(cfg, "PINK_ENTER3_DELAY", 0.2)
-PINK_ENTER4_DELAY = getattr(cfg, "PINK_ENTER4_DELAY", 7.0)
+def reload_settings():
+    """
+    Re-read settings.json and publish it (no code is executed). A field
+    saved with a new value meanwhile replaces its session value, as in
+    save_settings_to_file.
+    """
+    settings = config.load(report=log)
+    for name in [n for n in _session if getattr(settings, n) != getattr(cfg, n)]:
+        del _session[name]
+    _publish(settings)
 
-PINK_ESC_AFTER_DELAY = getattr(cfg, "PINK_ESC_AFTER_DELAY", 0.1)
-PINK_V_AFTER_DELAY = getattr(cfg, "PINK_V_AFTER_DELAY", 2.0)
-PINK_V_HOLD_DURATION = getattr(cfg, "PINK_V_HOLD_DURATION", 2.0)
-PINK_AFTER_HOLD_DELAY = getattr(cfg, "PINK_AFTER_HOLD_DELAY", 3.0)
 
-PINK_DOWN_DELAY = getattr(cfg, "PINK_DOWN_DELAY", 0.5)
-PINK_FINAL_ENTER_DELAY = getattr(cfg, "PINK_FINAL_ENTER_DELAY", 4.0)
+# runtime state captured by the bot, not persisted
+PLAY_BUTTON_IDLE_COLOR = None
+PLAY_BUTTON_IDLE_SPREAD = None
 
-# ================= BLUE BEANS TRAINER =================
+tracing.configure(
+    enabled=cfg.TRACE_ENABLED,
+    capacity=cfg.TRACE_BUFFER_SIZE,
+    dump_on_exit=cfg.TRACE_DUMP_ON_EXIT,
+)
 
-BLUE_INITIAL_DELAY = getattr(cfg, "BLUE_INITIAL_DELAY", 5.0)
+def get_value(name: str):
+    """
+    Setting `name` for the current instance: the bound InstanceContext's
+    override if it has one, else the module global (e.g. PLAY_BUTTON_OFFSET).
+    """
+    ctx = instance.current()
+    if ctx is not None and name in ctx.overrides:
+        return ctx.overrides[name]
+    return globals().get(name)
 
-BLUE_ENTER1_DELAY = getattr(cfg, "BLUE_ENTER1_DELAY", 1.2)
-BLUE_ENTER2_DELAY = getattr(cfg, "BLUE_ENTER2_DELAY", 0.7)
-BLUE_UP_DELAY = getattr(cfg, "BLUE_UP_DELAY", 0.3)
-BLUE_ENTER3_DELAY = getattr(cfg, "BLUE_ENTER3_DELAY", 0.3)
-BLUE_ENTER4_DELAY = getattr(cfg, "BLUE_ENTER4_DELAY", 7.0)
 
-BLUE_A1_DELAY = getattr(cfg, "BLUE_A1_DELAY", 4.5)
-BLUE_S1_DELAY = getattr(cfg, "BLUE_S1_DELAY", 8.5)
-BLUE_A2_DELAY = getattr(cfg, "BLUE_A2_DELAY", 4.0)
-BLUE_S2_DELAY = getattr(cfg, "BLUE_S2_DELAY", 10.0)
-BLUE_A3_DELAY = getattr(cfg, "BLUE_A3_DELAY", 3.0)
-BLUE_S3_DELAY = getattr(cfg, "BLUE_S3_DELAY", 5.0)
-BLUE_A4_DELAY = getattr(cfg, "BLUE_A4_DELAY", 12.0)
+def set_value(name: str, value):
+    """
+    Set `name` for the current instance only. With no instance bound, a
+    setting goes to the session layer (apply_settings), so it survives the
+    next save / reload; runtime state is a plain module global.
+    """
+    ctx = instance.current()
+    if ctx is not None:
+        ctx.overrides[name] = value
+    elif name in config.FIELDS:
+        apply_settings({name: value})
+    else:
+        globals()[name] = value
 
-BLUE_ENTER5_DELAY = getattr(cfg, "BLUE_ENTER5_DELAY", 1.5)
-BLUE_COOLDOWN_DELAY = getattr(cfg, "BLUE_COOLDOWN_DELAY", 70.0)
 
 def get_play_button_offset():
     """Return the correct Ranked Match button offset for current mode."""
-    if CHIAKI4DECK:
-        return PLAY_BUTTON_OFFSET_CHIAKI
-    return PLAY_BUTTON_OFFSET
+    if get_value("CHIAKI4DECK"):
+        return get_value("PLAY_BUTTON_OFFSET_CHIAKI")
+    return get_value("PLAY_BUTTON_OFFSET")
 
 
 def get_annul_pixel():
     """Return (offset, color) for the search CANCEL button for current mode."""
-    if CHIAKI4DECK:
-        return ANNUL_PIXEL_OFFSET_CHIAKI, ANNUL_PIXEL_COLOR_CHIAKI
-    return ANNUL_PIXEL_OFFSET, ANNUL_PIXEL_COLOR
+    if get_value("CHIAKI4DECK"):
+        return get_value("ANNUL_PIXEL_OFFSET_CHIAKI"), get_value("ANNUL_PIXEL_COLOR_CHIAKI")
+    return get_value("ANNUL_PIXEL_OFFSET"), get_value("ANNUL_PIXEL_COLOR")
+
+
+def get_annul_spread():
+    """Calibrated color spread of the CANCEL pixel for current mode (or None)."""
+    if get_value("CHIAKI4DECK"):
+        return get_value("ANNUL_PIXEL_SPREAD_CHIAKI")
+    return get_value("ANNUL_PIXEL_SPREAD")
 
 
 def get_end_button():
     """
     Return (offset, color) for the 'Next' / end-of-match button
-    for current mode. You can later add *_CHIAKI values in settings
-    if needed.
+    for current mode. The *_CHIAKI values fall back to the plain ones.
     """
-    offset = getattr(cfg, "END_BUTTON_OFFSET_CHIAKI", END_BUTTON_OFFSET)
-    color  = getattr(cfg, "END_BUTTON_COLOR_CHIAKI", END_BUTTON_COLOR)
-    if CHIAKI4DECK:
-        return offset, color
-    return END_BUTTON_OFFSET, END_BUTTON_COLOR
+    end_offset = get_value("END_BUTTON_OFFSET")
+    end_color = get_value("END_BUTTON_COLOR")
+    if get_value("CHIAKI4DECK"):
+        offset = get_value("END_BUTTON_OFFSET_CHIAKI")
+        color = get_value("END_BUTTON_COLOR_CHIAKI")
+        return (offset or end_offset), (color or end_color)
+    return end_offset, end_color
+
+
+def get_end_spread():
+    """Calibrated color spread of the end-of-match button for current mode (or None)."""
+    spread = get_value("END_BUTTON_SPREAD")
+    if get_value("CHIAKI4DECK"):
+        return get_value("END_BUTTON_SPREAD_CHIAKI") or spread
+    return spread
+
+
+# calibrated settings with a separate *_CHIAKI value, read by the getters above
+CHIAKI_VARIANTS = {
+    "PLAY_BUTTON_OFFSET",
+    "ANNUL_PIXEL_OFFSET", "ANNUL_PIXEL_COLOR", "ANNUL_PIXEL_SPREAD",
+    "END_BUTTON_OFFSET", "END_BUTTON_COLOR", "END_BUTTON_SPREAD",
+}
+
+
+def mode_setting(key: str) -> str:
+    """Name of the setting `key` is read from in the current input mode."""
+    if get_value("CHIAKI4DECK") and key in CHIAKI_VARIANTS:
+        return key + "_CHIAKI"
+    return key
 
 # ========== PYAUTOGUI GLOBALS ==========
 
-pyautogui.FAILSAFE = False
-pyautogui.PAUSE = 0.05
+# pyautogui pulls in pyscreeze / PIL / pymsgbox / pygetwindow on import, which is
+# a big slice of cold start. It is imported on first use instead, and our
+# globals are applied at that point.
+pyautogui = None
+
+def get_pyautogui():
+    global pyautogui
+    if pyautogui is None:
+        import pyautogui as _pag
+        _pag.FAILSAFE = False
+        _pag.PAUSE = 0.05
+        pyautogui = _pag
+    return pyautogui
 
 # ========== INPUT BACKEND (KB/MOUSE vs VIRTUAL GAMEPAD) ==========
 
@@ -472,6 +470,7 @@ class InputBackend:
 
     # ---------- high-level semantics ----------
 
+    @tracing.traced("input")
     def skip_formation(self):
         """
         Equivalent of ALT skip:
@@ -479,9 +478,10 @@ class InputBackend:
         - Gamepad: 'options' / 'start'.
         """
         if self.mode == "kbmouse":
-            pyautogui.keyDown("altleft")
+            pag = get_pyautogui()
+            pag.keyDown("altleft")
             time.sleep(0.25)
-            pyautogui.keyUp("altleft")
+            pag.keyUp("altleft")
             return
 
         # DS4: 'options', XInput: 'start'
@@ -490,6 +490,7 @@ class InputBackend:
         else:
             self._tap_button_name("start", duration=0.10)
 
+    @tracing.traced("input")
     def press_key(self, key: str):
         """
         Abstracted 'press key':
@@ -500,13 +501,13 @@ class InputBackend:
 
         # ---------- KB / MOUSE MODE ----------
         if self.mode == "kbmouse":
-            pyautogui.press(key)
+            get_pyautogui().press(key)
             return
 
         # ---------- GAMEPAD MODE ----------
 
         # --- AUTO MODE (your bot key, usually "u") ---
-        if key_low == AUTO_MODE_KEY.lower():
+        if key_low == get_value("AUTO_MODE_KEY").lower():
             log("DEBUG", "press_key(auto): DPad DOWN")
             self._tap_dpad_name("down", duration=0.25)
             return
@@ -570,6 +571,7 @@ class InputBackend:
         # Fallback
         log("WARN", f"press_key({key!r}) not mapped in gamepad mode; ignoring.")
 
+    @tracing.traced("input")
     def click_at(self, x: int, y: int, button: str = "left"):
         """
         Abstracted click.
@@ -577,7 +579,7 @@ class InputBackend:
         - Gamepad: simulate confirmation (Cross / A).
         """
         if self.mode == "kbmouse":
-            pyautogui.click(x=x, y=y, button=button)
+            get_pyautogui().click(x=x, y=y, button=button)
             return
 
         log("DEBUG", f"click_at({x}, {y}) -> pad 'confirm'")
@@ -587,15 +589,17 @@ class InputBackend:
         else:
             self._tap_button_name("a", duration=0.08)
 
+    @tracing.traced("input")
     def move_to(self, x: int, y: int, **kwargs):
         if self.mode == "kbmouse":
-            pyautogui.moveTo(x, y, **kwargs)
+            get_pyautogui().moveTo(x, y, **kwargs)
         else:
             log("DEBUG", "move_to() called in gamepad mode - ignored.")
 
+    @tracing.traced("input")
     def right_click(self):
         if self.mode == "kbmouse":
-            pyautogui.click(button="right")
+            get_pyautogui().click(button="right")
         else:
             # Cancel semantics: Circle / B
             if self.pad_type == "ds4":
@@ -616,6 +620,7 @@ class InputBackend:
         self.gamepad.update()
 
 
+    @tracing.traced("input")
     def hold_button_name(self, name: str):
         """Hold a logical button (press without release)."""
         if self.mode != "gamepad":
@@ -628,6 +633,7 @@ class InputBackend:
         self._hold_button_raw(btn)
 
 
+    @tracing.traced("input")
     def release_button_name(self, name: str):
         """Release a logical button."""
         if self.mode != "gamepad":
@@ -670,8 +676,27 @@ class InputBackend:
         self.gamepad.left_joystick(x_value=x_i, y_value=y_i)
         self.gamepad.update()
         
-# Create a singleton backend used by the bot
-input_backend = InputBackend(CHIAKI4DECK)
+# Singleton backend used by the bot, created on first use: in CHIAKI4DECK mode
+# this imports vgamepad and opens a virtual pad, which shouldn't delay the GUI.
+_input_backend = None
+
+def get_input_backend() -> InputBackend:
+    global _input_backend
+    # each bound instance gets its own backend (own virtual pad in CHIAKI4DECK mode)
+    ctx = instance.current()
+    if ctx is not None:
+        if ctx.input_backend is None:
+            ctx.input_backend = InputBackend(get_value("CHIAKI4DECK"))
+        return ctx.input_backend
+    if _input_backend is None:
+        _input_backend = InputBackend(get_value("CHIAKI4DECK"))
+    return _input_backend
+
+
+def set_input_backend(backend: InputBackend):
+    """Swap the shared backend (e.g. after toggling Chiaki4Deck in Settings)."""
+    global _input_backend
+    _input_backend = backend
 
 # ------------- Convenience helpers (global) -------------
 
@@ -683,10 +708,11 @@ def pad_tap(button_name: str, duration: float = 0.12):
         common.pad_tap("cross")
         common.pad_tap("l1")
     """
-    if input_backend.mode != "gamepad":
+    backend = get_input_backend()
+    if backend.mode != "gamepad":
         log("DEBUG", f"pad_tap({button_name}): not in gamepad mode, ignoring.")
         return
-    input_backend._tap_button_name(button_name, duration=duration)
+    backend._tap_button_name(button_name, duration=duration)
 
 
 def pad_dpad(direction: str, duration: float = 0.20):
@@ -696,10 +722,11 @@ def pad_dpad(direction: str, duration: float = 0.20):
         common.pad_dpad("up")
         common.pad_dpad("down")
     """
-    if input_backend.mode != "gamepad":
+    backend = get_input_backend()
+    if backend.mode != "gamepad":
         log("DEBUG", f"pad_dpad({direction}): not in gamepad mode, ignoring.")
         return
-    input_backend._tap_dpad_name(direction, duration=duration)
+    backend._tap_dpad_name(direction, duration=duration)
 
 def install_vigem_driver() -> tuple[bool, str]:
     """
@@ -779,13 +806,13 @@ def send_auto_mode():
     Send the auto-mode input through the active backend
     (mouse/keyboard or virtual gamepad).
     """
-    input_backend.press_key(AUTO_MODE_KEY)
+    get_input_backend().press_key(get_value("AUTO_MODE_KEY"))
 
 def skip_formation():
-    input_backend.skip_formation()
+    get_input_backend().skip_formation()
 
 def press_enter():
-    input_backend.press_key("enter")
+    get_input_backend().press_key("enter")
 
 # backwards-compat alias for old code
 def send_enter():
@@ -842,6 +869,13 @@ def detect_hardware() -> dict:
     mouse_label = "Unknown"
     mouse_conn = "Unknown"
 
+    try:
+        # WMI is COM: every thread that uses it needs its own CoInitialize
+        import pythoncom
+        pythoncom.CoInitialize()
+    except Exception:
+        pythoncom = None
+
     try:
         import wmi
         c = wmi.WMI()
@@ -868,6 +902,13 @@ def detect_hardware() -> dict:
     except Exception as e:
         log("DEBUG", f"Hardware detection failed: {e!r}")
 
+    finally:
+        if pythoncom is not None:
+            try:
+                pythoncom.CoUninitialize()
+            except Exception:
+                pass
+
     return {
         "os": os_label,
         "keyboard": kb_label,
@@ -877,12 +918,45 @@ def detect_hardware() -> dict:
     }
 
 
-HARDWARE_INFO = detect_hardware()
+# The WMI query takes hundreds of ms (seconds on a cold boot), so it runs once,
+# on demand, ideally on a background thread after the window is visible.
+_hardware_info = None
+_hardware_lock = threading.Lock()
+
+
+def get_hardware_info() -> dict:
+    """Cached detect_hardware(). Blocks on the first call."""
+    global _hardware_info
+    with _hardware_lock:
+        if _hardware_info is None:
+            _hardware_info = detect_hardware()
+        return _hardware_info
+
+
+def start_hardware_detection(callback=None):
+    """Run get_hardware_info() on a daemon thread, then call callback(info)."""
+    def worker():
+        info = get_hardware_info()
+        if callback is not None:
+            callback(info)
+
+    threading.Thread(target=worker, daemon=True, name="hardware-detect").start()
+
+
+def __getattr__(name):
+    # Backwards-compat for the old eagerly-built module globals (PEP 562).
+    if name == "HARDWARE_INFO":
+        return get_hardware_info()
+    if name == "input_backend":
+        return get_input_backend()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def fetch_latest_version() -> str | None:
     """
     Returns latest release tag from GitHub or None on failure.
     """
+    import urllib.request
+
     try:
         url = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
         req = urllib.request.Request(
@@ -899,36 +973,52 @@ def fetch_latest_version() -> str | None:
 
 # ========== SAVE SETTINGS (SIMPLE MODE) ==========
 
-def save_settings_to_file(values: dict):
+def _merged(values: dict):
+    data = config.to_dict(cfg)
+    data.update(values)
+    settings, problems = config.from_dict(data)
+    for msg in problems:
+        log("WARN", msg)
+    return settings
+
+
+def apply_settings(values: dict) -> int:
     """
-    Save values back into base/settings.py (both dev and frozen).
-    Writes all ALL-CAPS keys it receives.
+    Publish the current settings updated with `values` for this session
+    only (nothing is written, saving a field replaces its session value).
+    Returns the new settings version.
     """
-    try:
-        # Handle frozen mode (EXE)
-        if getattr(sys, "frozen", False):
-            base_dir = os.path.join(os.path.dirname(sys.executable), "base")
-        else:
-            base_dir = os.path.dirname(os.path.abspath(settings.__file__))
+    checked = _merged(values)
+    _session.update({name: getattr(checked, name) for name in values if name in config.FIELDS})
+    _publish(cfg)
+    return config.version()
 
-        path = os.path.join(base_dir, "settings.py")
-        os.makedirs(base_dir, exist_ok=True)
 
-        with open(path, "w", encoding="utf-8") as f:
-            f.write("# Saved settings for IEVR Helper\n\n")
+def session_settings() -> dict:
+    """The session-only values currently layered over settings.json."""
+    return dict(_session)
 
-            # only write ALL-CAPS keys, sorted for stable order
-            for key in sorted(k for k in values.keys() if k.isupper()):
-                val = values[key]
-                f.write(f"{key} = {repr(val)}\n")
 
-        # reload after write so common.cfg picks up changes
-        try:
-            reload_settings()
-        except Exception as e:
-            log("WARN", f"Failed to reload settings module: {e}")
+def restore_session_settings(values: dict) -> int:
+    """Replace the session layer with `values` (e.g. from session_settings()) and publish."""
+    _session.clear()
+    _session.update(values)
+    _publish(cfg)
+    return config.version()
 
-        log("INFO", f"Settings saved to: {path}")
 
-    except Exception as e:
+def save_settings_to_file(values: dict):
+    """
+    Save the last saved settings (cfg), updated with `values`, to
+    base/settings.json in one atomic write, then publish them.
+    """
+    settings = _merged(values)
+    try:
+        path = config.save(settings)
+    except OSError as e:
         log("ERROR", f"Failed to save settings: {e}")
+        return
+    for name in values:
+        _session.pop(name, None)
+    _publish(settings)
+    log("INFO", f"Settings saved to: {path}")
@@ -0,0 +1,441 @@
+# base/config.py
+
+import ast
+import json
+import os
+import sys
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType, UnionType
+from typing import Union, get_args, get_origin
+
+# ========== SETTINGS STORE ==========
+#
+# Every setting is a field of the frozen, slotted Settings dataclass below,
+# with its type and default. They are persisted as base/settings.json
+# (next to the exe's base/ folder when frozen), written atomically
+# (temp file + fsync + rename), so a crash mid-save never leaves a
+# half-written file and loading never executes code.
+#
+# A settings.py from older versions is migrated once: its top-level
+# `NAME = <literal>` assignments are read with ast.literal_eval, never run.
+#
+# common publishes the loaded Settings as its module globals (common.X) for
+# the GUI and feature flags; workers pin() the snapshot they started with
+# and read their tuning from it.
+#
+# Every publish (each save from the GUI, calibration or reload) gets the next
+# version number. Running workers call refresh() at safe points (between
+# states, at the start of a cycle): a newer version is pinned there and its
+# changes are logged, so tuning applies on the next cycle without a restart.
+
+SETTINGS_FILE = "settings.json"
+LEGACY_FILE = "settings.py"
+
+
+def _watchdog_limits():
+    return MappingProxyType({"queue": 120, "searching": 900, "pre_match": 180, "post_match": 300})
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    # ---- Game / ranked bot ----
+    GAME_WINDOW_TITLE: str = "Inazuma Eleven: Victory Road"
+    AUTO_MODE_KEY: str = "u"
+    STOP_HOTKEY: str = "alt+c"           # global chord that stops any mode ("" = off)
+    CHIAKI4DECK: bool = False
+
+    DELAY_BEFORE_START: float = 5.0
+    FIRST_WAIT: float = 15.0
+    SECOND_WAIT: float = 80.0
+    MATCH_DURATION: float = 780.0
+    POST_MATCH_CLICKS: int = 20
+    POST_MATCH_CLICK_INTERVAL: float = 0.3
+    SEARCH_CHECK_INTERVAL: float = 20.0
+
+    LVL_75_PLUS: bool = False
+    MATCH_TIMEOUT_MARGIN: float = 120.0
+    MAX_MATCHES_PER_RUN: int | None = None
+    MAX_RUNTIME_MINUTES: float | None = None
+
+    # ---- Menu navigator (navigator.py: pre/post-match menus) ----
+    NAV_CLOSED_LOOP: bool = True         # read each menu screen instead of blind click bursts
+    NAV_REACT_TIMEOUT: float = 1.5       # wait this long for a screen to react to an input
+    NAV_SETTLE: float = 0.3              # screen still this long = transition finished
+    NAV_MAX_INPUTS: int = 30             # inputs before giving up (blind sequence instead)
+
+    # ---- Calibration ----
+    # Probe offsets: (u, v) floats = fraction of the game's client area (any
+    # window size); int pixels = old format, from the window corner at 1024x576.
+    PLAY_BUTTON_OFFSET: tuple | None = (292, 247)
+    ANNUL_PIXEL_OFFSET: tuple | None = (499, 375)
+    ANNUL_PIXEL_COLOR: tuple | None = (250, 253, 254)
+    END_BUTTON_OFFSET: tuple | None = (60, 57)
+    END_BUTTON_COLOR: tuple | None = (172, 158, 48)
+
+    PLAY_BUTTON_OFFSET_CHIAKI: tuple | None = (358, 263)
+    ANNUL_PIXEL_OFFSET_CHIAKI: tuple | None = (475, 384)
+    ANNUL_PIXEL_COLOR_CHIAKI: tuple | None = (0, 174, 206)
+    END_BUTTON_OFFSET_CHIAKI: tuple | None = None  # None = use END_BUTTON_*
+    END_BUTTON_COLOR_CHIAKI: tuple | None = None
+
+    # Color spreads from multi-frame calibration (None = fixed tolerances 80 / 22)
+    ANNUL_PIXEL_SPREAD: tuple | None = None
+    ANNUL_PIXEL_SPREAD_CHIAKI: tuple | None = None
+    END_BUTTON_SPREAD: tuple | None = None
+    END_BUTTON_SPREAD_CHIAKI: tuple | None = None
+
+    # ---- Color signatures (calibrated colors = patch median over several frames) ----
+    COLOR_SAMPLE_FRAMES: int = 8        # frames captured per calibrated color
+    COLOR_SAMPLE_RADIUS: int = 2        # patch = (2r+1) x (2r+1) pixels around the probe
+    COLOR_SAMPLE_INTERVAL: float = 0.04 # seconds between frames
+    COLOR_TOL_K: float = 3.0            # tolerance = K * spread + margin ...
+    COLOR_TOL_MARGIN: float = 12.0      # ... per channel (x sqrt(3) for RGB distances)
+    COLOR_TOL_MIN: float = 10.0
+    COLOR_TOL_MAX: float = 120.0
+
+    # ---- Probe geometry ----
+    LEGACY_CLIENT_SIZE: tuple = (1024, 576)  # client size int pixel offsets refer to
+
+    # ---- Ramen trainer ----
+    RAMEN_INITIAL_DELAY: float = 10.0
+    RAMEN_FIRST_ENTER_COUNT: int = 4
+    RAMEN_FIRST_ENTER_DELAY: float = 1.0
+    RAMEN_AFTER_FIRST_WAIT: float = 5.0
+    RAMEN_W_MIN: int = 7
+    RAMEN_W_MAX: int = 8
+    RAMEN_W_DELAY: float = 1.5
+    RAMEN_LONG_WAIT_MIN: float = 15.0
+    RAMEN_LONG_WAIT_MAX: float = 16.0
+    RAMEN_FINAL_ENTER_COUNT: int = 2
+    RAMEN_FINAL_ENTER_DELAY: float = 1.5
+    RAMEN_AFTER_FINAL_WAIT: float = 5.0
+    RAMEN_CLOSED_LOOP: bool = True       # detect dialog / eating / world, waits become timeouts
+    RAMEN_MAX_DIALOG_ENTERS: int = 6     # ENTERs to close a dialog left open before stopping
+    RAMEN_MAX_RETRIES: int = 3           # cycles in a row the dialog may fail to open
+
+    # ---- Pink Beans trainer ----
+    PINK_INITIAL_DELAY: float = 5.0      # before the first cycle
+    PINK_ENTER1_DELAY: float = 1.2       # after 1st ENTER
+    PINK_ENTER2_DELAY: float = 0.7       # after 2nd ENTER
+    PINK_UP_DELAY: float = 0.1           # after UP
+    PINK_ENTER3_DELAY: float = 0.2       # after 3rd ENTER
+    PINK_ENTER4_DELAY: float = 7.0       # after 4th ENTER (animation)
+    PINK_ESC_AFTER_DELAY: float = 0.1    # after ESC
+    PINK_V_AFTER_DELAY: float = 2.0      # after a single 'v'
+    PINK_V_HOLD_DURATION: float = 2.0    # how long 'v' is held
+    PINK_AFTER_HOLD_DELAY: float = 3.0   # after the hold
+    PINK_DOWN_DELAY: float = 0.5         # after DOWN
+    PINK_FINAL_ENTER_DELAY: float = 4.0  # after the last ENTER
+    PINK_CLOSED_LOOP: bool = True        # check steps on screen, delays become timeouts
+    PINK_RESYNC_ATTEMPTS: int = 3        # ESC presses to get back in front of the training
+    PINK_RESYNC_WAIT: float = 2.0        # seconds to wait for the training spot after each ESC
+    PINK_BEANS_PER_CYCLE: float = 1.0    # for the beans/h figure in the logs
+
+    # ---- Blue Beans trainer (Hecaton Stairway) ----
+    BLUE_INITIAL_DELAY: float = 5.0      # before the first cycle
+    BLUE_ENTER1_DELAY: float = 1.2       # after 1st ENTER
+    BLUE_ENTER2_DELAY: float = 0.7       # after 2nd ENTER
+    BLUE_UP_DELAY: float = 0.3           # after UP
+    BLUE_ENTER3_DELAY: float = 0.3       # after 3rd ENTER
+    BLUE_ENTER4_DELAY: float = 7.0       # after 4th ENTER (animation)
+    BLUE_A1_DELAY: float = 4.5           # after first A
+    BLUE_S1_DELAY: float = 8.5           # after first S
+    BLUE_A2_DELAY: float = 4.0           # after second A
+    BLUE_S2_DELAY: float = 10.0          # after second S
+    BLUE_A3_DELAY: float = 3.0           # after third A
+    BLUE_S3_DELAY: float = 5.0           # after third S
+    BLUE_A4_DELAY: float = 12.0          # after fourth A
+    BLUE_ENTER5_DELAY: float = 1.5       # after last ENTER
+    BLUE_COOLDOWN_DELAY: float = 70.0    # cooldown between cycles
+    BLUE_CLOSED_LOOP: bool = True        # confirm stages on screen, delays become timeouts
+    BLUE_READY_GRACE: float = 3.0        # after the last ENTER, before watching for the reset
+    BLUE_RESYNC_ATTEMPTS: int = 3        # ESC presses to get back in front of the training
+    BLUE_RESYNC_WAIT: float = 2.0        # seconds to wait for the training spot after each ESC
+    BLUE_BEANS_PER_CYCLE: float = 1.0    # for the beans/h figure in the logs
+
+    # ---- Closed-loop trainers (stages.py: confirm each stage on screen) ----
+    STAGE_GRID: tuple = (32, 18)         # cells across / down the window
+    STAGE_CELL_THRESHOLD: float = 12.0   # mean RGB change that counts for a cell
+    STAGE_MIN_CELLS: int = 3             # fewer marker cells = stage not visible, fixed delay
+    STAGE_MATCH_FRACTION: float = 0.9    # share of marker cells that must match
+    STAGE_LEARN_CYCLES: int = 2          # open-loop cycles used to learn each stage
+    STAGE_POLL_INTERVAL: float = 0.2     # seconds between checks while waiting
+    STAGE_SETTLE: float = 0.3            # extra wait once a stage is seen
+    STAGE_RELEARN_MISSES: int = 3        # timeouts in a row before learning again
+
+    # ---- Delay tuner (python -m base.cli <mode> --tune, see tuner.py) ----
+    TUNER_TRIALS: int = 3                # cycles run with each candidate delay
+    TUNER_SUCCESS_RATE: float = 1.0      # share of them that must succeed
+    TUNER_MARGIN: float = 0.15           # added on top of the smallest good delay
+    TUNER_RESOLUTION: float = 0.1        # stop bisecting below this range (seconds)
+    TUNER_MIN_DELAY: float = 0.05        # never try less than this
+    TUNER_CYCLE_TIMEOUT: float = 1800.0  # give up if no cycle finishes in this time
+
+    # ---- Input latency meter (latency.py, Diagnostics tab) ----
+    LATENCY_KEYS: tuple = ("down", "up")  # inputs pressed in turn (something visible must react)
+    LATENCY_SAMPLES: int = 20            # presses per input
+    LATENCY_REGION: tuple = (0.0, 0.0, 1.0, 1.0)  # watched part of the client area (u, v, width, height)
+    LATENCY_GRID: tuple = (16, 9)        # cells across / down the watched region
+    LATENCY_THRESHOLD: float = 12.0      # mean RGB change of a cell that counts as a reaction
+    LATENCY_SETTLE: float = 0.5          # region must be still this long before each press
+    LATENCY_TIMEOUT: float = 2.0         # no reaction within this = miss
+    LATENCY_HISTORY: int = 500           # samples kept per backend / input
+
+    # ---- Tracing (Chrome trace / Perfetto export) ----
+    TRACE_ENABLED: bool = True           # record spans into the in-memory ring
+    TRACE_BUFFER_SIZE: int = 50000       # max spans kept (oldest dropped first)
+    TRACE_DUMP_ON_EXIT: bool = False     # write logs/trace_*.json when the app closes
+
+    # ---- Sampling profiler ("Profile" button in the Logs tab) ----
+    PROFILE_DURATION: float = 60.0       # seconds to sample the running worker
+    PROFILE_INTERVAL_MS: float = 5.0     # time between stack samples
+
+    # ---- Game window watcher ----
+    WINDOW_WATCH_INTERVAL: float = 0.5   # seconds between game window checks
+
+    # ---- Multi-instance (python -m base.cli ranked --instances N) ----
+    INSTANCE_STAGGER: float = 30.0       # seconds between instance starts
+
+    # ---- Isolated workers (run each mode in a child process) ----
+    ISOLATED_WORKERS: bool = False       # restart the worker automatically if it crashes
+    WORKER_MAX_RESTARTS: int = 5         # give up after this many crashes in a row
+    WORKER_RESTART_BACKOFF: float = 2.0  # first restart delay in seconds (doubles, max 60)
+
+    # ---- Watchdog (stuck-state detection + recovery) ----
+    WATCHDOG_ENABLED: bool = True
+    WATCHDOG_CHECK_INTERVAL: float = 5.0      # seconds between checks / frame samples
+    WATCHDOG_STALL_SECONDS: float = 180.0     # no state AND no frame change for this long = stuck
+    WATCHDOG_RECOVERY_COOLDOWN: float = 30.0  # wait after a recovery before escalating
+    WATCHDOG_STATE_LIMITS: Mapping = field(default_factory=_watchdog_limits)  # hard caps per state (s)
+
+    # ---- Frame change detector (skip probes on static screens) ----
+    FRAME_DIFF_ENABLED: bool = True
+    FRAME_DIFF_GRID: tuple = (16, 9)     # cells across / down the game window
+    FRAME_DIFF_THRESHOLD: float = 6.0    # mean RGB change per cell that counts as "changed"
+    FRAME_DIFF_MAX_AGE: float = 0.1      # seconds a captured frame is reused by other probes
+
+    # ---- Template matching (needs numpy; falls back to pixel checks) ----
+    TEMPLATE_MATCHING: bool = True
+    TEMPLATE_MIN_SCORE: float = 0.80     # NCC score needed to count as "found"
+    TEMPLATE_SEARCH_MARGIN: int = 24     # px searched around the expected position
+    TEMPLATE_PYRAMID_LEVELS: int = 2     # 2x downsampling steps for the coarse search
+    TEMPLATE_CONFIRMATIONS: int = 3      # agreeing sightings before a template is captured
+    TEMPLATE_RELEARN_DISAGREEMENTS: int = 3  # template vs pixel check disagreements before re-capture
+    RECORD_FRAMES: bool = False          # save labelled frames to logs/frames (benchmark corpus)
+
+    # ---- Auto-calibration (locate learned elements instead of hover countdowns) ----
+    AUTOCALIB_ENABLED: bool = True
+    AUTOCALIB_MIN_SCORE: float = 0.85    # whole-window search needs a stricter score than probes
+
+
+FIELDS = tuple(f.name for f in fields(Settings))
+_TYPES = {f.name: f.type for f in fields(Settings)}
+
+
+# ---------- (de)serialization ----------
+
+def _coerce(kind, value):
+    """`value` as type `kind` (JSON lists -> tuples, ints -> floats, ...) or TypeError."""
+    if get_origin(kind) in (Union, UnionType):
+        if value is None:
+            return None
+        kind = next(a for a in get_args(kind) if a is not type(None))
+
+    if kind is bool and isinstance(value, bool):
+        return value
+    if isinstance(value, bool):
+        raise TypeError(f"expected {kind.__name__}, got a boolean")
+    if kind is float and isinstance(value, (int, float)):
+        return float(value)
+    if kind is int and isinstance(value, int):
+        return value
+    if kind is int and isinstance(value, float) and value.is_integer():
+        return int(value)
+    if kind is str and isinstance(value, str):
+        return value
+    if kind is tuple and isinstance(value, (list, tuple)):
+        return tuple(value)
+    if kind is Mapping and isinstance(value, Mapping):
+        return MappingProxyType(dict(value))
+    raise TypeError(f"expected {getattr(kind, '__name__', kind)}, got {type(value).__name__}")
+
+
+def from_dict(data: Mapping) -> tuple[Settings, list[str]]:
+    """Settings from a plain dict (unknown / invalid keys dropped). Returns (settings, problems)."""
+    problems = []
+    values = {}
+    for name, value in data.items():
+        if name not in _TYPES:
+            if name.isupper():
+                problems.append(f"Unknown setting '{name}' ignored.")
+            continue
+        try:
+            values[name] = _coerce(_TYPES[name], value)
+        except (TypeError, ValueError) as e:
+            problems.append(f"Setting '{name}' = {value!r} is invalid ({e}), using the default.")
+    return Settings(**values), problems
+
+
+def to_dict(settings: Settings) -> dict:
+    data = {}
+    for name in FIELDS:
+        value = getattr(settings, name)
+        data[name] = dict(value) if isinstance(value, Mapping) else value
+    return data
+
+
+def read_legacy(path: str) -> dict:
+    """Top-level `NAME = <literal>` assignments of an old settings.py, without running it."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    values = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        target = node.targets[0]
+        if not isinstance(target, ast.Name) or not target.id.isupper():
+            continue
+        try:
+            values[target.id] = ast.literal_eval(node.value)
+        except ValueError:
+            continue  # not a literal: skip rather than execute it
+    return values
+
+
+# ---------- files ----------
+
+def settings_dir() -> str:
+    """base/ next to the exe when frozen, this package's folder otherwise."""
+    if getattr(sys, "frozen", False):
+        return os.path.join(os.path.dirname(sys.executable), "base")
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def settings_path() -> str:
+    return os.path.join(settings_dir(), SETTINGS_FILE)
+
+
+def load(report=None) -> Settings:
+    """
+    Read settings.json, migrating a legacy settings.py on first run.
+    `report(level, msg)` receives problems (e.g. common.log).
+    """
+    report = report or (lambda level, msg: None)
+    path = settings_path()
+    legacy = os.path.join(settings_dir(), LEGACY_FILE)
+
+    data = {}
+    migrated = False
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            report("ERROR", f"Could not read {path} ({e}), using default settings.")
+    elif os.path.exists(legacy):
+        try:
+            data = read_legacy(legacy)
+            migrated = True
+        except (OSError, SyntaxError) as e:
+            report("ERROR", f"Could not migrate {legacy} ({e}), using default settings.")
+
+    settings, problems = from_dict(data)
+    for msg in problems:
+        report("WARN", msg)
+
+    if migrated:
+        try:
+            save(settings)
+            report("INFO", f"Settings migrated from {legacy} to {path}.")
+        except OSError as e:
+            report("WARN", f"Could not write {path}: {e}")
+    return settings
+
+
+def save(settings: Settings) -> str:
+    """Atomically replace settings.json with `settings`. Returns its path."""
+    path = settings_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(to_dict(settings), f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+# ---------- snapshots ----------
+
+# (version, settings), swapped in one assignment so readers never see a mix
+_published = (0, Settings())
+_publish_lock = threading.Lock()
+_local = threading.local()
+
+
+def publish(settings: Settings) -> int:
+    """Make `settings` the current snapshot (called by common). Returns its version."""
+    global _published
+    with _publish_lock:
+        _published = (_published[0] + 1, settings)
+        return _published[0]
+
+
+def current() -> Settings:
+    """The latest published settings."""
+    return _published[1]
+
+
+def version() -> int:
+    return _published[0]
+
+
+def pin() -> Settings:
+    """
+    Pin the current snapshot for the calling (worker) thread and return it:
+    active() keeps returning it there while the GUI saves new settings,
+    until the worker's next refresh().
+    """
+    _local.version, _local.snapshot = _published
+    return _local.snapshot
+
+
+def active() -> Settings:
+    """The calling thread's pinned snapshot, or the current settings."""
+    return getattr(_local, "snapshot", None) or _published[1]
+
+
+def pinned_version() -> int:
+    """Version of the calling thread's pinned snapshot (the current one if none)."""
+    return getattr(_local, "version", None) or _published[0]
+
+
+def diff(old: Settings, new: Settings) -> dict:
+    """{name: (old value, new value)} for every setting that differs."""
+    return {
+        name: (getattr(old, name), getattr(new, name))
+        for name in FIELDS
+        if getattr(old, name) != getattr(new, name)
+    }
+
+
+def refresh(report=None) -> Settings:
+    """
+    Safe-point check for a worker: pin the latest settings if a newer
+    version was published since its pin() and report what changed.
+    Returns the (possibly new) pinned snapshot.
+    """
+    pinned = getattr(_local, "snapshot", None)
+    if pinned is None:
+        return pin()
+    if _local.version == _published[0]:
+        return pinned
+
+    fresh = pin()
+    changes = diff(pinned, fresh)
+    if report is not None and changes:
+        text = ", ".join(f"{name} {old!r} -> {new!r}" for name, (old, new) in changes.items())
+        report("INFO", f"Settings v{_local.version} applied: {text}")
+    return fresh
@@ -0,0 +1,256 @@
+# base/frame_diff.py
+
+import threading
+import time
+import zlib
+
+from . import common
+
+try:  # optional: faster cell comparison
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image
+    _BOX = Image.BOX
+except ImportError:  # pyautogui brings Pillow; without it there is nothing to capture anyway
+    _BOX = 4
+
+# ========== FRAME CHANGE DETECTOR ==========
+#
+# The captured game window is reduced to a grid of block means (PIL BOX
+# resize: one RGB mean per cell). A cell "changes" when its mean moved more
+# than FRAME_DIFF_THRESHOLD away from the value it had at its last change,
+# so slow drifts (fades) are still caught eventually, and each change bumps
+# that cell's version counter.
+#
+# The cell versions tell the watchdog whether the picture still moves. Probe
+# results are cached on something finer: a checksum of the probe's own small
+# rect, so any pixel change there (a button greying out inside an otherwise
+# static cell) re-runs the probe. lookup() grabs just that rect (grab(): a
+# crop of the latest frame if one is fresher than FRAME_DIFF_MAX_AGE, else a
+# screenshot of a few hundred pixels), never the whole window, so a probe
+# on a screen that didn't change skips its template match and pixel reads.
+
+MISS = object()
+
+
+class FrameDiff:
+
+    def __init__(self, cols: int | None = None, rows: int | None = None,
+                 threshold: float | None = None):
+        self.cols = int(cols or common.FRAME_DIFF_GRID[0])
+        self.rows = int(rows or common.FRAME_DIFF_GRID[1])
+        self.threshold = float(common.FRAME_DIFF_THRESHOLD if threshold is None else threshold)
+        self.size = None          # (w, h) of the frames being compared
+        self.reference = None     # per-cell mean at that cell's last change
+        self.versions = [0] * (self.cols * self.rows)
+        self.frame = None         # last captured PIL image
+        self.captured_at = 0.0
+        self._lock = threading.Lock()
+
+    def _cell_means(self, img):
+        small = img.convert("RGB").resize((self.cols, self.rows), resample=_BOX)
+        if np is not None:
+            return np.asarray(small, dtype=np.int16).reshape(-1, 3)
+        return list(small.getdata())
+
+    def _changed_cells(self, means) -> list[int]:
+        t = self.threshold
+        if np is not None:
+            delta = np.abs(means - self.reference).max(axis=1)
+            return np.flatnonzero(delta > t).tolist()
+        return [
+            i for i, (a, b) in enumerate(zip(means, self.reference))
+            if max(abs(a[0] - b[0]), abs(a[1] - b[1]), abs(a[2] - b[2])) > t
+        ]
+
+    def update(self, img) -> set[int]:
+        """Feed a new frame; returns the indices of the cells that changed."""
+        means = self._cell_means(img)
+        with self._lock:
+            if self.reference is None or img.size != self.size:
+                changed = list(range(self.cols * self.rows))
+                self.reference = means
+                self.size = img.size
+            else:
+                changed = self._changed_cells(means)
+                for i in changed:
+                    self.reference[i] = means[i]
+            for i in changed:
+                self.versions[i] += 1
+            self.frame = img
+            self.captured_at = time.monotonic()
+        return set(changed)
+
+    def cells_for(self, rect) -> list[int]:
+        """Cells overlapping rect = (x, y, w, h) in frame pixels."""
+        if self.size is None:
+            return []
+        fw, fh = self.size
+        x, y, w, h = rect
+        c0 = max(0, min(self.cols - 1, int(x * self.cols // max(1, fw))))
+        c1 = max(0, min(self.cols - 1, int((x + max(1, w) - 1) * self.cols // max(1, fw))))
+        r0 = max(0, min(self.rows - 1, int(y * self.rows // max(1, fh))))
+        r1 = max(0, min(self.rows - 1, int((y + max(1, h) - 1) * self.rows // max(1, fh))))
+        return [r * self.cols + c for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+    def signature(self, rect) -> tuple:
+        with self._lock:
+            return (self.size,) + tuple(self.versions[i] for i in self.cells_for(rect))
+
+    def changed_in(self, cells: set[int], rect) -> bool:
+        return bool(cells.intersection(self.cells_for(rect)))
+
+
+# ---------- per-window trackers ----------
+
+_trackers: dict = {}
+_trackers_lock = threading.Lock()
+
+
+def _key(win):
+    return getattr(win, "_hWnd", None) or id(win)
+
+
+def tracker_for(win) -> FrameDiff:
+    key = _key(win)
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = FrameDiff()
+        return tracker
+
+
+def capture(win, box=None):
+    """Screenshot of the window rectangle, or of box = (x0, y0, x1, y1) in window pixels (PIL image)."""
+    if box is None:
+        region = (win.left, win.top, win.width, win.height)
+    else:
+        region = (win.left + box[0], win.top + box[1], box[2] - box[0], box[3] - box[1])
+    return common.get_pyautogui().screenshot(region=region)
+
+
+def tick(win, max_age: float | None = None) -> set[int]:
+    """
+    Make sure the window's tracker has a frame at most `max_age` seconds old
+    (default FRAME_DIFF_MAX_AGE). Returns the cells changed by this call's
+    capture (empty if the last frame was still fresh).
+    """
+    tracker = tracker_for(win)
+    max_age = common.FRAME_DIFF_MAX_AGE if max_age is None else max_age
+    if tracker.frame is not None and time.monotonic() - tracker.captured_at <= max_age:
+        return set()
+    return tracker.update(capture(win))
+
+
+def latest_frame(win):
+    """Last captured frame of `win` (PIL image) or None."""
+    return tracker_for(win).frame
+
+
+def window_size(win) -> tuple[int, int]:
+    """Size of the frames captured from `win`."""
+    return int(win.width), int(win.height)
+
+
+# ---------- region grabs ----------
+
+class Region:
+    """
+    Part of a window captured on its own. `size` and crop() work in window
+    pixels like on a full frame, for boxes inside `box`.
+    """
+
+    def __init__(self, image, box, size):
+        self.image = image
+        self.box = box    # (x0, y0, x1, y1) in window pixels
+        self.size = size  # the whole window's frame size
+
+    def crop(self, box):
+        x0, y0 = self.box[0], self.box[1]
+        return self.image.crop((box[0] - x0, box[1] - y0, box[2] - x0, box[3] - y0))
+
+
+def _clip(rect, size):
+    fw, fh = size
+    x, y, w, h = (int(v) for v in rect)
+    box = (max(0, x), max(0, y), min(fw, x + max(1, w)), min(fh, y + max(1, h)))
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return None
+    return box
+
+
+def grab(win, rect):
+    """
+    rect = (x, y, w, h) of `win`, clipped to the window, as a Region: cut
+    from the latest frame if it's fresher than FRAME_DIFF_MAX_AGE, else a
+    screenshot of just that rect. None if nothing is left after clipping.
+    """
+    size = window_size(win)
+    box = _clip(rect, size)
+    if box is None:
+        return None
+    tracker = tracker_for(win)
+    with tracker._lock:
+        frame, captured_at = tracker.frame, tracker.captured_at
+    if frame is not None and frame.size == size and time.monotonic() - captured_at <= common.FRAME_DIFF_MAX_AGE:
+        return Region(frame.crop(box), box, size)
+    return Region(capture(win, box), box, size)
+
+
+# ---------- probe result cache ----------
+
+_probe_cache: dict = {}  # (window key, probe name) -> [signature, result, pending signature]
+
+
+def patch_signature(region) -> tuple:
+    """(frame size, box, CRC of the pixels) of a grabbed Region."""
+    return region.size, region.box, zlib.crc32(region.image.tobytes())
+
+
+def lookup(name: str, win, rect):
+    """
+    Cached result of probe `name` if its region `rect` (x, y, w, h in
+    window pixels) is pixel-for-pixel unchanged since the probe last ran,
+    else MISS. Call store() with the freshly computed result after a MISS.
+    """
+    if not common.FRAME_DIFF_ENABLED or win is None:
+        return MISS
+    entry = _probe_cache.setdefault((_key(win), name), [None, None, None])
+    entry[2] = None
+
+    try:
+        region = grab(win, rect)
+    except Exception as e:
+        common.log("DEBUG", f"Probe region capture failed: {e}")
+        return MISS
+    if region is None:
+        return MISS
+    sig = patch_signature(region)
+    entry[2] = sig
+    if entry[0] == sig:
+        return entry[1]
+    return MISS
+
+
+def store(name: str, win, result):
+    """Remember `result` against the signature seen by the last lookup()."""
+    if not common.FRAME_DIFF_ENABLED or win is None:
+        return
+    entry = _probe_cache.get((_key(win), name))
+    if entry is not None and entry[2] is not None:
+        entry[0], entry[1] = entry[2], result
+
+
+def point_rect(offset, radius: int = 6):
+    """Small window-relative rect around a probe point."""
+    dx, dy = offset
+    return (dx - radius, dy - radius, 2 * radius + 1, 2 * radius + 1)
+
+
+def clear():
+    with _trackers_lock:
+        _trackers.clear()
+    _probe_cache.clear()
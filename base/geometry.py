@@ -0,0 +1,166 @@
+# base/geometry.py
+
+import threading
+import time
+from dataclasses import dataclass
+
+from . import common
+
+try:
+    import win32gui
+    from ctypes import windll
+except ImportError:  # non-Windows tools / benchmarks: fall back to the outer rect
+    win32gui = None
+    windll = None
+
+# ========== PROBE GEOMETRY ==========
+#
+# Probe points (PLAY_BUTTON_OFFSET, ANNUL_PIXEL_OFFSET, END_BUTTON_OFFSET, ...)
+# are stored as normalized client-area coordinates: (u, v) floats in [0, 1],
+# (0, 0) the top-left pixel of the game's client area, (1, 1) its bottom-right.
+# A Transform built from the window's client rect turns them into screen
+# pixels (clicks, pixel reads) or window pixels (captured frames), so one
+# calibration works at any window size and with any title bar / border.
+#
+# Older settings hold pixel offsets from the window's outer corner (title bar
+# and border included) for a LEGACY_CLIENT_SIZE client area. Int tuples are
+# still read that way, using the window's real border size, and the next
+# calibration saves them normalized.
+#
+# One Transform per window is cached and rebuilt only when the client rect
+# changes: the window watcher's change notifications drop it, and windows the
+# watcher doesn't follow (other instances) are re-checked every _RECHECK s.
+
+_RECHECK = 0.5
+
+
+def is_normalized(point) -> bool:
+    return all(isinstance(c, float) and 0.0 <= c <= 1.0 for c in point)
+
+
+@dataclass(frozen=True)
+class Transform:
+    origin: tuple[int, int]  # client (0, 0) in screen pixels
+    size: tuple[int, int]    # client width, height
+    inset: tuple[int, int]   # client (0, 0) relative to the window's outer corner
+    dpi: int = 96            # DPI of the monitor the window is on
+
+    def to_client(self, point) -> tuple[int, int]:
+        """Probe point (normalized or legacy pixels) -> client-area pixel."""
+        w, h = self.size
+        if is_normalized(point):
+            u, v = point
+            return (min(w - 1, int(u * w)), min(h - 1, int(v * h)))
+        lw, lh = common.LEGACY_CLIENT_SIZE
+        return (
+            int((point[0] - self.inset[0]) * w / lw),
+            int((point[1] - self.inset[1]) * h / lh),
+        )
+
+    def to_screen(self, point) -> tuple[int, int]:
+        x, y = self.to_client(point)
+        return (self.origin[0] + x, self.origin[1] + y)
+
+    def to_window(self, point) -> tuple[int, int]:
+        """Pixel in a capture of the whole window (frame_diff / templates)."""
+        x, y = self.to_client(point)
+        return (self.inset[0] + x, self.inset[1] + y)
+
+    def _normalize(self, x, y) -> tuple[float, float]:
+        w, h = self.size
+        # pixel centers, so to_client() gives back the same pixel
+        return (round((x + 0.5) / w, 6), round((y + 0.5) / h, 6))
+
+    def from_screen(self, x, y) -> tuple[float, float]:
+        return self._normalize(x - self.origin[0], y - self.origin[1])
+
+    def from_window(self, x, y) -> tuple[float, float]:
+        return self._normalize(x - self.inset[0], y - self.inset[1])
+
+
+def _dpi(hwnd) -> int:
+    try:
+        return int(windll.user32.GetDpiForWindow(hwnd)) or 96
+    except (AttributeError, OSError):  # before Windows 10 1607
+        return 96
+
+
+def _measure(win) -> Transform:
+    hwnd = getattr(win, "_hWnd", None)
+    if win32gui is not None and hwnd:
+        left, top, _, _ = win32gui.GetWindowRect(hwnd)
+        _, _, cw, ch = win32gui.GetClientRect(hwnd)
+        cx, cy = win32gui.ClientToScreen(hwnd, (0, 0))
+        return Transform((cx, cy), (max(1, cw), max(1, ch)), (cx - left, cy - top), _dpi(hwnd))
+    return Transform((win.left, win.top), (max(1, win.width), max(1, win.height)), (0, 0))
+
+
+# ---------- cache ----------
+
+_transforms: dict = {}  # window key -> [Transform, checked_at]
+_watched = {"hwnd": None, "watcher": None}
+_lock = threading.Lock()
+
+
+def _key(win):
+    return getattr(win, "_hWnd", None) or id(win)
+
+
+def _on_window_state(state):
+    with _lock:
+        _watched["hwnd"] = state.hwnd if state.exists else None
+        if state.hwnd is not None:
+            _transforms.pop(state.hwnd, None)
+
+
+def _follow_watcher():
+    from .window_watcher import running_watcher  # avoid circular at top
+
+    watcher = running_watcher()
+    if watcher is not None and _watched["watcher"] is not watcher:
+        _watched["watcher"] = watcher
+        watcher.subscribe(_on_window_state)
+
+
+def transform_for(win) -> Transform:
+    """The cached Transform of `win`, rebuilt if its client rect changed."""
+    _follow_watcher()
+    key = _key(win)
+    now = time.monotonic()
+    with _lock:
+        entry = _transforms.get(key)
+        if entry is not None and (key == _watched["hwnd"] or now - entry[1] < _RECHECK):
+            return entry[0]
+
+    fresh = _measure(win)
+    with _lock:
+        if entry is None or entry[0] != fresh:
+            if entry is not None:
+                common.log("DEBUG", f"Client area changed: {entry[0].size} -> {fresh.size} at {fresh.origin}.")
+            entry = _transforms[key] = [fresh, now]
+        else:
+            entry[1] = now
+        return entry[0]
+
+
+def clear():
+    with _lock:
+        _transforms.clear()
+
+
+# ---------- shortcuts ----------
+
+def to_screen(point, win) -> tuple[int, int]:
+    return transform_for(win).to_screen(point)
+
+
+def to_window(point, win) -> tuple[int, int]:
+    return transform_for(win).to_window(point)
+
+
+def from_screen(x, y, win) -> tuple[float, float]:
+    return transform_for(win).from_screen(x, y)
+
+
+def from_window(x, y, win) -> tuple[float, float]:
+    return transform_for(win).from_window(x, y)
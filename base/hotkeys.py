@@ -0,0 +1,203 @@
+# base/hotkeys.py
+
+import threading
+
+from . import common
+
+try:
+    import ctypes
+    from ctypes import wintypes
+    _user32 = ctypes.windll.user32
+    _kernel32 = ctypes.windll.kernel32
+except (ImportError, AttributeError):  # non-Windows tools / benchmarks: no global hotkey
+    _user32 = None
+    _kernel32 = None
+
+# ========== GLOBAL STOP HOTKEY ==========
+#
+# One listener per process turns STOP_HOTKEY (e.g. "alt+c", "ctrl+shift+f12";
+# empty = off) into a stop request for whatever is running: the GUI's Stop
+# button, the CLI's stop event. Nothing polls the keyboard: the Win32 backend
+# registers the chord with RegisterHotKey and sleeps in GetMessage on its
+# own thread until Windows posts WM_HOTKEY, so the stop is instant in every
+# mode, whatever step it's in.
+#
+# Backends only have to register(modifiers, key, callback) / unregister();
+# FakeHotkeyBackend does that in memory (press() fires the chord) for tools
+# and tests without a desktop session.
+
+MODIFIERS = ("ctrl", "alt", "shift", "win")
+
+_ALIASES = {"control": "ctrl", "menu": "alt", "super": "win", "cmd": "win", "escape": "esc", "return": "enter"}
+
+
+def parse_chord(chord: str) -> tuple[frozenset, str] | None:
+    """"Alt+C" -> ({"alt"}, "c"); None for an empty chord. ValueError if malformed."""
+    parts = [p.strip().lower() for p in (chord or "").split("+") if p.strip()]
+    if not parts:
+        return None
+    parts = [_ALIASES.get(p, p) for p in parts]
+    *mods, key = parts
+    unknown = [m for m in mods if m not in MODIFIERS]
+    if unknown:
+        raise ValueError(f"unknown modifier {unknown[0]!r} in {chord!r}")
+    if key in MODIFIERS:
+        raise ValueError(f"{chord!r} has no key besides the modifiers")
+    return frozenset(mods), key
+
+
+def chord_label(chord: str) -> str:
+    return "+".join(p.strip().upper() for p in (chord or "").split("+") if p.strip())
+
+
+# ---------- backends ----------
+
+class FakeHotkeyBackend:
+    """In-memory backend: press() fires the registered chord."""
+
+    def __init__(self):
+        self.registered = None   # (modifiers, key) while registered
+        self._callback = None
+
+    def register(self, modifiers: frozenset, key: str, callback) -> bool:
+        self.registered = (modifiers, key)
+        self._callback = callback
+        return True
+
+    def unregister(self):
+        self.registered = None
+        self._callback = None
+
+    def press(self):
+        if self._callback is not None:
+            self._callback()
+
+
+_MOD_FLAGS = {"alt": 0x0001, "ctrl": 0x0002, "shift": 0x0004, "win": 0x0008}
+_MOD_NOREPEAT = 0x4000
+_WM_HOTKEY = 0x0312
+_WM_QUIT = 0x0012
+
+_VK_NAMES = {
+    "esc": 0x1B, "enter": 0x0D, "space": 0x20, "tab": 0x09, "backspace": 0x08,
+    "pause": 0x13, "insert": 0x2D, "delete": 0x2E, "home": 0x24, "end": 0x23,
+    "pageup": 0x21, "pagedown": 0x22, "left": 0x25, "up": 0x26, "right": 0x27, "down": 0x28,
+}
+
+
+def _virtual_key(key: str) -> int:
+    if len(key) == 1 and key.isalnum():
+        return ord(key.upper())
+    if key in _VK_NAMES:
+        return _VK_NAMES[key]
+    if key.startswith("f") and key[1:].isdigit() and 1 <= int(key[1:]) <= 24:
+        return 0x70 + int(key[1:]) - 1
+    raise ValueError(f"unknown key {key!r}")
+
+
+class Win32HotkeyBackend:
+    """RegisterHotKey on a dedicated thread that waits in GetMessage for WM_HOTKEY."""
+
+    _ID = 1
+
+    def __init__(self):
+        self._thread = None
+        self._thread_id = None
+
+    def register(self, modifiers: frozenset, key: str, callback) -> bool:
+        self.unregister()
+        vk = _virtual_key(key)
+        flags = _MOD_NOREPEAT
+        for m in modifiers:
+            flags |= _MOD_FLAGS[m]
+
+        ready = threading.Event()
+        result = {}
+
+        def loop():
+            # the hotkey belongs to the thread that registers it
+            self._thread_id = _kernel32.GetCurrentThreadId()
+            result["ok"] = bool(_user32.RegisterHotKey(None, self._ID, flags, vk))
+            ready.set()
+            if not result["ok"]:
+                return
+            msg = wintypes.MSG()
+            try:
+                while _user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                    if msg.message == _WM_HOTKEY and msg.wParam == self._ID:
+                        try:
+                            callback()
+                        except Exception as e:
+                            common.log("ERROR", f"Stop hotkey handler failed: {e}")
+            finally:
+                _user32.UnregisterHotKey(None, self._ID)
+
+        self._thread = threading.Thread(target=loop, daemon=True, name="stop-hotkey")
+        self._thread.start()
+        ready.wait(2.0)
+        return result.get("ok", False)
+
+    def unregister(self):
+        thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive() and self._thread_id is not None:
+            _user32.PostThreadMessageW(self._thread_id, _WM_QUIT, 0, 0)
+            thread.join(1.0)
+        self._thread_id = None
+
+
+def default_backend():
+    return Win32HotkeyBackend() if _user32 is not None else None
+
+
+# ---------- listener ----------
+
+class StopHotkey:
+    """Calls `on_stop()` whenever the chord is pressed (from the backend's thread)."""
+
+    def __init__(self, on_stop, backend=None):
+        self.on_stop = on_stop
+        self.backend = backend if backend is not None else default_backend()
+        self.chord = ""
+
+    def _fire(self):
+        common.log("WARN", f"{chord_label(self.chord)} pressed: stopping.")
+        self.on_stop()
+
+    def set_chord(self, chord: str) -> bool:
+        """(Re)register `chord` ("" = off). False if it can't be used; the old one is dropped either way."""
+        if self.backend is None:
+            if chord:
+                common.log("DEBUG", "Stop hotkey: no global hotkey support on this platform.")
+            return False
+        self.backend.unregister()
+        self.chord = ""
+        try:
+            parsed = parse_chord(chord)
+        except ValueError as e:
+            common.log("WARN", f"Stop hotkey '{chord}' ignored: {e}.")
+            return False
+        if parsed is None:
+            return False
+        try:
+            ok = self.backend.register(*parsed, self._fire)
+        except ValueError as e:
+            common.log("WARN", f"Stop hotkey '{chord}' ignored: {e}.")
+            return False
+        if not ok:
+            common.log("WARN", f"Stop hotkey {chord_label(chord)} is already taken by another program.")
+            return False
+        self.chord = chord
+        common.log("INFO", f"Press {chord_label(chord)} anywhere to stop the running mode.")
+        return True
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.unregister()
+        self.chord = ""
+
+
+def install(on_stop, chord: str | None = None, backend=None) -> StopHotkey:
+    """Start listening for `chord` (default STOP_HOTKEY)."""
+    listener = StopHotkey(on_stop, backend)
+    listener.set_chord(common.STOP_HOTKEY if chord is None else chord)
+    return listener
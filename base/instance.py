@@ -0,0 +1,117 @@
+# base/instance.py
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# ========== PER-INSTANCE CONTEXT ==========
+#
+# One process can drive several game clients. Each worker thread is bound to
+# an InstanceContext holding what used to be module-global in `common`: its
+# window, offset overrides, input backend, stop event and stats. Code that
+# asks common / window_helpers for "the" window, offset or backend gets the
+# one of the context bound to the calling thread, or the usual globals when
+# no context is bound (single-instance GUI / CLI runs are unchanged).
+#
+# There is only one mouse and one keyboard, so bound workers take turns:
+# ensure_game_window() acquires the focus lock before activating its window
+# and sleep_with_stop() hands it back while waiting. A "slice" is therefore
+# everything a worker does between two waits.
+#
+# This module must not import anything from base (common imports it).
+
+
+@dataclass
+class InstanceContext:
+    name: str
+    window_index: int = 0
+    hwnd: int | None = None
+    # settings overrides for this client, e.g. {"PLAY_BUTTON_OFFSET": (300, 250)}
+    overrides: dict = field(default_factory=dict)
+    input_backend: object = None
+    stop_event: threading.Event = field(default_factory=threading.Event)
+    stats: dict = field(default_factory=lambda: {
+        "matches": 0,
+        "total_duration": 0.0,
+        "last_duration": None,
+        "focus_wait": 0.0,
+    })
+    window: object = None  # pygetwindow object for hwnd, cached by window_helpers
+
+    def record_match(self, duration: float):
+        self.stats["matches"] += 1
+        self.stats["total_duration"] += duration
+        self.stats["last_duration"] = duration
+
+
+# ---------- thread binding ----------
+
+_local = threading.local()
+_registry: list[InstanceContext] = []
+_registry_lock = threading.Lock()
+
+
+def current() -> InstanceContext | None:
+    """The context bound to the calling thread, or None."""
+    return getattr(_local, "ctx", None)
+
+
+@contextmanager
+def bound(ctx: InstanceContext):
+    """Bind `ctx` to the calling thread for the duration of the block."""
+    previous = current()
+    _local.ctx = ctx
+    with _registry_lock:
+        _registry.append(ctx)
+    try:
+        yield ctx
+    finally:
+        release_focus()
+        with _registry_lock:
+            if ctx in _registry:
+                _registry.remove(ctx)
+        _local.ctx = previous
+
+
+def claimed_hwnds(exclude: InstanceContext | None = None) -> set:
+    """Window handles already owned by other live contexts."""
+    with _registry_lock:
+        return {c.hwnd for c in _registry if c is not exclude and c.hwnd}
+
+
+# ---------- focus lock ----------
+
+_focus_lock = threading.Lock()
+_focus_owner: InstanceContext | None = None
+
+
+def acquire_focus(stop_event) -> bool:
+    """
+    Take the mouse/keyboard for the bound context. Returns True immediately
+    when no context is bound or it already holds the focus; False if
+    stop_event was set while waiting for another instance.
+    """
+    global _focus_owner
+    ctx = current()
+    if ctx is None or _focus_owner is ctx:
+        return True
+
+    start = time.perf_counter()
+    while not stop_event.is_set():
+        if _focus_lock.acquire(timeout=0.25):
+            _focus_owner = ctx
+            ctx.stats["focus_wait"] += time.perf_counter() - start
+            return True
+    return False
+
+
+def release_focus() -> bool:
+    """Give the focus back if the bound context holds it. Returns True if it did."""
+    global _focus_owner
+    ctx = current()
+    if ctx is None or _focus_owner is not ctx:
+        return False
+    _focus_owner = None
+    _focus_lock.release()
+    return True
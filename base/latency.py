@@ -0,0 +1,286 @@
+# base/latency.py
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from . import common
+from . import geometry
+
+try:  # optional: without NumPy there is no latency meter
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image
+    _BOX = Image.BOX
+except ImportError:
+    _BOX = 4
+
+# ========== INPUT-TO-SCREEN LATENCY ==========
+#
+# Every fixed delay in the project is a guess at how long the game takes to
+# react to an input. This measures it ("Measure input latency" in the
+# Diagnostics tab):
+#
+#   1. wait until LATENCY_REGION of the client area has been still for
+#      LATENCY_SETTLE (no LATENCY_GRID cell mean moved by more than
+#      LATENCY_THRESHOLD),
+#   2. send the input through the current InputBackend and note the time,
+#   3. capture the region in a tight loop while the input is being sent; the
+#      first capture where a cell moved past the threshold is the reaction.
+#      A capture is timestamped at the middle of its screenshot call, so the
+#      resolution is about half a capture (a few ms for a small region).
+#
+# LATENCY_KEYS are pressed in turn, LATENCY_SAMPLES times each: pick inputs
+# that toggle something visible and come back (down/up in a menu, esc to
+# open and close the pause menu). No change within LATENCY_TIMEOUT is a miss.
+#
+# Samples are kept per backend (kbmouse, ds4/chiaki, xinput/chiaki) and per
+# input in profiles/latency.json (last LATENCY_HISTORY of each), so switching
+# Chiaki4Deck on and measuring again puts both distributions side by side.
+
+_active = None  # the running measurement thread, if any
+
+
+def available() -> bool:
+    return np is not None
+
+
+def backend_label(backend) -> str:
+    if backend.mode == "kbmouse":
+        return "kbmouse"
+    pad = "ds4" if backend.pad_type == "ds4" else "xinput"
+    return f"{pad}/chiaki" if common.CHIAKI4DECK else pad
+
+
+# ---------- statistics ----------
+
+def _percentile(ordered, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples_ms) -> dict | None:
+    """{"n", "min", "p50", "p90", "p99", "max", "mean"} in ms, None without samples."""
+    if not samples_ms:
+        return None
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "min": ordered[0],
+        "p50": _percentile(ordered, 50),
+        "p90": _percentile(ordered, 90),
+        "p99": _percentile(ordered, 99),
+        "max": ordered[-1],
+        "mean": sum(ordered) / len(ordered),
+    }
+
+
+# ---------- storage ----------
+
+def _store_path() -> str:
+    from .tools import get_user_dir  # avoid circular at top
+    return os.path.join(get_user_dir("profiles"), "latency.json")
+
+
+def load() -> dict:
+    """{backend: {input: {"samples_ms": [...], "misses": n, "updated": iso}}} ({} if missing)."""
+    path = _store_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("latency", {})
+    except (OSError, ValueError) as e:
+        common.log("WARN", f"Could not read latency samples ({path}): {e}")
+        return {}
+
+
+def _save(backend: str, results: dict):
+    data = load()
+    per_input = data.setdefault(backend, {})
+    stamp = datetime.now().isoformat(timespec="seconds")
+    for key, (samples, misses) in results.items():
+        entry = per_input.setdefault(key, {"samples_ms": [], "misses": 0})
+        entry["samples_ms"] = (entry["samples_ms"] + samples)[-max(1, int(common.LATENCY_HISTORY)):]
+        entry["misses"] += misses
+        entry["updated"] = stamp
+
+    path = _store_path()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "latency": data}, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return path
+
+
+def table() -> list[tuple[str, str, int, dict | None]]:
+    """Stored distributions as (backend, input, misses, summary) rows, for display."""
+    rows = []
+    for backend, per_input in sorted(load().items()):
+        for key, entry in sorted(per_input.items()):
+            rows.append((backend, key, entry.get("misses", 0), summarize(entry.get("samples_ms", []))))
+    return rows
+
+
+# ---------- measuring ----------
+
+class _Region:
+    """LATENCY_REGION of the game window's client area, captured as cell means."""
+
+    def __init__(self, win):
+        t = geometry.transform_for(win)
+        u, v, w, h = (float(c) for c in common.LATENCY_REGION)
+        x, y = t.to_screen((u, v))
+        self.box = (x, y, max(1, int(w * t.size[0])), max(1, int(h * t.size[1])))
+
+    def grab(self):
+        """(capture time, cell means)."""
+        start = time.perf_counter()
+        img = common.get_pyautogui().screenshot(region=self.box)
+        at = (start + time.perf_counter()) / 2.0
+        cols, rows = common.LATENCY_GRID
+        small = img.convert("RGB").resize((int(cols), int(rows)), resample=_BOX)
+        return at, np.asarray(small, dtype=np.int16).reshape(-1, 3)
+
+
+def _changed(a, b) -> bool:
+    return bool((np.abs(a - b).max(axis=1) > common.LATENCY_THRESHOLD).any())
+
+
+def _settle(region, stop_event, timeout: float):
+    """Cell means once the region has been still for LATENCY_SETTLE, None on timeout."""
+    deadline = time.monotonic() + timeout
+    _, ref = region.grab()
+    still_since = time.monotonic()
+    while not stop_event.is_set() and time.monotonic() < deadline:
+        _, cells = region.grab()
+        now = time.monotonic()
+        if _changed(ref, cells):
+            ref, still_since = cells, now
+        elif now - still_since >= common.LATENCY_SETTLE:
+            return cells
+    return None
+
+
+def _sample(region, backend, key: str, stop_event):
+    """Latency of one press of `key` in ms, None if the region didn't change (or never settled)."""
+    base = _settle(region, stop_event, common.LATENCY_SETTLE + 5.0)
+    if base is None:
+        if not stop_event.is_set():
+            common.log("WARN", "Latency: the watched region never stops moving, choose a static part (LATENCY_REGION).")
+        return None
+
+    sent = []
+
+    def press():
+        # timestamp in the sending thread, right before the input goes out
+        sent.append(time.perf_counter())
+        backend.press_key(key)
+
+    # gamepad taps hold the button ~0.1 s: watch while the input is being sent
+    sender = threading.Thread(target=press, daemon=True, name="latency-input")
+    sender.start()
+    seen = None
+    deadline = time.perf_counter() + common.LATENCY_TIMEOUT
+    while not stop_event.is_set() and time.perf_counter() < deadline:
+        at, cells = region.grab()
+        if sent and _changed(base, cells):
+            seen = at
+            break
+    sender.join()
+    if seen is None or seen < sent[0]:
+        return None
+    return (seen - sent[0]) * 1000.0
+
+
+def measure(stop_event: threading.Event, keys=None, samples: int | None = None) -> dict:
+    """
+    Press each of `keys` (default LATENCY_KEYS) `samples` times (default
+    LATENCY_SAMPLES) in the game window and store the latencies under the
+    current backend. Returns {input: summary or None}.
+    """
+    from .window_helpers import ensure_game_window, get_game_window
+
+    if not available():
+        common.log("ERROR", "Latency: measuring needs NumPy.")
+        return {}
+    keys = tuple(keys or common.LATENCY_KEYS)
+    samples = max(1, int(samples or common.LATENCY_SAMPLES))
+    if not keys:
+        return {}
+    if not ensure_game_window(stop_event, timeout=10.0):
+        common.log("ERROR", "Latency: game window not found / focus failed.")
+        return {}
+
+    backend = common.get_input_backend()
+    label = backend_label(backend)
+    region = _Region(get_game_window())
+    common.log("STATE", f"Latency: {samples} x {', '.join(keys)} through {label}, watching {region.box}.")
+
+    results = {key: ([], 0) for key in keys}
+    for i in range(samples):
+        for key in keys:
+            if stop_event.is_set():
+                break
+            ms = _sample(region, backend, key, stop_event)
+            took, misses = results[key]
+            if ms is None:
+                if not stop_event.is_set():
+                    results[key] = (took, misses + 1)
+                    common.log("DEBUG", f"Latency: '{key}' #{i + 1}: no change within {common.LATENCY_TIMEOUT:.1f}s.")
+                continue
+            took.append(round(ms, 1))
+            common.log("DEBUG", f"Latency: '{key}' #{i + 1}: {ms:.1f} ms.")
+
+    results = {key: r for key, r in results.items() if r[0] or r[1]}
+    if results:
+        try:
+            path = _save(label, results)
+            common.log("INFO", f"Latency samples saved to: {path}")
+        except OSError as e:
+            common.log("WARN", f"Latency: could not save the samples: {e}")
+
+    summaries = {}
+    for key, (took, misses) in results.items():
+        s = summaries[key] = summarize(took)
+        if s is None:
+            common.log("WARN", f"Latency [{label}] '{key}': no reaction seen ({misses} misses).")
+            continue
+        common.log(
+            "INFO",
+            f"Latency [{label}] '{key}': median {s['p50']:.0f} ms, p90 {s['p90']:.0f} ms, "
+            f"max {s['max']:.0f} ms ({s['n']} samples, {misses} misses)."
+        )
+    return summaries
+
+
+def measure_in_background(stop_event: threading.Event, keys=None, samples: int | None = None,
+                          on_done=None) -> threading.Thread | None:
+    """Run measure() in a daemon thread; None if a measurement is already running."""
+    global _active
+
+    if _active is not None and _active.is_alive():
+        common.log("WARN", "Latency: a measurement is already running.")
+        return None
+
+    def run():
+        global _active
+        summaries = {}
+        try:
+            summaries = measure(stop_event, keys, samples)
+        except Exception as e:
+            common.log("ERROR", f"Latency measurement failed: {e}")
+        finally:
+            _active = None
+            if on_done is not None:
+                on_done(summaries)
+
+    _active = threading.Thread(target=run, daemon=True, name="latency")
+    _active.start()
+    return _active
@@ -0,0 +1,146 @@
+# base/navigator.py
+
+import time
+
+from . import common
+from . import config
+from . import frame_diff
+from . import stages
+from . import tracing
+from .actions import click_left_n_times, safe_click_point
+from .status_checks import detect_search_failed_popup, is_back_in_lobby, is_match_over
+from .window_helpers import ensure_game_window, get_game_window, sleep_with_stop
+
+# ========== MENU NAVIGATOR (Ranked, NAV_CLOSED_LOOP) ==========
+#
+# Between the lobby and the match, and back, the bot used to send fixed
+# bursts: 10 clicks a second apart + 4 s before the formation screen, and
+# POST_MATCH_CLICKS clicks (+ ENTERs) after the match, wherever the menus
+# actually were. The navigator reads the screen instead:
+#
+#   classify()   lobby / formation / failed popup / end screen / other menu,
+#                with the existing probes (frame_diff keeps them cheap)
+#   one input    only what that screen needs: a click on the safe point
+#                (+ ENTER on post-match menus below level 75)
+#   reaction     wait until the frame changed and settled for NAV_SETTLE,
+#                at most NAV_REACT_TIMEOUT, then classify again
+#
+# It stops the moment the goal screen is confirmed: the bot re-queues as
+# soon as the lobby is back. The formation screen has no probe of its own;
+# it's a stages.Scene observed after the blind pre-match sequence of the
+# first cycles (STAGE_LEARN_CYCLES), so those still run blind. Whenever the
+# goal isn't reached within NAV_MAX_INPUTS, the caller falls back to the
+# blind sequence.
+
+LOBBY = "lobby"
+FORMATION = "formation"
+FAILED_POPUP = "failed_popup"
+END_SCREEN = "end_screen"
+OTHER = "other"
+
+_POLL = 0.1  # seconds between frame checks while waiting for a reaction
+
+
+def _frame_version(win) -> int:
+    """Bumps whenever a cell of the captured window changes (frame_diff)."""
+    try:
+        frame_diff.tick(win, max_age=0.0)
+    except Exception as e:
+        common.log("DEBUG", f"Navigator: capture failed: {e}")
+    return sum(frame_diff.tracker_for(win).versions)
+
+
+class Navigator:
+
+    def __init__(self):
+        self.formation = stages.Scene("Ranked", "formation")
+
+    def classify(self, stop_event) -> str:
+        if is_back_in_lobby(stop_event):
+            return LOBBY
+        if self.formation.on_screen():
+            return FORMATION
+        if detect_search_failed_popup(stop_event):
+            return FAILED_POPUP
+        if is_match_over(stop_event, keep_alive=False):
+            return END_SCREEN
+        return OTHER
+
+    # ---------- moves ----------
+
+    def _advance(self, screen: str, enter: bool):
+        x, y = safe_click_point()
+        common.log("ACTION", f"Navigator: on '{screen}', clicking at {(x, y)}{' + ENTER' if enter else ''}.")
+        common.get_input_backend().click_at(x, y, button="left")
+        if enter:
+            common.send_enter()
+
+    def _await_reaction(self, win, mark: int, s, stop_event):
+        """Until the screen changed and then stood still for NAV_SETTLE, at most NAV_REACT_TIMEOUT."""
+        deadline = time.monotonic() + s.NAV_REACT_TIMEOUT
+        changed_at = None
+        while not stop_event.is_set():
+            now = time.monotonic()
+            version = _frame_version(win)
+            if version != mark:
+                mark, changed_at = version, now
+            elif changed_at is not None and now - changed_at >= s.NAV_SETTLE:
+                return
+            if now >= deadline:
+                return
+            stop_event.wait(_POLL)
+
+    def _navigate(self, goals, label: str, enter: bool, stop_event) -> str | None:
+        """Inputs until one of `goals` is on screen: the one reached, or None (gave up / stopped)."""
+        s = config.active()
+        if not ensure_game_window(stop_event):
+            return None
+        win = get_game_window()
+        if win is None:
+            return None
+
+        start = time.monotonic()
+        inputs = 0
+        while not stop_event.is_set():
+            screen = self.classify(stop_event)
+            if screen in goals:
+                common.log(
+                    "STATE",
+                    f"Navigator ({label}): {screen} after {inputs} input(s) in {time.monotonic() - start:.1f}s."
+                )
+                return screen
+            if inputs >= s.NAV_MAX_INPUTS:
+                common.log("WARN", f"Navigator ({label}): no {' / '.join(goals)} after {inputs} inputs.")
+                return None
+            mark = _frame_version(win)
+            with tracing.span("nav_input", cat="navigator", screen=screen):
+                self._advance(screen, enter and screen == OTHER)
+                self._await_reaction(win, mark, s, stop_event)
+            inputs += 1
+        return None
+
+    # ---------- public ----------
+
+    def to_formation(self, stop_event) -> str | None:
+        """
+        From 'opponent found' to the formation screen. Returns FORMATION,
+        LOBBY (the match fell through: re-queue) or None (stopped / gave up).
+        """
+        if self.formation.learned:
+            return self._navigate((FORMATION, LOBBY), "pre-match", False, stop_event)
+
+        # still learning what the formation screen looks like: blind sequence
+        click_left_n_times(10, 1.0, stop_event)
+        if not stop_event.is_set():
+            sleep_with_stop(4, stop_event)
+        if stop_event.is_set():
+            return None
+        if is_back_in_lobby(stop_event):
+            return LOBBY
+        self.formation.observe()
+        return FORMATION
+
+    def to_lobby(self, stop_event) -> bool:
+        """From the end of the match (or a stuck one) back to the lobby. False if it wasn't confirmed."""
+        enter = not config.active().LVL_75_PLUS
+        return self._navigate((LOBBY,), "post-match", enter, stop_event) == LOBBY
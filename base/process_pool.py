@@ -0,0 +1,179 @@
+# base/process_pool.py
+
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+
+from . import common
+from . import config
+
+# ========== ISOLATED WORKER PROCESSES ==========
+#
+# With ISOLATED_WORKERS the bot/trainer loop runs in a child process instead
+# of a thread of the GUI process: a hang, leak or hard crash stays in the
+# child, and the worker no longer competes with Qt for the GIL.
+#
+# Parent side, ProcessWorker is a thread (so the GUI can keep treating it
+# like bot_thread / ramen_thread) that:
+#   - spawns the child and forwards the stop event to it,
+#   - re-publishes the child's log lines and stats into common's channels,
+#   - restarts the child with exponential backoff if it dies without saying
+#     goodbye (clean exits and user stops are never restarted).
+#
+# The child loads settings.json itself and re-reads it whenever the GUI
+# saves it (_follow_settings), so running children hot-apply settings too.
+
+_SETTINGS_POLL = 1.0
+
+
+def _follow_settings(stop_flag):
+    """Child side: publish settings.json again each time it changes on disk."""
+    path = config.settings_path()
+
+    def stamp():
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    last = stamp()
+    while not stop_flag.wait(_SETTINGS_POLL):
+        now = stamp()
+        if now != last:
+            last = now
+            common.reload_settings()
+
+
+def _child_main(mode: str, conn, stop_flag):
+    """Entry point of the child process (must stay importable at top level)."""
+    from .cli import MODES
+
+    lock = threading.Lock()
+
+    def send(kind, payload):
+        with lock:
+            try:
+                conn.send((kind, payload))
+            except (OSError, EOFError):
+                pass  # parent went away, nothing left to report to
+
+    common.log_channel.add_sink(lambda item: send("log", item))
+    common.stats_channel.add_sink(lambda data: send("stats", data))
+
+    module_name, entry_name, thread_name = MODES[mode]
+    threading.current_thread().name = thread_name
+    entry = getattr(importlib.import_module(module_name, __package__), entry_name)
+
+    from .tuner import apply_profile
+    apply_profile(mode)
+
+    from .watchdog import watch
+    watch(threading.current_thread(), stop_flag)
+
+    threading.Thread(target=_follow_settings, args=(stop_flag,), name="settings_follower", daemon=True).start()
+
+    # multiprocessing.Event has the same is_set()/set()/wait() as threading.Event
+    entry(stop_flag)
+
+    send("exit", 0)
+    conn.close()
+
+
+class ProcessWorker(threading.Thread):
+
+    def __init__(self, mode: str, stop_event: threading.Event, name: str | None = None,
+                 max_restarts: int | None = None, backoff: float | None = None):
+        super().__init__(name=name or f"{mode}_process", daemon=True)
+        self.mode = mode
+        self.stop_event = stop_event
+        self.max_restarts = common.WORKER_MAX_RESTARTS if max_restarts is None else int(max_restarts)
+        self.backoff = common.WORKER_RESTART_BACKOFF if backoff is None else float(backoff)
+        self.restarts = 0
+        self.process = None
+
+    def run(self):
+        mp = multiprocessing.get_context("spawn")
+        delay = self.backoff
+
+        while not self.stop_event.is_set():
+            stop_flag = mp.Event()
+            recv_conn, send_conn = mp.Pipe(duplex=False)
+            proc = mp.Process(
+                target=_child_main,
+                args=(self.mode, send_conn, stop_flag),
+                name=f"{self.name}-child",
+                daemon=True,
+            )
+            proc.start()
+            send_conn.close()  # only the child writes
+            self.process = proc
+            started = time.time()
+            common.log("INFO", f"Worker process for '{self.mode}' started (pid {proc.pid}).")
+
+            clean = self._pump(proc, recv_conn, stop_flag)
+            recv_conn.close()
+
+            if clean or self.stop_event.is_set():
+                break
+
+            if self.restarts >= self.max_restarts:
+                common.log(
+                    "ERROR",
+                    f"Worker process for '{self.mode}' died (exit code {proc.exitcode}) "
+                    f"and was restarted {self.restarts} times already. Giving up."
+                )
+                break
+
+            # a worker that ran for a while before failing gets a fresh backoff
+            if time.time() - started > 300:
+                delay = self.backoff
+
+            self.restarts += 1
+            common.log(
+                "WARN",
+                f"Worker process for '{self.mode}' died (exit code {proc.exitcode}). "
+                f"Restarting in {delay:g}s ({self.restarts}/{self.max_restarts})..."
+            )
+            if self.stop_event.wait(delay):
+                break
+            delay = min(delay * 2, 60.0)
+
+        self.process = None
+
+    def _pump(self, proc, conn, stop_flag) -> bool:
+        """Forward child telemetry until it exits. Returns True on a clean exit."""
+        clean = False
+        kill_at = None
+
+        while True:
+            if self.stop_event.is_set() and kill_at is None:
+                stop_flag.set()
+                kill_at = time.time() + 5.0
+
+            try:
+                if conn.poll(0.25):
+                    kind, payload = conn.recv()
+                    if kind == "log":
+                        common.log_channel.publish(payload)
+                    elif kind == "stats":
+                        common.stats_channel.publish(payload)
+                    elif kind == "exit":
+                        clean = True
+                    continue
+            except (EOFError, OSError):
+                # child closed its end: it is exiting (or already dead)
+                proc.join(5.0)
+
+            if not proc.is_alive():
+                break
+
+            if kill_at is not None and time.time() > kill_at:
+                common.log("WARN", f"Worker process for '{self.mode}' ignored stop, terminating it.")
+                proc.terminate()
+                proc.join(2.0)
+                break
+
+        proc.join(1.0)
+        return clean
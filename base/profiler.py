@@ -0,0 +1,147 @@
+# base/profiler.py
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from . import common
+
+# ========== STACK SAMPLER ==========
+#
+# Low-overhead wall-clock sampler: every `interval` seconds we grab the target
+# thread's current frame via sys._current_frames() and count the collapsed
+# stack. Nothing is installed in the target thread (no settrace/setprofile),
+# so the worker runs at full speed while it is being observed.
+
+_active = None  # the running StackSampler, if any
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's stack for `duration` seconds and writes the result in
+    collapsed-stack format ("root;child;leaf <count>" per line), which
+    flamegraph.pl, speedscope and inferno all read directly.
+    """
+
+    def __init__(self, target: threading.Thread, duration: float, interval: float,
+                 label: str = "worker", on_done=None):
+        super().__init__(name=f"profiler-{label}", daemon=True)
+        self.target = target
+        self.duration = float(duration)
+        self.interval = max(0.001, float(interval))
+        self.label = label
+        self.on_done = on_done
+        self.samples = Counter()
+        self.sample_count = 0
+        self.output_path: str | None = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _sample_once(self, ident: int):
+        frame = sys._current_frames().get(ident)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        stack.reverse()
+        self.samples[";".join(stack)] += 1
+        self.sample_count += 1
+
+    def run(self):
+        global _active
+        ident = self.target.ident
+        end = time.perf_counter() + self.duration
+
+        try:
+            while time.perf_counter() < end and not self._cancel.is_set():
+                if not self.target.is_alive():
+                    common.log("INFO", f"Profiler: '{self.target.name}' finished, stopping early.")
+                    break
+                self._sample_once(ident)
+                time.sleep(self.interval)
+
+            self.output_path = self._write()
+            common.log(
+                "INFO",
+                f"Profiler: {self.sample_count} samples written to {self.output_path}"
+            )
+            for stack, count in self.top_leaves(5):
+                pct = 100.0 * count / max(1, self.sample_count)
+                common.log("DEBUG", f"Profiler hot frame: {stack} ({pct:.1f}%)")
+
+        except Exception as e:
+            common.log("ERROR", f"Profiler failed: {e}")
+
+        finally:
+            _active = None
+            if self.on_done is not None:
+                try:
+                    self.on_done(self)
+                except Exception as e:
+                    common.log("DEBUG", f"Profiler on_done callback failed: {e}")
+
+    def top_leaves(self, n: int = 10) -> list[tuple[str, int]]:
+        """Most frequent innermost frames (where the thread actually sits)."""
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def _write(self) -> str:
+        from .tools import get_logs_dir  # avoid circular at top
+
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(get_logs_dir(), f"profile_{self.label}_{stamp}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def profile_thread(target: threading.Thread, duration: float | None = None,
+                   interval: float | None = None, label: str = "worker",
+                   on_done=None) -> StackSampler | None:
+    """
+    Start sampling `target` in the background. Returns the sampler, or None
+    if the thread is not running or another profile is already in progress.
+    """
+    global _active
+
+    if target is None or not target.is_alive():
+        common.log("WARN", "Profiler: no running worker thread to profile.")
+        return None
+
+    if _active is not None and _active.is_alive():
+        common.log("WARN", "Profiler: a profile is already running.")
+        return None
+
+    if duration is None:
+        duration = common.PROFILE_DURATION
+    if interval is None:
+        interval = common.PROFILE_INTERVAL_MS / 1000.0
+
+    sampler = StackSampler(target, duration, interval, label=label, on_done=on_done)
+    _active = sampler
+    sampler.start()
+    common.log(
+        "INFO",
+        f"Profiler: sampling '{target.name}' for {duration:g}s "
+        f"every {interval * 1000:.0f}ms..."
+    )
+    return sampler
+
+
+def is_profiling() -> bool:
+    return _active is not None and _active.is_alive()
@@ -0,0 +1,136 @@
+# base/profiles.py
+
+import json
+import os
+import threading
+from datetime import datetime
+
+from . import common
+from . import geometry
+from . import instance
+
+# ========== CALIBRATION PROFILES ==========
+#
+# One set of calibrated values per setup, keyed by
+#
+#   <input mode>@<client width>x<client height>@<dpi>dpi
+#   e.g. "keyboard_mouse@1024x576@96dpi", "chiaki4deck@1280x720@144dpi"
+#
+# and stored in profiles/calibration.json. At start the bot measures the live
+# window (geometry.py) and loads the matching profile into the settings the
+# current mode reads (common.mode_setting), so going back to a setup that was
+# calibrated before is a lookup instead of a recalibration. A setup seen for
+# the first time starts from the current settings, and every calibration
+# updates the active profile.
+
+# profile field -> setting (the *_CHIAKI variant in Chiaki4deck mode)
+CALIBRATION_KEYS = (
+    "PLAY_BUTTON_OFFSET",
+    "ANNUL_PIXEL_OFFSET",
+    "ANNUL_PIXEL_COLOR",
+    "ANNUL_PIXEL_SPREAD",
+    "END_BUTTON_OFFSET",
+    "END_BUTTON_COLOR",
+    "END_BUTTON_SPREAD",
+)
+
+_lock = threading.Lock()
+
+
+def _store_path() -> str:
+    from .tools import get_user_dir  # avoid circular at top
+    return os.path.join(get_user_dir("profiles"), "calibration.json")
+
+
+def input_mode() -> str:
+    return "chiaki4deck" if common.CHIAKI4DECK else "keyboard_mouse"
+
+
+def profile_key(win) -> str:
+    t = geometry.transform_for(win)
+    return f"{input_mode()}@{t.size[0]}x{t.size[1]}@{t.dpi}dpi"
+
+
+def load_all() -> dict:
+    """{profile key: {setting: value}} from disk ({} if missing or unreadable)."""
+    path = _store_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        common.log("WARN", f"Could not read calibration profiles ({path}): {e}")
+        return {}
+    return data.get("profiles", {})
+
+
+def _write_all(profiles: dict):
+    path = _store_path()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "profiles": profiles}, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _current_values() -> dict:
+    return {key: common.get_value(common.mode_setting(key)) for key in CALIBRATION_KEYS}
+
+
+def _apply(values: dict):
+    loaded = {}
+    for key in CALIBRATION_KEYS:
+        if key in values:
+            value = values[key]
+            # JSON has no tuples
+            loaded[common.mode_setting(key)] = tuple(value) if isinstance(value, list) else value
+    if instance.current() is None:
+        # session layer: survives settings reloads and apply_settings() calls
+        common.apply_settings(loaded)
+        return
+    for key, value in loaded.items():
+        common.set_value(key, value)
+
+
+def activate(win) -> str:
+    """
+    Load the profile matching `win` and the input mode into the settings
+    (per instance when a context is bound). Returns the profile key.
+    """
+    key = profile_key(win)
+    with _lock:
+        profiles = load_all()
+        values = profiles.get(key)
+        if values is None:
+            values = _current_values()
+            values["updated"] = datetime.now().isoformat(timespec="seconds")
+            profiles[key] = values
+            try:
+                _write_all(profiles)
+            except OSError as e:
+                common.log("WARN", f"Could not save calibration profile '{key}': {e}")
+            common.log("INFO", f"New setup '{key}': calibration profile created from current settings.")
+            return key
+
+    _apply(values)
+    common.log("INFO", f"Calibration profile '{key}' loaded ({values.get('updated', 'unknown date')}).")
+    return key
+
+
+def store(win) -> str | None:
+    """Save the current calibrated values as the profile for `win`'s setup."""
+    if win is None:
+        return None
+    key = profile_key(win)
+    values = _current_values()
+    values["updated"] = datetime.now().isoformat(timespec="seconds")
+    with _lock:
+        profiles = load_all()
+        profiles[key] = values
+        try:
+            _write_all(profiles)
+        except OSError as e:
+            common.log("WARN", f"Could not save calibration profile '{key}': {e}")
+            return None
+    common.log("DEBUG", f"Calibration profile '{key}' updated.")
+    return key
@@ -42,12 +42,16 @@ from PySide6.QtWidgets import (
 )
 
 from . import common
-from .bot import bot_main
-from .window_helpers import recalibrate_offsets_via_gui
-from .tools import gui_test_focus, gui_test_play_click, gui_test_search_pixel, resource_path
-from .ramen import run_ramen_trainer
-from .beans.blue import run_blue_beans_trainer
-from .beans.pink import run_pink_beans_trainer
+from . import config
+from . import hotkeys
+from . import tracing
+from . import profiler
+from . import startup
+from .tools import resource_path
+
+# NOTE: bot / trainers / window_helpers (pyautogui, pygetwindow, win32gui) are
+# imported where they are used, so none of that is paid for before the window
+# paints.
 # =========================
 #   MAIN WINDOW
 # =========================
@@ -139,6 +143,12 @@ class IEVRModeCombo(QComboBox):
 
 class IEVRMainWindow(QMainWindow):
     update_available = Signal(str)
+    profile_done = Signal(str)
+    latency_done = Signal(dict)
+    stop_hotkey_pressed = Signal()
+    hardware_ready = Signal(dict)
+    game_window_changed = Signal(object)
+    channels_ready = Signal()
     def __init__(self):
         super().__init__()
 
@@ -155,33 +165,54 @@ class IEVRMainWindow(QMainWindow):
         self.match_history: list[dict] = []
         
         self.ramen_thread: threading.Thread | None = None
+        self.latency_stop = threading.Event()
+        self.latency_thread: threading.Thread | None = None
+        self._first_paint_done = False
         
         self._build_ui()
         self.log_lines = []
         self._connect_signals()
-        self._populate_system_info()
+        self.lbl_tool_version.setText(f"Tool version: {common.APP_VERSION}")
+
+        # WMI hardware query runs off the GUI thread once the window is up
+        self.hardware_ready.connect(self._populate_system_info)
+        QTimer.singleShot(0, self._start_hardware_detection)
 
-        # log timer
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.poll_queues)
-        self.timer.start(90)
+        # logs / stats: workers publish, we get a queued signal only when
+        # something arrives and drain once per frame (no idle polling)
+        self._drain_scheduled = False
+        self.channels_ready.connect(self._schedule_drain)
+        common.log_channel.on_ready(self.channels_ready.emit)
+        common.stats_channel.on_ready(self.channels_ready.emit)
 
-        # game window status timer
-        self.info_timer = QTimer(self)
-        self.info_timer.timeout.connect(self._update_game_window_status)
-        self.info_timer.start(1500)
+        # game window status: pushed by the background watcher, only on change
+        self.game_window_changed.connect(self._update_game_window_status)
+        QTimer.singleShot(0, self._start_window_watcher)
 
         self.update_available.connect(self._show_update_badge)
         QTimer.singleShot(300, self._check_for_update)
 
+        # STOP_HOTKEY: fires on the hotkey thread, handled like the Stop button
+        self.stop_hotkey_pressed.connect(self._on_stop_hotkey)
+        self.stop_hotkey = hotkeys.install(self.stop_hotkey_pressed.emit)
+
         common.log("INFO", "Qt GUI initialized.")
 
     # ---------- SYSTEM INFO / GAME WINDOW ----------
 
-    def _populate_system_info(self):
-        # Usa direttamente quello che abbiamo trovato in common.HARDWARE_INFO
-        info = common.HARDWARE_INFO
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            startup.mark("first paint")
+            QTimer.singleShot(0, lambda: startup.report(common.log))
+
+    def _start_hardware_detection(self):
+        # thread-safe: emette verso il main thread
+        common.start_hardware_detection(self.hardware_ready.emit)
 
+    def _populate_system_info(self, info: dict):
+        # info = common.get_hardware_info(), consegnato dal thread di detection
         os_label = info.get("os") or f"{platform.system()} {platform.release()}"
         self.lbl_os.setText(f"OS: {os_label}")
 
@@ -194,28 +225,36 @@ class IEVRMainWindow(QMainWindow):
             f"Connected via: {info.get('mouse_conn', 'Unknown')}"
         )
 
-        # Versione tool
-        self.lbl_tool_version.setText(f"Tool version: {common.APP_VERSION}")
 
-    def _update_game_window_status(self):
-        active = False
-        try:
-            import pygetwindow as gw
-            wins = gw.getWindowsWithTitle(common.GAME_WINDOW_TITLE)
-            if wins:
-                win = wins[0]
-                # alcuni wrapper usano .isActive, altri .isActive()
-                is_active = getattr(win, "isActive", None)
-                active = is_active() if callable(is_active) else bool(is_active)
-        except Exception:
-            active = False
-
-        if active:
+    def _start_window_watcher(self):
+        from .window_watcher import get_watcher
+        # thread-safe: emette verso il main thread
+        self._unsubscribe_window = get_watcher().subscribe(self.game_window_changed.emit)
+
+    def _update_game_window_status(self, state):
+        # state: window_watcher.GameWindowState
+        if state.exists and state.active:
             self.lbl_game_window.setText("Game window: Active")
             self.lbl_game_window.setStyleSheet("color: #22c55e;")
-        else:
+        elif state.exists and state.minimized:
+            self.lbl_game_window.setText("Game window: Minimized")
+            self.lbl_game_window.setStyleSheet("color: #facc15;")
+        elif state.exists:
             self.lbl_game_window.setText("Game window: Inactive")
             self.lbl_game_window.setStyleSheet("color: #f97373;")
+        else:
+            self.lbl_game_window.setText("Game window: Not found")
+            self.lbl_game_window.setStyleSheet("color: #f97373;")
+
+        if state.exists:
+            self.lbl_game_window.setToolTip(
+                f"{state.title}\n"
+                f"Position: {state.left}, {state.top}\n"
+                f"Window: {state.width} x {state.height}\n"
+                f"Client area: {state.client_width} x {state.client_height}"
+            )
+        else:
+            self.lbl_game_window.setToolTip("")
 
     # ---------- UPDATE CHECKER ----------
 
@@ -297,8 +336,7 @@ class IEVRMainWindow(QMainWindow):
         import sys as _sys
         import platform
         import pyautogui
-        import pygetwindow as gw
-        from ctypes import windll, wintypes, byref  # <— aggiunto
+        from .window_watcher import get_watcher
 
         # OS / Python
         self.lbl_diag_os.setText(f"{platform.system()} {platform.release()}")
@@ -309,9 +347,9 @@ class IEVRMainWindow(QMainWindow):
         self.lbl_diag_screen.setText(f"{sw} x {sh}")
 
         # Game window + resolution
-        target_w, target_h = 1024, 576
+        target_w, target_h = 16, 9
         try:
-            wins = gw.getWindowsWithTitle(common.GAME_WINDOW_TITLE)
+            state = get_watcher().poll()
         except Exception as e:
             self.lbl_diag_game_win.setText(f"Error: {e}")
             self.lbl_diag_game_win.setStyleSheet("color: #f97373; font-weight: 600;")
@@ -323,43 +361,33 @@ class IEVRMainWindow(QMainWindow):
             )
             self.lbl_diag_resolution_hint.setStyleSheet("color: #f97373;")
         else:
-            if wins:
-                win = wins[0]
-                self.lbl_diag_game_win.setText(f"YES ({win.title})")
+            if state.exists:
+                self.lbl_diag_game_win.setText(f"YES ({state.title})")
                 self.lbl_diag_game_win.setStyleSheet("color: #22c55e; font-weight: 600;")
 
-                # ---- QUI USIAMO LA CLIENT AREA, NON win.width/height ----
-                gw_w = gw_h = None
-                try:
-                    hwnd = win._hWnd  # handle della finestra (pygetwindow su Windows)
-                    rect = wintypes.RECT()
-                    windll.user32.GetClientRect(hwnd, byref(rect))
-                    gw_w = rect.right - rect.left
-                    gw_h = rect.bottom - rect.top
-                except Exception:
-                    # fallback: usiamo comunque width/height esterni se qualcosa va storto
-                    gw_w, gw_h = win.width, win.height
+                # ---- QUI USIAMO LA CLIENT AREA, NON width/height esterni ----
+                gw_w, gw_h = state.client_width, state.client_height
 
                 self.lbl_diag_game_res.setText(f"{gw_w} x {gw_h}")
 
-                if gw_w == target_w and gw_h == target_h:
-                    # OK
+                # offsets scale with the client area (geometry.py); only the
+                # aspect ratio has to match the one they were calibrated at
+                if gw_h > 0 and abs(gw_w * target_h - gw_h * target_w) <= target_w:
                     self.lbl_diag_game_res.setStyleSheet(
                         "color: #22c55e; font-weight: 600;"
                     )
                     self.lbl_diag_resolution_hint.setText(
-                        "Resolution OK. Offsets are calibrated for 1024 x 576 windowed."
+                        "Resolution OK. Offsets scale with the 16:9 client area."
                     )
                     self.lbl_diag_resolution_hint.setStyleSheet("color: #9ca3af;")
                 else:
-                    # ⚠ sbagliata → rosso
                     self.lbl_diag_game_res.setStyleSheet(
                         "color: #f97373; font-weight: 600;"
                     )
                     self.lbl_diag_resolution_hint.setText(
-                        "⚠ Game window is not 1024 x 576 in its client area. "
-                        "For reliable clicks, set the game to 1024 x 576 windowed "
-                        "and run 'Recalibrate offsets' from the Logs tab."
+                        "⚠ Game client area is not 16:9. Offsets scale with the window, "
+                        "but the game letterboxes other aspect ratios: use a 16:9 "
+                        "windowed size (e.g. 1024 x 576) or run 'Recalibrate offsets'."
                     )
                     self.lbl_diag_resolution_hint.setStyleSheet("color: #f97373;")
             else:
@@ -385,8 +413,62 @@ class IEVRMainWindow(QMainWindow):
             else "color: #f97373; font-weight: 600;"
         )
 
+        self._refresh_latency_table()
         common.log("INFO", "Diagnostics completed.")
 
+    def on_measure_latency(self):
+        if self.latency_thread is not None and self.latency_thread.is_alive():
+            self.latency_stop.set()
+            self.btn_latency.setText("Stopping…")
+            return
+        if (self.bot_thread and self.bot_thread.is_alive()) or \
+           (self.ramen_thread and self.ramen_thread.is_alive()):
+            common.log("WARN", "Stop the running mode before measuring input latency.")
+            return
+
+        from . import latency
+
+        keys = [k.strip().lower() for k in self.edit_latency_keys.text().split(",") if k.strip()]
+        if not keys:
+            common.log("WARN", "Latency: enter at least one input to press (e.g. down, up).")
+            return
+
+        self.latency_stop.clear()
+        self.latency_thread = latency.measure_in_background(
+            self.latency_stop,
+            keys,
+            self.spin_latency_samples.value(),
+            # thread-safe: emitted towards the main thread
+            on_done=self.latency_done.emit,
+        )
+        if self.latency_thread is None:
+            return
+        self.btn_latency.setText("Stop measuring")
+        self.set_status("Status: measuring input latency...", "#f97316")
+
+    def _on_latency_done(self, summaries: dict):
+        self.btn_latency.setText("Measure input latency")
+        self.set_status("Status: idle", "#6b7280")
+        self._refresh_latency_table()
+
+    def _refresh_latency_table(self):
+        from . import latency
+
+        rows = latency.table()
+        self.tbl_latency.setRowCount(len(rows))
+        for r, (backend, key, misses, s) in enumerate(rows):
+            if s is None:
+                stats = ["0", "--", "--", "--", "--"]
+            else:
+                stats = [str(s["n"])] + [f"{s[p]:.0f}" for p in ("p50", "p90", "p99", "max")]
+            for c, text in enumerate([backend, key] + stats[:1] + [str(misses)] + stats[1:]):
+                self.tbl_latency.setItem(r, c, QTableWidgetItem(text))
+        self.lbl_latency_hint.setText(
+            "No measurements yet." if not rows else
+            "Times in ms from sending the input to the first changed frame. "
+            "Set a step's delay a little above the p99 of the input that starts it."
+        )
+
     def _build_stats_tab(self) -> QWidget:
         tab = QWidget()
         tab.setObjectName("statsTab")
@@ -505,6 +587,59 @@ class IEVRMainWindow(QMainWindow):
 
         layout.addWidget(card)
 
+        # Card latenza input -> schermo
+        lat_card = QFrame()
+        lat_card.setObjectName("card")
+        lat_layout = QVBoxLayout(lat_card)
+        lat_layout.setContentsMargins(12, 10, 12, 10)
+        lat_layout.setSpacing(6)
+
+        lat_desc = QLabel(
+            "Input latency: presses each input in the game window and times how long "
+            "the screen takes to react, per input and per input backend (keyboard/mouse "
+            "or Chiaki4Deck controller). Use inputs that visibly change something and "
+            "come back, e.g. down, up in a menu. See LATENCY_* in settings.json."
+        )
+        lat_desc.setObjectName("fieldDescription")
+        lat_desc.setWordWrap(True)
+        lat_layout.addWidget(lat_desc)
+
+        lat_row = QHBoxLayout()
+        lat_row.addWidget(QLabel("Inputs:"))
+        self.edit_latency_keys = QLineEdit(", ".join(common.LATENCY_KEYS))
+        lat_row.addWidget(self.edit_latency_keys, 1)
+        lat_row.addWidget(QLabel("Samples:"))
+        self.spin_latency_samples = QSpinBox()
+        self.spin_latency_samples.setRange(1, 500)
+        self.spin_latency_samples.setValue(common.LATENCY_SAMPLES)
+        lat_row.addWidget(self.spin_latency_samples)
+        self.btn_latency = QPushButton("Measure input latency")
+        self.btn_latency.setObjectName("ghostButton")
+        lat_row.addWidget(self.btn_latency)
+        lat_layout.addLayout(lat_row)
+
+        self.tbl_latency = QTableWidget()
+        self.tbl_latency.setColumnCount(8)
+        self.tbl_latency.setHorizontalHeaderLabels(
+            ["Backend", "Input", "Samples", "Misses", "Median", "p90", "p99", "Max"]
+        )
+        lat_header = self.tbl_latency.horizontalHeader()
+        lat_header.setSectionResizeMode(QHeaderView.Stretch)
+        lat_header.setDefaultAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        self.tbl_latency.verticalHeader().setVisible(False)
+        self.tbl_latency.setShowGrid(False)
+        self.tbl_latency.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tbl_latency.setFocusPolicy(Qt.NoFocus)
+        self.tbl_latency.setMinimumHeight(120)
+        lat_layout.addWidget(self.tbl_latency)
+
+        self.lbl_latency_hint = QLabel("Run Diagnostics to show saved measurements.")
+        self.lbl_latency_hint.setObjectName("fieldDescription")
+        self.lbl_latency_hint.setWordWrap(True)
+        lat_layout.addWidget(self.lbl_latency_hint)
+
+        layout.addWidget(lat_card)
+
         layout.addStretch()
         return tab
 
@@ -608,17 +743,12 @@ class IEVRMainWindow(QMainWindow):
 
         info_layout.addSpacing(4)
 
-        info = common.HARDWARE_INFO
-
-        self.lbl_os = QLabel(f"OS: {info.get('os', 'Unknown')}")
-        self.lbl_keyboard = QLabel(f"Keyboard: {info.get('keyboard', 'Unknown')}")
-        self.lbl_keyboard_conn = QLabel(
-            f"Connected via: {info.get('keyboard_conn', 'Unknown')}"
-        )
-        self.lbl_mouse = QLabel(f"Mouse: {info.get('mouse', 'Unknown')}")
-        self.lbl_mouse_conn = QLabel(
-            f"Connected via: {info.get('mouse_conn', 'Unknown')}"
-        )
+        # filled in by _populate_system_info() once hardware detection finishes
+        self.lbl_os = QLabel(f"OS: {platform.system()} {platform.release()}")
+        self.lbl_keyboard = QLabel("Keyboard: detecting…")
+        self.lbl_keyboard_conn = QLabel("Connected via: …")
+        self.lbl_mouse = QLabel("Mouse: detecting…")
+        self.lbl_mouse_conn = QLabel("Connected via: …")
         self.lbl_game_window = QLabel("Game window: Inactive")
         self.lbl_game_window.setObjectName("gameStatusLabel")
 
@@ -784,6 +914,12 @@ class IEVRMainWindow(QMainWindow):
 
         self.btn_recalib = QPushButton("♻  Recalibrate offsets")
         self.btn_recalib.setObjectName("ghostButton")
+        self.btn_autocalib = QPushButton("✨  Auto-calibrate")
+        self.btn_autocalib.setObjectName("ghostButton")
+        self.btn_autocalib.setToolTip(
+            "Find the Ranked / Cancel / end-screen buttons that are on screen now "
+            "and update their offsets (uses the templates learned during runs)."
+        )
         self.btn_test_focus = QPushButton("🎯  Test focus")
         self.btn_test_focus.setObjectName("ghostButton")
         self.btn_test_click = QPushButton("🖱  Test match button")
@@ -796,11 +932,28 @@ class IEVRMainWindow(QMainWindow):
         self.btn_save_logs = QPushButton("💾  Save logs")
         self.btn_save_logs.setObjectName("ghostButton")
 
+        self.btn_export_trace = QPushButton("⏺  Export trace")
+        self.btn_export_trace.setObjectName("ghostButton")
+        self.btn_export_trace.setToolTip(
+            "Write the recorded bot/trainer timeline as Chrome trace JSON "
+            "(open it in chrome://tracing or ui.perfetto.dev)."
+        )
+
         t_layout.addWidget(self.btn_copy_logs)
         t_layout.addWidget(self.btn_save_logs)
+        t_layout.addWidget(self.btn_export_trace)
+
+        self.btn_profile = QPushButton(f"⏱  Profile {int(common.PROFILE_DURATION)}s")
+        self.btn_profile.setObjectName("ghostButton")
+        self.btn_profile.setToolTip(
+            "Sample the running bot/trainer thread and write a collapsed-stack "
+            "flamegraph file into the logs folder."
+        )
+        t_layout.addWidget(self.btn_profile)
 
         for b in (
             self.btn_recalib,
+            self.btn_autocalib,
             self.btn_test_focus,
             self.btn_test_click,
             self.btn_test_pixel,
@@ -886,6 +1039,11 @@ class IEVRMainWindow(QMainWindow):
         self.edit_auto_key.setMaxLength(2)
         form.addRow("Auto-mode key:", self.edit_auto_key)
 
+        # Stop hotkey
+        self.edit_stop_hotkey = QLineEdit(cfg.STOP_HOTKEY)
+        self.edit_stop_hotkey.setPlaceholderText("e.g. alt+c, ctrl+shift+f12 (empty = off)")
+        form.addRow("Stop hotkey:", self.edit_stop_hotkey)
+
         core_layout.addLayout(form)
 
         # ---- Timings with sliders ----
@@ -1103,6 +1261,18 @@ class IEVRMainWindow(QMainWindow):
         d_lvl.setObjectName("fieldDescription")
         safety_layout.addWidget(d_lvl)
 
+        self.chk_nav_closed = QCheckBox("Read menu screens (closed-loop navigator)")
+        self.chk_nav_closed.setChecked(bool(cfg.NAV_CLOSED_LOOP))
+        safety_layout.addWidget(self.chk_nav_closed)
+
+        d_nav = QLabel(
+            "Before and after each match, sends one input at a time, only what the current screen needs, "
+            "and re-queues as soon as the lobby is back instead of sending fixed click bursts."
+        )
+        d_nav.setObjectName("fieldDescription")
+        d_nav.setWordWrap(True)
+        safety_layout.addWidget(d_nav)
+
         # --- CHECKBOX LABEL ---
         self.chk_chiaki = QCheckBox("Chiaki4Deck Mode (PS4/5 Stream)")
         self.chk_chiaki.setChecked(bool(getattr(cfg, "CHIAKI4DECK", False)))
@@ -1133,6 +1303,18 @@ class IEVRMainWindow(QMainWindow):
         d_chiaki.setWordWrap(True)
         d_chiaki.setObjectName("fieldDescription")
         safety_layout.addWidget(d_chiaki)
+
+        self.chk_isolated = QCheckBox("Run modes in a separate process")
+        self.chk_isolated.setChecked(bool(getattr(cfg, "ISOLATED_WORKERS", False)))
+        safety_layout.addWidget(self.chk_isolated)
+
+        d_isolated = QLabel(
+            "The bot/trainer runs outside the app and is restarted automatically if it crashes. "
+            "It uses the saved settings, so save before pressing Start."
+        )
+        d_isolated.setObjectName("fieldDescription")
+        d_isolated.setWordWrap(True)
+        safety_layout.addWidget(d_isolated)
         
         # Timeout margin
         self.spin_timeout_margin = QDoubleSpinBox()
@@ -1349,6 +1531,20 @@ class IEVRMainWindow(QMainWindow):
         ramen_form.addRow("Wait after final ENTER (s):", self.spin_ramen_after_final_wait)
 
         ramen_layout.addLayout(ramen_form)
+
+        self.chk_ramen_closed = QCheckBox("Detect dialog and animation on screen (closed loop)")
+        self.chk_ramen_closed.setChecked(bool(cfg.RAMEN_CLOSED_LOOP))
+        ramen_layout.addWidget(self.chk_ramen_closed)
+
+        d_ramen_closed = QLabel(
+            "Stops pressing ENTER once the dialog is gone and ends each wait as soon as the game is "
+            "ready (the waits above become upper limits). A dialog left open is closed first; "
+            "if it won't close, the trainer stops instead of retrying blind."
+        )
+        d_ramen_closed.setObjectName("fieldDescription")
+        d_ramen_closed.setWordWrap(True)
+        ramen_layout.addWidget(d_ramen_closed)
+
         content_layout.addWidget(ramen_card)
 
         # -------- PINK BEANS TRAINER CARD --------
@@ -1448,6 +1644,20 @@ class IEVRMainWindow(QMainWindow):
         pink_form.addRow("After final ENTER (s):", self.spin_pink_final_enter)
 
         pink_layout.addLayout(pink_form)
+
+        self.chk_pink_closed = QCheckBox("Check steps on screen (closed loop)")
+        self.chk_pink_closed.setChecked(bool(cfg.PINK_CLOSED_LOOP))
+        pink_layout.addWidget(self.chk_pink_closed)
+
+        d_pink_closed = QLabel(
+            "Animations and the V hold last only as long as they run on screen; the delays above "
+            "become upper limits. A step that never shows up (dropped input) sends the trainer "
+            "back in front of the training to restart the cycle."
+        )
+        d_pink_closed.setObjectName("fieldDescription")
+        d_pink_closed.setWordWrap(True)
+        pink_layout.addWidget(d_pink_closed)
+
         content_layout.addWidget(pink_card)
 
         # -------- BLUE BEANS TRAINER CARD --------
@@ -1547,6 +1757,18 @@ class IEVRMainWindow(QMainWindow):
         blue_form.addRow("Cooldown before next cycle (s):", self.spin_blue_cooldown)
 
         blue_layout.addLayout(blue_form)
+
+        self.chk_blue_closed = QCheckBox("Confirm stages on screen (closed loop)")
+        self.chk_blue_closed.setChecked(bool(cfg.BLUE_CLOSED_LOOP))
+        blue_layout.addWidget(self.chk_blue_closed)
+
+        d_blue_closed = QLabel(
+            "Moves on as soon as the menu, training, result or training reset shows up; "
+            "the delays above become upper limits. The first cycles learn what each stage looks like."
+        )
+        d_blue_closed.setObjectName("fieldDescription")
+        d_blue_closed.setWordWrap(True)
+        blue_layout.addWidget(d_blue_closed)
         content_layout.addWidget(blue_card)
 
         # -------- APPLY BUTTON --------
@@ -1572,12 +1794,18 @@ class IEVRMainWindow(QMainWindow):
         self.btn_save_settings.clicked.connect(self.on_save_settings)
 
         self.btn_recalib.clicked.connect(self.on_recalibrate)
+        self.btn_autocalib.clicked.connect(self.on_autocalibrate)
         self.btn_test_focus.clicked.connect(self.on_test_focus)
         self.btn_test_click.clicked.connect(self.on_test_play_click)
         self.btn_test_pixel.clicked.connect(self.on_test_pixel)
         self.btn_update.clicked.connect(self._open_releases_page)
         self.btn_copy_logs.clicked.connect(self.on_copy_logs)
         self.btn_save_logs.clicked.connect(self.on_save_logs)
+        self.btn_export_trace.clicked.connect(self.on_export_trace)
+        self.btn_profile.clicked.connect(self.on_profile_worker)
+        self.profile_done.connect(self._on_profile_done)
+        self.btn_latency.clicked.connect(self.on_measure_latency)
+        self.latency_done.connect(self._on_latency_done)
         self.combo_theme.currentTextChanged.connect(self.on_change_theme)
         self.combo_mode.currentIndexChanged.connect(self._on_mode_changed)
 
@@ -1656,42 +1884,52 @@ class IEVRMainWindow(QMainWindow):
         self.btn_start.setEnabled(False)
         self.btn_stop.setEnabled(True)
 
+    def _make_worker(self, mode: str, target, name: str) -> threading.Thread:
+        """Worker thread, or a ProcessWorker thread supervising a child process."""
+        from .tuner import apply_profile
+        apply_profile(mode)
+        if common.ISOLATED_WORKERS:
+            from .process_pool import ProcessWorker
+            return ProcessWorker(mode, self.stop_event, name=name)
+        return threading.Thread(target=target, args=(self.stop_event,), daemon=True, name=name)
+
+    def _launch(self, worker: threading.Thread):
+        worker.start()
+        # isolated workers run their own watchdog inside the child process
+        if not common.ISOLATED_WORKERS:
+            from .watchdog import watch
+            watch(worker, self.stop_event)
+
     def _start_ranked(self):
         """Start the Ranked auto-match bot."""
-        self.bot_thread = threading.Thread(
-            target=bot_main, args=(self.stop_event,), daemon=True
-        )
-        self.bot_thread.start()
+        from .bot import bot_main
+
+        self.bot_thread = self._make_worker("ranked", bot_main, "bot_thread")
+        self._launch(self.bot_thread)
         common.log("INFO", "Ranked bot thread started from Qt GUI.")
 
     def _start_ramen(self):
         """Start the Ramen NPC trainer."""
-        self.ramen_thread = threading.Thread(
-            target=run_ramen_trainer,
-            args=(self.stop_event,),
-            daemon=True,
-        )
-        self.ramen_thread.start()
+        from .ramen import run_ramen_trainer
+
+        self.ramen_thread = self._make_worker("ramen", run_ramen_trainer, "ramen_thread")
+        self._launch(self.ramen_thread)
         common.log("INFO", "Ramen trainer thread started from Qt GUI.")
 
     def _start_blue_beans(self):
         """Start the Blue Beans trainer."""
-        self.ramen_thread = threading.Thread(
-            target=run_blue_beans_trainer,
-            args=(self.stop_event,),
-            daemon=True,
-        )
-        self.ramen_thread.start()
+        from .beans.blue import run_blue_beans_trainer
+
+        self.ramen_thread = self._make_worker("blue", run_blue_beans_trainer, "blue_beans_thread")
+        self._launch(self.ramen_thread)
         common.log("INFO", "Blue Beans trainer thread started from Qt GUI.")
 
     def _start_pink_beans(self):
         """Start the Pink Beans trainer."""
-        self.ramen_thread = threading.Thread(
-            target=run_pink_beans_trainer,
-            args=(self.stop_event,),
-            daemon=True,
-        )
-        self.ramen_thread.start()
+        from .beans.pink import run_pink_beans_trainer
+
+        self.ramen_thread = self._make_worker("pink", run_pink_beans_trainer, "pink_beans_thread")
+        self._launch(self.ramen_thread)
         common.log("INFO", "Pink Beans trainer thread started from Qt GUI.")
 
     def on_stop(self):
@@ -1715,6 +1953,14 @@ class IEVRMainWindow(QMainWindow):
 
         common.log("INFO", "Stop requested from Qt GUI.")
 
+    def _on_stop_hotkey(self):
+        if self.latency_thread is not None and self.latency_thread.is_alive():
+            self.latency_stop.set()
+        ranked_running = self.bot_thread and self.bot_thread.is_alive()
+        ramen_running = self.ramen_thread and self.ramen_thread.is_alive()
+        if ranked_running or ramen_running:
+            self.on_stop()
+
     # ---------------- STATUS & LOGS ----------------
 
     def set_status(self, text: str, color: str):
@@ -1728,45 +1974,52 @@ class IEVRMainWindow(QMainWindow):
             f"background-color: {color}; border-radius: 6px;"
         )
 
-    def poll_queues(self):
-        # log queue
-        while True:
-            try:
-                level, msg = common.log_queue.get_nowait()
-            except Exception:
-                break
-            else:
-                self.append_log(level, msg)
-
-        # stats queue
-        while True:
-            try:
-                data = common.stats_queue.get_nowait()
-            except Exception:
-                break
-            else:
-                self.update_stats(data)
+    # ---------- log / stats channels ----------
 
-    def append_log(self, level: str, msg: str):
-        self.log_lines.append(msg)  # <--- salva anche in memoria
-
-        level = (level or "").upper()
-        color_map = {
-            "INFO": "#38bdf8",
-            "STATE": "#22c55e",
-            "ACTION": "#a855f7",
-            "DEBUG": "#9ca3af",
-            "WARN": "#facc15",
-            "ERROR": "#f97373",
-        }
-        color = color_map.get(level, "#e5e7eb")
+    def _schedule_drain(self):
+        # coalesce: many wake-ups within a frame -> one drain
+        if self._drain_scheduled:
+            return
+        self._drain_scheduled = True
+        QTimer.singleShot(16, self.drain_channels)
+
+    def drain_channels(self):
+        self._drain_scheduled = False
+
+        logs = common.log_channel.drain()
+        if logs:
+            self.append_logs(logs)
+
+        for data in common.stats_channel.drain():
+            self.update_stats(data)
+
+    _LOG_COLORS = {
+        "INFO": "#38bdf8",
+        "STATE": "#22c55e",
+        "ACTION": "#a855f7",
+        "DEBUG": "#9ca3af",
+        "WARN": "#facc15",
+        "ERROR": "#f97373",
+    }
+
+    def _log_html(self, level: str, msg: str) -> str:
+        color = self._LOG_COLORS.get((level or "").upper(), "#e5e7eb")
         safe = (
             msg.rstrip("\n")
             .replace("&", "&amp;")
             .replace("<", "&lt;")
             .replace(">", "&gt;")
         )
-        html = f'<span style="color:{color};">{safe}</span>'
+        return f'<span style="color:{color};">{safe}</span>'
+
+    def append_log(self, level: str, msg: str):
+        self.append_logs([(level, msg)])
+
+    def append_logs(self, entries):
+        """Append a batch of (level, msg) with a single document update."""
+        self.log_lines.extend(msg for _, msg in entries)  # <--- salva anche in memoria
+
+        html = "<br>".join(self._log_html(level, msg) for level, msg in entries)
         self.txt_logs.append(html)
 
         cursor = self.txt_logs.textCursor()
@@ -1800,6 +2053,44 @@ class IEVRMainWindow(QMainWindow):
         except Exception as e:
             common.log("ERROR", f"Failed to save logs: {e}")
 
+    def on_export_trace(self):
+        if not tracing.is_enabled():
+            common.log("WARN", "Tracing is disabled (TRACE_ENABLED = false in settings.json).")
+            return
+        try:
+            path = tracing.dump_chrome_trace()
+            common.log("INFO", f"Trace exported to: {path}")
+        except Exception as e:
+            common.log("ERROR", f"Failed to export trace: {e}")
+
+    def on_profile_worker(self):
+        worker = None
+        for t in (self.bot_thread, self.ramen_thread):
+            if t is not None and t.is_alive():
+                worker = t
+                break
+
+        from .process_pool import ProcessWorker
+        if isinstance(worker, ProcessWorker):
+            common.log("WARN", "Profiler: the worker runs in a separate process and can't be sampled from here.")
+            return
+
+        sampler = profiler.profile_thread(
+            worker,
+            label=worker.name if worker is not None else "worker",
+            # thread-safe: emette verso il main thread
+            on_done=lambda s: self.profile_done.emit(s.output_path or ""),
+        )
+        if sampler is None:
+            return
+
+        self.btn_profile.setEnabled(False)
+        self.btn_profile.setText("⏱  Profiling…")
+
+    def _on_profile_done(self, path: str):
+        self.btn_profile.setEnabled(True)
+        self.btn_profile.setText(f"⏱  Profile {int(common.PROFILE_DURATION)}s")
+
     def on_change_theme(self, value: str):
         app = QApplication.instance()
         apply_theme(app, value)
@@ -1907,6 +2198,7 @@ class IEVRMainWindow(QMainWindow):
             common.GAME_WINDOW_TITLE = self.edit_window_title.text().strip()
             new_key = self.edit_auto_key.text().strip()
             common.AUTO_MODE_KEY = new_key or "u"
+            common.STOP_HOTKEY = self.edit_stop_hotkey.text().strip().lower()
 
             common.DELAY_BEFORE_START = float(self.spin_delay_start.value())
             common.FIRST_WAIT = float(self.spin_first_wait.value())
@@ -1916,8 +2208,10 @@ class IEVRMainWindow(QMainWindow):
             common.POST_MATCH_CLICK_INTERVAL = float(self.spin_post_interval.value())
             common.SEARCH_CHECK_INTERVAL = float(self.spin_search_interval.value())
             common.LVL_75_PLUS = self.chk_lvl75.isChecked()
+            common.NAV_CLOSED_LOOP = self.chk_nav_closed.isChecked()
             common.MATCH_TIMEOUT_MARGIN = float(self.spin_timeout_margin.value())
             common.CHIAKI4DECK = self.chk_chiaki.isChecked()
+            common.ISOLATED_WORKERS = self.chk_isolated.isChecked()
 
             max_matches = int(self.spin_max_matches.value())
             common.MAX_MATCHES_PER_RUN = None if max_matches == 0 else max_matches
@@ -1928,7 +2222,7 @@ class IEVRMainWindow(QMainWindow):
             # ================= PS REMOTE PLAY INSTALL FLOW =================
             if common.CHIAKI4DECK:
                 # re-init backend to test environment
-                common.input_backend = common.InputBackend(True)
+                common.set_input_backend(common.InputBackend(True))
                 status = common.check_chiaki4deck_env()
 
                 # ---------------- ALREADY OK ----------------
@@ -1965,7 +2259,7 @@ class IEVRMainWindow(QMainWindow):
                     common.log("INFO", f"vgamepad install output:\n{output}")
 
                     # Re-test after package install
-                    common.input_backend = common.InputBackend(True)
+                    common.set_input_backend(common.InputBackend(True))
                     status = common.check_chiaki4deck_env()
                     common.log("DEBUG", f"Chiaki env AFTER vgamepad install: {status!r}, ok={ok}")
 
@@ -2064,6 +2358,7 @@ class IEVRMainWindow(QMainWindow):
             common.RAMEN_FINAL_ENTER_COUNT = int(self.spin_ramen_final_enter_count.value())
             common.RAMEN_FINAL_ENTER_DELAY = float(self.spin_ramen_final_enter_delay.value())
             common.RAMEN_AFTER_FINAL_WAIT = float(self.spin_ramen_after_final_wait.value())
+            common.RAMEN_CLOSED_LOOP = self.chk_ramen_closed.isChecked()
 
             # ================= PINK BEANS TRAINER =================
             common.PINK_INITIAL_DELAY = float(self.spin_pink_initial.value())
@@ -2080,6 +2375,7 @@ class IEVRMainWindow(QMainWindow):
 
             common.PINK_DOWN_DELAY = float(self.spin_pink_down.value())
             common.PINK_FINAL_ENTER_DELAY = float(self.spin_pink_final_enter.value())
+            common.PINK_CLOSED_LOOP = self.chk_pink_closed.isChecked()
 
             # ================= BLUE BEANS TRAINER =================
             common.BLUE_INITIAL_DELAY  = float(self.spin_blue_initial.value())
@@ -2099,34 +2395,35 @@ class IEVRMainWindow(QMainWindow):
 
             common.BLUE_ENTER5_DELAY   = float(self.spin_blue_enter5.value())
             common.BLUE_COOLDOWN_DELAY = float(self.spin_blue_cooldown.value())
+            common.BLUE_CLOSED_LOOP = self.chk_blue_closed.isChecked()
 
-            # ================= MIRROR INTO cfg (dynamic) =================
-            cfg = common.cfg
-
-            # copy every ALL-CAPS attribute that also exists in cfg
-            for name in dir(common):
-                if not name.isupper():
-                    continue
-                if not hasattr(cfg, name):
-                    continue
-                setattr(cfg, name, getattr(common, name))
-
-            # ================= SAVE TO settings.py (dynamic) =================
-            # take all ALL-CAPS attributes from cfg as settings
+            # ================= SAVE TO settings.json =================
+            # only the fields edited here (one atomic write): session values such as
+            # the timing / calibration profiles (common.apply_settings) are never saved
+            session = common.session_settings()
             values = {
-                name: getattr(cfg, name)
-                for name in dir(cfg)
-                if name.isupper()
+                name: getattr(common, name) for name in config.FIELDS
+                if getattr(common, name) != getattr(common.cfg, name)
+                and not (name in session and session[name] == getattr(common, name))
             }
             common.save_settings_to_file(values)
 
+            # the window title may have changed: let the watcher re-match now
+            from .window_watcher import running_watcher
+            watcher = running_watcher()
+            if watcher is not None:
+                watcher.wake()
+
+            if common.STOP_HOTKEY != self.stop_hotkey.chord:
+                self.stop_hotkey.set_chord(common.STOP_HOTKEY)
+
             # update header label using current values
             self._cfg_label.setText(
                 f'Window title: "{common.GAME_WINDOW_TITLE}"   •   '
                 f'Auto-mode key: "{common.AUTO_MODE_KEY.upper()}"'
             )
             self.set_status("Status: idle (settings updated)", "#22c55e")
-            common.log("INFO", "Settings saved to settings.py and applied.")
+            common.log("INFO", f"Settings v{config.version()} saved and applied (running modes pick them up on their next cycle).")
 
         except Exception as e:
             common.log("ERROR", f"Failed to save settings: {e}")
@@ -2139,6 +2436,8 @@ class IEVRMainWindow(QMainWindow):
             common.log("WARN", "Stop the bot before recalibrating offsets.")
             return
 
+        from .window_helpers import recalibrate_offsets_via_gui
+
         def _run():
             self.set_status("Status: recalibrating...", "#f97316")
             try:
@@ -2148,15 +2447,34 @@ class IEVRMainWindow(QMainWindow):
 
         threading.Thread(target=_run, daemon=True).start()
 
+    def on_autocalibrate(self):
+        if self.bot_thread and self.bot_thread.is_alive():
+            common.log("WARN", "Stop the bot before recalibrating offsets.")
+            return
+
+        from .window_helpers import auto_calibrate_via_gui
+
+        def _run():
+            self.set_status("Status: auto-calibrating...", "#f97316")
+            try:
+                auto_calibrate_via_gui()
+            finally:
+                self.set_status("Status: idle", "#6b7280")
+
+        threading.Thread(target=_run, daemon=True).start()
+
     def on_test_focus(self):
+        from .tools import gui_test_focus
         common.log("INFO", "Testing focus on game window...")
         gui_test_focus()
 
     def on_test_play_click(self):
+        from .tools import gui_test_play_click
         common.log("INFO", "Testing 'Ranked Match' button click...")
         gui_test_play_click()
 
     def on_test_pixel(self):
+        from .tools import gui_test_search_pixel
         common.log("INFO", "Testing search pixel read...")
         gui_test_search_pixel()
 
@@ -2645,10 +2963,15 @@ def apply_theme(app: QApplication, mode: str):
         _apply_dark_theme(app)
 
 def run_app():
+    startup.mark("run_app")
     app = QApplication(sys.argv)
+    startup.mark("QApplication ready")
     _apply_dark_theme(app)
+    startup.mark("theme applied")
 
     win = IEVRMainWindow()
+    startup.mark("main window built")
     win.show()
+    startup.mark("window shown")
 
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
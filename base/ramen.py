@@ -1,80 +1,70 @@
 # base/ramen_trainer.py
 
-import time
 import random
 
-import pyautogui
-
 from . import common
+from . import config
+from . import stages
+from . import tracing
 from .window_helpers import ensure_game_window, sleep_with_stop
 
-import win32api
-import win32con
-
-
-def alt_c_pressed():
-    ALT = win32api.GetAsyncKeyState(win32con.VK_MENU) & 0x8000
-    C   = win32api.GetAsyncKeyState(ord('C')) & 0x8000
-    return ALT and C
-
 
 def _press_key(key: str, times: int, delay: float, stop_event):
     """
     Press a key 'times' with controlled delay.
-    Checks ALT+C and stop_event frequently to remain responsive.
+    The delay ends as soon as stop_event is set (GUI Stop, STOP_HOTKEY).
     """
     for _ in range(times):
-        if stop_event.is_set() or alt_c_pressed():
+        if stop_event.is_set():
             common.log("WARN", "Ramen trainer: stop requested during key press.")
-            stop_event.set()
             return
 
-        common.input_backend.press_key(key)
+        common.get_input_backend().press_key(key)
+        sleep_with_stop(delay, stop_event)
+
 
-        waited = 0.0
-        while waited < delay:
-            if stop_event.is_set() or alt_c_pressed():
-                common.log("WARN", "Ramen trainer: stop requested during key delay.")
-                stop_event.set()
-                return
-            step = min(0.05, delay - waited)
-            time.sleep(step)
-            waited += step
+def _close_dialog(world, s, stop_event) -> bool:
+    """
+    A dialog is still open where the world should be: ENTER through it, at
+    most RAMEN_MAX_DIALOG_ENTERS times, until the world is back.
+    False if it's still open (the caller stops instead of retrying blind).
+    """
+    for _ in range(s.RAMEN_MAX_DIALOG_ENTERS):
+        if stop_event.is_set():
+            return True
+        _press_key("enter", 1, 0.0, stop_event)
+        if world.wait(s.RAMEN_FINAL_ENTER_DELAY, stop_event):
+            return True
+    return stop_event.is_set()
 
 
 def run_ramen_trainer(stop_event):
     """
     Fully configurable Ramen NPC Trainer loop.
-    Uses settings from settings.py / GUI.
+    Uses the settings snapshot pinned at start (settings.json / GUI),
+    refreshed at the start of every cycle.
+
+    With RAMEN_CLOSED_LOOP (and NumPy) the ramen dialog, the end of the
+    eating animation and the return to the world are detected on screen
+    (stages.py): ENTERs stop once the dialog is gone, waits end as soon as
+    the game is ready, and a dialog left open is closed, or the trainer
+    stops, instead of starting the next cycle blind.
     """
 
     # ---- LOAD SETTINGS ----
-    initial_delay        = common.RAMEN_INITIAL_DELAY
-
-    first_enter_count    = common.RAMEN_FIRST_ENTER_COUNT
-    first_enter_delay    = common.RAMEN_FIRST_ENTER_DELAY
-    after_first_wait     = common.RAMEN_AFTER_FIRST_WAIT
-
-    w_min                = common.RAMEN_W_MIN
-    w_max                = common.RAMEN_W_MAX
-    w_delay              = common.RAMEN_W_DELAY
-
-    long_wait_min        = common.RAMEN_LONG_WAIT_MIN
-    long_wait_max        = common.RAMEN_LONG_WAIT_MAX
-
-    final_enter_count    = common.RAMEN_FINAL_ENTER_COUNT
-    final_enter_delay    = common.RAMEN_FINAL_ENTER_DELAY
-    after_final_wait     = common.RAMEN_AFTER_FINAL_WAIT
+    s = config.pin()
+    initial_delay        = s.RAMEN_INITIAL_DELAY
 
     # ---- LOG START ----
     common.log(
         "STATE",
         f"Ramen trainer activated. Make sure to be in front of the Ramen NPC, trainer will start in {initial_delay}s."
     )
-    common.log(
-        "INFO",
-        "To stop the Ramen NPC Trainer, simply press ALT+C or close the app."
-    )
+    if common.STOP_HOTKEY:
+        common.log(
+            "INFO",
+            f"To stop the Ramen NPC Trainer, simply press {common.STOP_HOTKEY.upper()} or close the app."
+        )
 
     if not ensure_game_window(stop_event, timeout=10.0):
         common.log("ERROR", "Ramen trainer: game window not found or could not be focused.")
@@ -86,55 +76,145 @@ def run_ramen_trainer(stop_event):
         common.log("INFO", "Ramen trainer: stopped before starting loop.")
         return
 
-    common.log("STATE", "Ramen trainer: loop started.")
+    closed_loop = s.RAMEN_CLOSED_LOOP and stages.available()
+    dialog = stages.Stage("Ramen", "dialog")              # the NPC dialog box
+    after_dialog = stages.Stage("Ramen", "after_dialog")  # ready to walk in
+    eating = stages.Stage("Ramen", "eating_done")         # end of the eating animation
+    world = stages.Scene("Ramen", "world")                # back in front of the NPC
+    rate = stages.CycleRate(
+        f"Ramen trainer ({'closed' if closed_loop else 'open'}-loop)", unit="cycles"
+    )
+    in_step = True   # the previous cycle ended back in the world
+    misses = 0       # cycles in a row where the dialog didn't open
+
+    common.log("STATE", f"Ramen trainer: loop started ({'closed' if closed_loop else 'open'}-loop).")
 
     cycle = 0
 
     while not stop_event.is_set():
 
-        if alt_c_pressed():
-            common.log("WARN", "ALT+C detected → stopping Ramen Trainer.")
-            stop_event.set()
-            break
-
         cycle += 1
         common.log("STATE", f"Ramen trainer: starting cycle #{cycle}")
 
+        # ---- (RE)LOAD SETTINGS: changes saved meanwhile apply from this cycle ----
+        s = config.refresh(common.log)
+
+        first_enter_count    = s.RAMEN_FIRST_ENTER_COUNT
+        first_enter_delay    = s.RAMEN_FIRST_ENTER_DELAY
+        after_first_wait     = s.RAMEN_AFTER_FIRST_WAIT
+
+        w_min                = s.RAMEN_W_MIN
+        w_max                = s.RAMEN_W_MAX
+        w_delay              = s.RAMEN_W_DELAY
+
+        long_wait_min        = s.RAMEN_LONG_WAIT_MIN
+        long_wait_max        = s.RAMEN_LONG_WAIT_MAX
+
+        final_enter_count    = s.RAMEN_FINAL_ENTER_COUNT
+        final_enter_delay    = s.RAMEN_FINAL_ENTER_DELAY
+        after_final_wait     = s.RAMEN_AFTER_FINAL_WAIT
+
+        # ---- STEP 0: WHERE ARE WE? (closed loop) ----
+        if closed_loop:
+            if in_step:
+                world.observe()
+            if world.on_screen() is False and dialog.on_screen():
+                common.log("WARN", "Ramen trainer: a dialog is still open, closing it before the next cycle.")
+                if not _close_dialog(world, s, stop_event):
+                    common.log("ERROR", "Ramen trainer: the dialog won't close. Stopping instead of retrying blind.")
+                    break
+        in_step = False
+
         # ---- STEP 1: FIRST ENTER ----
         common.log("ACTION", f"ENTER x{first_enter_count}")
-        _press_key("enter", first_enter_count, first_enter_delay, stop_event)
+        with tracing.span("first_enter", cat="ramen", count=first_enter_count):
+            if not closed_loop:
+                _press_key("enter", first_enter_count, first_enter_delay, stop_event)
+            else:
+                dialog.begin()
+                _press_key("enter", 1, 0.0, stop_event)
+                opened = dialog.wait(first_enter_delay, stop_event)
+                for _ in range(first_enter_count - 1):
+                    if stop_event.is_set() or opened is False or dialog.on_screen() is False:
+                        break  # no dialog (anymore): more ENTERs would talk to the NPC again
+                    _press_key("enter", 1, first_enter_delay, stop_event)
         if stop_event.is_set():
             break
+        if closed_loop and opened is False:
+            misses += 1
+            if misses >= s.RAMEN_MAX_RETRIES:
+                common.log("ERROR", f"Ramen trainer: the ramen dialog didn't open {misses} times in a row. Stopping.")
+                break
+            common.log("WARN", f"Ramen trainer: the ramen dialog didn't open ({misses}/{s.RAMEN_MAX_RETRIES}), restarting the cycle.")
+            rate.cycle_failed()
+            continue
 
         # ---- STEP 2: WAIT ----
-        common.log("DEBUG", f"Waiting {after_first_wait}s")
-        sleep_with_stop(after_first_wait, stop_event)
-        if stop_event.is_set() or alt_c_pressed():
-            stop_event.set()
+        common.log("DEBUG", f"Waiting up to {after_first_wait}s")
+        with tracing.span("after_first_wait", cat="ramen"):
+            if closed_loop:
+                after_dialog.begin()
+                after_dialog.wait(after_first_wait, stop_event)
+            else:
+                sleep_with_stop(after_first_wait, stop_event)
+        if stop_event.is_set():
             break
 
         # ---- STEP 3: WALK ----
         w_times = random.randint(w_min, w_max)
         common.log("ACTION", f"W x{w_times}")
-        _press_key("w", w_times, w_delay, stop_event)
+        with tracing.span("walk", cat="ramen", count=w_times):
+            _press_key("w", w_times, w_delay, stop_event)
         if stop_event.is_set():
             break
 
         # ---- STEP 4: LONG WAIT ----
-        long_wait = random.uniform(long_wait_min, long_wait_max)
-        common.log("DEBUG", f"Ramen animation wait: {long_wait:.1f}s")
-        sleep_with_stop(long_wait, stop_event)
-        if stop_event.is_set() or alt_c_pressed():
-            stop_event.set()
+        if closed_loop:
+            # until the eating animation is over, at most the longest wait
+            common.log("DEBUG", f"Ramen animation wait: up to {long_wait_max:.1f}s")
+            with tracing.span("animation_wait", cat="ramen"):
+                eating.begin()
+                eating.wait(long_wait_max, stop_event)
+        else:
+            long_wait = random.uniform(long_wait_min, long_wait_max)
+            common.log("DEBUG", f"Ramen animation wait: {long_wait:.1f}s")
+            with tracing.span("animation_wait", cat="ramen"):
+                sleep_with_stop(long_wait, stop_event)
+        if stop_event.is_set():
             break
 
         # ---- STEP 5: FINAL ENTER ----
         common.log("ACTION", f"Final ENTER x{final_enter_count}")
-        _press_key("enter", final_enter_count, final_enter_delay, stop_event)
-
-        common.log("DEBUG", f"Post-cycle wait {after_final_wait}s")
-        sleep_with_stop(after_final_wait, stop_event)
+        with tracing.span("final_enter", cat="ramen", count=final_enter_count):
+            if not closed_loop:
+                _press_key("enter", final_enter_count, final_enter_delay, stop_event)
+            else:
+                for i in range(final_enter_count):
+                    if stop_event.is_set() or (i and world.on_screen()):
+                        break  # already back in the world
+                    _press_key("enter", 1, final_enter_delay, stop_event)
+        if stop_event.is_set():
+            break
 
+        # ---- STEP 6: BACK IN THE WORLD ----
+        common.log("DEBUG", f"Post-cycle wait up to {after_final_wait}s")
+        with tracing.span("after_final_wait", cat="ramen"):
+            back = world.wait(after_final_wait, stop_event) if closed_loop else None
+            if back is None:
+                sleep_with_stop(after_final_wait, stop_event)
+        if stop_event.is_set():
+            break
+        if back is False and dialog.on_screen():
+            common.log("WARN", "Ramen trainer: the dialog is still open after the final ENTERs, closing it.")
+            if not _close_dialog(world, s, stop_event):
+                common.log("ERROR", "Ramen trainer: the dialog won't close. Stopping instead of retrying blind.")
+                break
+            back = True
+
+        in_step = back is not False
+        misses = 0
+        rate.cycle_done()
         common.log("STATE", f"Ramen trainer: cycle #{cycle} completed")
 
+    rate.summary()
     common.log("INFO", "Ramen trainer: stopped.")
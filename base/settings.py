@@ -1,76 +0,0 @@
-# Saved settings for IEVR Helper
-
-GAME_WINDOW_TITLE = 'Inazuma Eleven: Victory Road'
-AUTO_MODE_KEY = 'u'
-
-DELAY_BEFORE_START = 5.0
-FIRST_WAIT = 15.0
-SECOND_WAIT = 80.0
-MATCH_DURATION = 780.0
-POST_MATCH_CLICKS = 20
-POST_MATCH_CLICK_INTERVAL = 0.3
-SEARCH_CHECK_INTERVAL = 20.0
-
-PLAY_BUTTON_OFFSET = (292, 247)
-ANNUL_PIXEL_OFFSET = (499, 375)
-ANNUL_PIXEL_COLOR = (250, 253, 254)
-END_BUTTON_OFFSET = (60, 57)
-END_BUTTON_COLOR = (172, 158, 48)
-LVL_75_PLUS = False
-MATCH_TIMEOUT_MARGIN = 120.0
-MAX_MATCHES_PER_RUN = None
-MAX_RUNTIME_MINUTES = None
-
-RAMEN_INITIAL_DELAY = 10.0
-RAMEN_FIRST_ENTER_COUNT = 4
-RAMEN_FIRST_ENTER_DELAY = 1.0
-RAMEN_AFTER_FIRST_WAIT = 5.0
-RAMEN_W_MIN = 7
-RAMEN_W_MAX = 8
-RAMEN_W_DELAY = 1.5
-RAMEN_LONG_WAIT_MIN = 15.0
-RAMEN_LONG_WAIT_MAX = 16.0
-RAMEN_FINAL_ENTER_COUNT = 2
-RAMEN_FINAL_ENTER_DELAY = 1.5
-RAMEN_AFTER_FINAL_WAIT = 5.0
-CHIAKI4DECK = False
-
-# ------- Pink Beans trainer defaults -------
-
-PINK_INITIAL_DELAY = 5.0              # attesa prima di iniziare il loop
-
-PINK_ENTER1_DELAY = 1.2               # dopo primo ENTER
-PINK_ENTER2_DELAY = 0.7               # dopo secondo ENTER
-PINK_UP_DELAY = 0.1                   # dopo UP
-PINK_ENTER3_DELAY = 0.2               # dopo terzo ENTER
-PINK_ENTER4_DELAY = 7.0               # dopo quarto ENTER (animazione)
-
-PINK_ESC_AFTER_DELAY = 0.1            # dopo ESC
-PINK_V_AFTER_DELAY = 2.0              # dopo singolo 'v'
-
-PINK_V_HOLD_DURATION = 2.0            # durata HOLD v
-PINK_AFTER_HOLD_DELAY = 3.0           # dopo HOLD v
-
-PINK_DOWN_DELAY = 0.5                 # dopo DOWN
-PINK_FINAL_ENTER_DELAY = 4.0          # dopo ENTER finale
-
-# ---- Blue Beans trainer (Hecaton Stairway) ----
-BLUE_INITIAL_DELAY    = 5.0   # before starting first cycle
-
-BLUE_ENTER1_DELAY     = 1.2   # after 1st ENTER
-BLUE_ENTER2_DELAY     = 0.7   # after 2nd ENTER
-BLUE_UP_DELAY         = 0.3   # after UP
-BLUE_ENTER3_DELAY     = 0.3   # after 3rd ENTER
-BLUE_ENTER4_DELAY     = 7.0   # after 4th ENTER (animation)
-
-BLUE_A1_DELAY         = 4.5   # after first A
-BLUE_S1_DELAY         = 8.5   # after first S
-BLUE_A2_DELAY         = 4.0   # after second A
-BLUE_S2_DELAY         = 10.0  # after second S
-BLUE_A3_DELAY         = 3.0   # after third A
-BLUE_S3_DELAY         = 5.0   # after third S
-BLUE_A4_DELAY         = 12.0  # after fourth A
-
-BLUE_ENTER5_DELAY     = 1.5   # after last ENTER
-BLUE_COOLDOWN_DELAY   = 70.0  # cooldown between cycles
-
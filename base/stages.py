@@ -0,0 +1,348 @@
+# base/stages.py
+
+import threading
+import time
+
+from . import common
+from . import config
+from . import frame_diff
+from .window_helpers import get_game_window, sleep_with_stop
+
+try:  # optional: without NumPy the trainers keep their fixed delays
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image
+    _BOX = Image.BOX
+except ImportError:
+    _BOX = 4
+
+# ========== SCREEN STAGES (closed-loop trainers) ==========
+#
+# The trainers wait a fixed, worst-case delay after each key press for the
+# game to reach the next stage (menu open, training started, ...). A Stage
+# learns what reaching it looks like and lets the trainer move on as soon as
+# it's on screen, with the fixed delay left as the upper bound:
+#
+#   learning (first STAGE_LEARN_CYCLES cycles, fixed delays as before)
+#     begin() grabs the window as a STAGE_GRID of cell means before the
+#     press, wait() grabs it again at the end of the full delay. Marker
+#     cells changed by more than STAGE_CELL_THRESHOLD in every learning
+#     cycle and ended on the same value each time (noise and animations
+#     drop out).
+#
+#   confirming
+#     wait() polls every STAGE_POLL_INTERVAL until STAGE_MATCH_FRACTION of
+#     the marker cells are back at their learned values, then waits
+#     STAGE_SETTLE for the game to accept input.
+#
+# A stage with fewer than STAGE_MIN_CELLS markers can't be told apart on
+# screen and keeps its fixed delay. STAGE_RELEARN_MISSES timeouts in a row
+# (camera moved, window resized) drop what was learned and start over.
+# Stages are learned per run, nothing is stored. The STAGE_* settings are
+# read from the worker's pinned snapshot (config.active()), so a save during
+# a run applies at the trainer's next config.refresh(), like its delays.
+#
+# A Scene is a whole screen the loop returns to (in front of the training,
+# back in the world): the cells that stay the same every time it's observed.
+# Trainers use it to check where they are and to resynchronize after a step
+# was missed (a dropped input otherwise desyncs every following step).
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _grab(win):
+    """The window as (frame size, cell means array), or None if capture fails."""
+    try:
+        frame_diff.tick(win, max_age=0.0)
+    except Exception as e:
+        common.log("DEBUG", f"Stage capture failed: {e}")
+        return None
+    frame = frame_diff.latest_frame(win)
+    if frame is None:
+        return None
+    cols, rows = config.active().STAGE_GRID
+    small = frame.convert("RGB").resize((int(cols), int(rows)), resample=_BOX)
+    return frame.size, np.asarray(small, dtype=np.int16).reshape(-1, 3)
+
+
+_registry: dict = {}  # (trainer, stage name) -> the latest Stage created for it
+
+
+def checks(trainer: str, name: str) -> bool:
+    """Does stage `name` of `trainer` confirm its step on screen (learned, not blind)?"""
+    stage = _registry.get((trainer, name))
+    return stage is not None and stage.markers is not None
+
+
+class Stage:
+    """One on-screen stage of a trainer cycle, e.g. Blue Beans 'menu_open'."""
+
+    def __init__(self, trainer: str, name: str):
+        self.trainer = trainer
+        self.name = name
+        self._reset()
+        _registry[(trainer, name)] = self
+
+    def _reset(self):
+        self.size = None
+        self.samples = []      # [(before, after)] from the learning cycles
+        self.markers = None    # marker cell indices once learned
+        self.target = None     # their learned cell means
+        self.blind = False     # learned, but nothing to see: fixed delay
+        self.misses = 0
+        self._before = None
+
+    @property
+    def learned(self) -> bool:
+        return self.markers is not None or self.blind
+
+    def on_screen(self, win=None):
+        """Is the stage showing right now? None until it has been learned (or if it's blind)."""
+        if self.markers is None:
+            return None
+        return _matches(win or get_game_window(), self.size, self.markers, self.target)
+
+    def begin(self, win=None):
+        """Call right before the key press (or event) that leads to this stage."""
+        self._before = None
+        if not available() or self.learned:
+            return
+        grab = _grab(win or get_game_window())
+        if grab is not None:
+            self._before = grab
+
+    def wait(self, timeout: float, stop_event, win=None):
+        """
+        Wait until the stage is on screen, at most `timeout` seconds (the
+        fixed delay). Returns True if it was confirmed, False if a learned
+        stage didn't show up in time (missed step), None if the stage can't
+        be checked (still learning, nothing visible, no NumPy).
+        """
+        win = win or get_game_window()
+        if not available() or win is None or self.blind:
+            sleep_with_stop(timeout, stop_event)
+            return None
+        if not self.learned:
+            sleep_with_stop(timeout, stop_event)
+            if not stop_event.is_set():
+                self._learn(win)
+            return None
+        return self._confirm(win, timeout, stop_event)
+
+    # ---------- learning ----------
+
+    def _learn(self, win):
+        before, self._before = self._before, None
+        after = _grab(win)
+        if before is None or after is None or before[0] != after[0]:
+            return
+        if self.size is not None and after[0] != self.size:
+            self._reset()
+        self.size = after[0]
+        self.samples.append((before[1], after[1]))
+        s = config.active()
+        if len(self.samples) < max(1, int(s.STAGE_LEARN_CYCLES)):
+            return
+
+        threshold = s.STAGE_CELL_THRESHOLD
+        befores = np.stack([b for b, _ in self.samples])
+        afters = np.stack([a for _, a in self.samples])
+        changed = (np.abs(afters - befores).max(axis=2) > threshold).all(axis=0)
+        steady = (np.abs(afters - afters[0]).max(axis=2) <= threshold).all(axis=0)
+        markers = np.flatnonzero(changed & steady)
+        self.samples = []
+
+        if len(markers) < s.STAGE_MIN_CELLS:
+            self.blind = True
+            common.log(
+                "DEBUG",
+                f"{self.trainer}: stage '{self.name}' has no stable on-screen change "
+                f"({len(markers)} cells), keeping its fixed delay."
+            )
+            return
+        self.markers = markers
+        self.target = afters[:, markers].mean(axis=0)
+        common.log("INFO", f"{self.trainer}: stage '{self.name}' learned ({len(markers)} marker cells).")
+
+    # ---------- confirming ----------
+
+    def _confirm(self, win, timeout: float, stop_event) -> bool:
+        start = time.monotonic()
+        if _poll(lambda: _matches(win, self.size, self.markers, self.target), timeout, stop_event):
+            waited = time.monotonic() - start
+            common.log("DEBUG", f"{self.trainer}: '{self.name}' after {waited:.2f}s (limit {timeout:.1f}s).")
+            self.misses = 0
+            sleep_with_stop(config.active().STAGE_SETTLE, stop_event)
+            return True
+
+        if stop_event.is_set():
+            return False
+        self.misses += 1
+        _note_miss()
+        common.log("DEBUG", f"{self.trainer}: '{self.name}' not seen within {timeout:.1f}s ({self.misses} in a row).")
+        if self.misses >= config.active().STAGE_RELEARN_MISSES:
+            common.log("INFO", f"{self.trainer}: stage '{self.name}' keeps timing out, learning it again.")
+            self._reset()
+        return False
+
+
+class Scene:
+    """A screen the trainer comes back to, e.g. Pink Beans 'track' (in front of the training)."""
+
+    def __init__(self, trainer: str, name: str):
+        self.trainer = trainer
+        self.name = name
+        self._reset()
+
+    def _reset(self):
+        self.size = None
+        self.samples = []
+        self.cells = None      # cells that look the same every time
+        self.target = None
+
+    @property
+    def learned(self) -> bool:
+        return self.cells is not None
+
+    def observe(self, win=None):
+        """Call where the game is known to show this scene (learning only)."""
+        if not available() or self.learned:
+            return
+        grab = _grab(win or get_game_window())
+        if grab is None:
+            return
+        if grab[0] != self.size:
+            self._reset()
+            self.size = grab[0]
+        self.samples.append(grab[1])
+        s = config.active()
+        if len(self.samples) < max(2, int(s.STAGE_LEARN_CYCLES)):
+            return
+
+        samples = np.stack(self.samples)
+        steady = (np.abs(samples - samples[0]).max(axis=2) <= s.STAGE_CELL_THRESHOLD).all(axis=0)
+        cells = np.flatnonzero(steady)
+        self.samples = []
+        if len(cells) < s.STAGE_MIN_CELLS:
+            common.log("DEBUG", f"{self.trainer}: scene '{self.name}' changes too much to be recognized, retrying.")
+            return
+        self.cells = cells
+        self.target = samples[:, cells].mean(axis=0)
+        common.log("INFO", f"{self.trainer}: scene '{self.name}' learned ({len(cells)} steady cells).")
+
+    def on_screen(self, win=None):
+        """True/False, or None while the scene isn't learned."""
+        if not self.learned:
+            return None
+        return _matches(win or get_game_window(), self.size, self.cells, self.target)
+
+    def wait(self, timeout: float, stop_event, win=None):
+        """Wait up to `timeout` s for the scene: True/False, None if not learned (no wait)."""
+        if not self.learned:
+            return None
+        win = win or get_game_window()
+        seen = _poll(lambda: _matches(win, self.size, self.cells, self.target), timeout, stop_event)
+        if not seen and not stop_event.is_set():
+            _note_miss()
+        return seen
+
+
+def _matches(win, size, cells, target) -> bool:
+    """Are STAGE_MATCH_FRACTION of `cells` within STAGE_CELL_THRESHOLD of `target`?"""
+    grab = _grab(win) if win is not None else None
+    if grab is None or grab[0] != size:
+        return False
+    s = config.active()
+    delta = np.abs(grab[1][cells] - target).max(axis=1)
+    return float((delta <= s.STAGE_CELL_THRESHOLD).mean()) >= s.STAGE_MATCH_FRACTION
+
+
+def _poll(check, timeout: float, stop_event) -> bool:
+    """Call check() every STAGE_POLL_INTERVAL until it's True (-> True) or `timeout` passes."""
+    deadline = time.monotonic() + timeout
+    while not stop_event.is_set():
+        if check():
+            return True
+        left = deadline - time.monotonic()
+        if left <= 0:
+            break
+        stop_event.wait(min(config.active().STAGE_POLL_INTERVAL, left))
+    return False
+
+
+# ---------- cycle outcomes ----------
+#
+# Every finished cycle is published on common.cycle_channel as
+#   {"label", "ok", "duration", "version", "timestamp"}
+# where ok means no checked step was missed during the cycle and version is
+# the settings version the worker ran it with (the tuner listens here).
+
+_cycle = threading.local()
+
+
+def _note_miss():
+    _cycle.misses = getattr(_cycle, "misses", 0) + 1
+
+
+def _take_misses() -> int:
+    misses = getattr(_cycle, "misses", 0)
+    _cycle.misses = 0
+    return misses
+
+
+def report_cycle(label: str, ok: bool, duration: float):
+    common.cycle_channel.publish({
+        "label": label,
+        "ok": bool(ok),
+        "duration": duration,
+        "version": config.pinned_version(),
+        "timestamp": time.time(),
+    })
+
+
+# ---------- throughput ----------
+
+class CycleRate:
+    """Completed cycles -> beans/hour (or `unit`/hour), logged per cycle and at the end of a run."""
+
+    def __init__(self, label: str, beans_per_cycle: float = 1.0, unit: str = "beans"):
+        self.label = label
+        self.beans_per_cycle = beans_per_cycle
+        self.unit = unit
+        self.started = time.monotonic()
+        self.last = self.started
+        self.cycles = 0
+
+    def per_hour(self) -> float:
+        hours = (time.monotonic() - self.started) / 3600.0
+        return self.cycles * self.beans_per_cycle / hours if hours > 0 else 0.0
+
+    def cycle_done(self):
+        now = time.monotonic()
+        took, self.last = now - self.last, now
+        self.cycles += 1
+        misses = _take_misses()
+        report_cycle(self.label, misses == 0, took)
+        missed = f" ({misses} missed steps)" if misses else ""
+        common.log("INFO", f"{self.label}: cycle #{self.cycles} in {took:.1f}s{missed}, {self.per_hour():.1f} {self.unit}/h.")
+
+    def cycle_failed(self):
+        """The cycle was abandoned (desync, dialog didn't open): reported, not counted."""
+        now = time.monotonic()
+        took, self.last = now - self.last, now
+        _take_misses()
+        report_cycle(self.label, False, took)
+
+    def summary(self):
+        if not self.cycles:
+            return
+        minutes = (time.monotonic() - self.started) / 60.0
+        common.log(
+            "INFO",
+            f"{self.label}: {self.cycles} cycles in {minutes:.1f} min, {self.per_hour():.1f} {self.unit}/h."
+        )
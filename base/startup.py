@@ -0,0 +1,123 @@
+# base/startup.py
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+
+# ========== STARTUP TIMING ==========
+#
+# main.py imports this module first, so _T0 is (close to) process start as
+# far as our code is concerned. Phases are recorded with mark()/phase() and
+# logged once the main window has painted for the first time.
+#
+# Per-module import times are opt-in (IEVR_IMPORT_TIMES=1 or
+# --startup-report): they wrap every loader, which we don't want by default in
+# the frozen exe.
+
+_T0 = time.perf_counter()
+_marks: list[tuple[str, float]] = []
+_phases: list[tuple[str, float]] = []
+_import_times: dict[str, float] = {}
+_reported = False
+
+
+def elapsed_ms() -> float:
+    return (time.perf_counter() - _T0) * 1000.0
+
+
+def mark(label: str):
+    """Record a point in time (ms since startup)."""
+    _marks.append((label, elapsed_ms()))
+
+
+@contextmanager
+def phase(label: str):
+    """Record how long a block takes (e.g. a heavy import)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((label, (time.perf_counter() - start) * 1000.0))
+
+
+# ---------- optional per-module import timer ----------
+
+class _TimedLoader:
+    def __init__(self, loader, name):
+        self._loader = loader
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            # cumulative: includes the modules this one imports
+            _import_times[self._name] = (time.perf_counter() - start) * 1000.0
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class _ImportTimer(MetaPathFinder):
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, name)
+        return spec
+
+
+def import_timing_requested() -> bool:
+    return os.environ.get("IEVR_IMPORT_TIMES") == "1" or "--startup-report" in sys.argv
+
+
+def install_import_timer():
+    if not any(isinstance(f, _ImportTimer) for f in sys.meta_path):
+        sys.meta_path.insert(0, _ImportTimer())
+
+
+def uninstall_import_timer():
+    sys.meta_path[:] = [f for f in sys.meta_path if not isinstance(f, _ImportTimer)]
+
+
+# ---------- report ----------
+
+def report(log, top: int = 15):
+    """
+    Log the startup report once through `log(level, msg)` (common.log).
+    The summary line is INFO, details are DEBUG.
+    """
+    global _reported
+    if _reported:
+        return
+    _reported = True
+    uninstall_import_timer()
+
+    first_paint = next((t for label, t in _marks if label == "first paint"), elapsed_ms())
+    log("INFO", f"Startup: first paint after {first_paint:.0f} ms.")
+
+    for label, t in _marks:
+        log("DEBUG", f"Startup mark: {label:<28} at {t:8.1f} ms")
+    for label, dur in _phases:
+        log("DEBUG", f"Startup phase: {label:<27} took {dur:8.1f} ms")
+
+    if _import_times:
+        slowest = sorted(_import_times.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        for name, dur in slowest:
+            log("DEBUG", f"Startup import: {name:<40} {dur:8.1f} ms (cumulative)")
@@ -1,8 +1,13 @@
 # base/status_checks.py
 import pyautogui
 
+from . import colors
 from . import common
-from .window_helpers import ensure_game_window, screen_point_from_offset, sleep_with_stop, get_game_window
+from . import frame_diff
+from . import geometry
+from . import templates
+from . import tracing
+from .window_helpers import ensure_game_window, sleep_with_stop, get_game_window
 
 
 def rgb_dist(a, b):
@@ -10,11 +15,12 @@ def rgb_dist(a, b):
     return ((a[0]-b[0])**2 + (a[1]-b[1])**2 + (a[2]-b[2])**2) ** 0.5
 
 
-def is_match_over(stop_event):
+@tracing.traced("probe")
+def is_match_over(stop_event, keep_alive: bool = True):
     """
     Returns True if the 'Next' button pixel is visible (end of match).
-    Also sends one click inside the game window each time we check,
-    so that 'opponent quit' / confirmation dialogs can be advanced.
+    With `keep_alive`, also sends one click inside the game window each time
+    we check, so that 'opponent quit' / confirmation dialogs can be advanced.
     """
     if not ensure_game_window(stop_event, timeout=5):
         common.log("DEBUG", "is_match_over: game window not available")
@@ -26,16 +32,29 @@ def is_match_over(stop_event):
         return False
 
     # keep-alive click first
-    try:
-        pyautogui.click(button="left")
-        common.log("ACTION", "is_match_over: sent keep-alive click inside game window.")
-    except Exception as e:
-        common.log("DEBUG", f"is_match_over: failed to send keep-alive click: {e}")
+    if keep_alive:
+        try:
+            pyautogui.click(button="left")
+            common.log("ACTION", "is_match_over: sent keep-alive click inside game window.")
+        except Exception as e:
+            common.log("DEBUG", f"is_match_over: failed to send keep-alive click: {e}")
 
     end_offset, end_color = common.get_end_button()
+    transform = geometry.transform_for(win)
+    at = transform.to_window(end_offset)
+
+    probe = f"is_match_over:{end_offset}:{end_color}"
+    cached = frame_diff.lookup(probe, win, frame_diff.point_rect(at))
+    if cached is not frame_diff.MISS:
+        common.log("DEBUG", f"is_match_over: end button region unchanged (match={cached}).")
+        return cached
 
-    x = win.left + end_offset[0]
-    y = win.top + end_offset[1]
+    verdict = templates.check("end_button", win, at)
+    if verdict is not None:
+        frame_diff.store(probe, win, verdict)
+        return verdict
+
+    x, y = transform.to_screen(end_offset)
 
     try:
         pixel = pyautogui.pixel(x, y)
@@ -43,18 +62,21 @@ def is_match_over(stop_event):
         common.log("DEBUG", f"is_match_over: failed to read pixel: {e}")
         return False
 
-    tol = 22
+    tol = colors.tolerance(common.get_end_spread(), "channel", 22)
     diffs = tuple(abs(pixel[i] - end_color[i]) for i in range(3))
     match = all(d <= tol for d in diffs)
 
     common.log(
         "DEBUG",
         f"is_match_over: pixel={pixel}, expected={end_color}, "
-        f"diff={diffs}, tol={tol}, match={match}"
+        f"diff={diffs}, tol={tol:.0f}, match={match}"
     )
 
+    frame_diff.store(probe, win, match)
+    templates.learn("end_button", win, at, match)
     return match
 
+@tracing.traced("probe")
 def is_still_searching(stop_event):
     """
     Returns:
@@ -73,12 +95,23 @@ def is_still_searching(stop_event):
         common.log("WARN", "Game window unavailable while checking search.")
         return False
 
-    pos = screen_point_from_offset(offset)
-    if pos is None:
+    win = get_game_window()
+    if not win:
         return True
+    transform = geometry.transform_for(win)
+    at = transform.to_window(offset)
+
+    probe = f"is_still_searching:{offset}:{color}"
+    cached = frame_diff.lookup(probe, win, frame_diff.point_rect(at))
+    if cached is not frame_diff.MISS:
+        common.log("DEBUG", f"Search pixel region unchanged (searching={cached}).")
+        return cached
 
-    x, y = pos
-    MAX_DIST = 80.0
+    # the pixel decides (button state); the template is cross-checked against it
+    template = templates.check("cancel_button", win, at)
+
+    x, y = transform.to_screen(offset)
+    max_dist = colors.tolerance(common.get_annul_spread(), "euclidean", 80.0)
 
     try:
         pixel = pyautogui.pixel(x, y)
@@ -90,16 +123,22 @@ def is_still_searching(stop_event):
 
     common.log(
         "DEBUG",
-        f"Search pixel check single: {pixel}, target={color}, dist={dist:.1f}"
+        f"Search pixel check single: {pixel}, target={color}, dist={dist:.1f}, tol={max_dist:.0f}"
     )
 
-    if dist <= MAX_DIST:
-        return True
+    pixel_found = dist <= max_dist
+    searching = pixel_found
+    if template is not None:
+        searching = templates.cross_check("cancel_button", win, template, pixel_found)
+    if not searching:
+        common.log("DEBUG", "Search DONE (instant check).")
 
-    common.log("DEBUG", "Search DONE (instant check).")
-    return False
+    frame_diff.store(probe, win, searching)
+    templates.learn("cancel_button", win, at, pixel_found)
+    return searching
 
 
+@tracing.traced("probe")
 def is_back_in_lobby(stop_event):
     """
     Returns True if the Ranked Match button looks like its idle lobby color again.
@@ -108,32 +147,59 @@ def is_back_in_lobby(stop_event):
     if stop_event.is_set():
         return False
 
-    if common.PLAY_BUTTON_OFFSET is None or common.PLAY_BUTTON_IDLE_COLOR is None:
+    play_offset = common.get_value("PLAY_BUTTON_OFFSET")
+    idle_color = common.get_value("PLAY_BUTTON_IDLE_COLOR")
+    if play_offset is None:
         return False
 
     if not ensure_game_window(stop_event, timeout=2):
         return False
 
-    pos = screen_point_from_offset(common.PLAY_BUTTON_OFFSET)
-    if pos is None:
+    win = get_game_window()
+    if not win:
         return False
+    transform = geometry.transform_for(win)
+    at = transform.to_window(play_offset)
 
-    x, y = pos
+    probe = f"is_back_in_lobby:{play_offset}:{idle_color}"
+    cached = frame_diff.lookup(probe, win, frame_diff.point_rect(at))
+    if cached is not frame_diff.MISS:
+        common.log("DEBUG", f"is_back_in_lobby: button region unchanged (lobby={cached}).")
+        return cached
+
+    # the idle color decides (a greyed / highlighted button has the same
+    # shape); the template is cross-checked against it
+    template = templates.check("ranked_button", win, at)
+
+    if idle_color is None:
+        if template is not None:
+            frame_diff.store(probe, win, template)
+        return bool(template)
+
+    x, y = transform.to_screen(play_offset)
     try:
         pixel = pyautogui.pixel(x, y)
     except Exception as e:
         common.log("DEBUG", f"is_back_in_lobby: pixel read failed: {e}")
         return False
 
-    dist = rgb_dist(pixel, common.PLAY_BUTTON_IDLE_COLOR)
+    dist = rgb_dist(pixel, idle_color)
+    max_dist = colors.tolerance(common.get_value("PLAY_BUTTON_IDLE_SPREAD"), "euclidean", 40.0)
     common.log(
         "DEBUG",
-        f"is_back_in_lobby: current={pixel}, idle={common.PLAY_BUTTON_IDLE_COLOR}, dist={dist:.1f}"
+        f"is_back_in_lobby: current={pixel}, idle={idle_color}, dist={dist:.1f}, tol={max_dist:.0f}"
     )
 
-    return dist < 40.0
+    pixel_found = dist < max_dist
+    in_lobby = pixel_found
+    if template is not None:
+        in_lobby = templates.cross_check("ranked_button", win, template, pixel_found)
+    frame_diff.store(probe, win, in_lobby)
+    templates.learn("ranked_button", win, at, pixel_found)
+    return in_lobby
 
 
+@tracing.traced("probe")
 def detect_search_failed_popup(stop_event):
     """
     Returns True if the big white 'Failed to connect' bar is visible.
@@ -148,13 +214,22 @@ def detect_search_failed_popup(stop_event):
     if not win:
         return False
 
-    band_y = win.top + int(win.height * 0.50)
+    transform = geometry.transform_for(win)
+    popup_center = transform.to_window((0.5, 0.5))
+    band_rect = (transform.inset[0], popup_center[1] - 4, transform.size[0], 9)
+    cached = frame_diff.lookup("detect_search_failed_popup", win, band_rect)
+    if cached is not frame_diff.MISS:
+        common.log("DEBUG", f"Failed-popup band unchanged (detected={cached}).")
+        return cached
+
+    verdict = templates.check("failed_popup", win, popup_center)
+    if verdict is not None:
+        frame_diff.store("detect_search_failed_popup", win, verdict)
+        return verdict
 
-    xs = [
-        win.left + win.width // 4,
-        win.left + win.width // 2,
-        win.left + (3 * win.width) // 4,
-    ]
+    samples = [transform.to_screen((u, 0.5)) for u in (0.25, 0.5, 0.75)]
+    band_y = samples[0][1]
+    xs = [x for x, _ in samples]
 
     bright_hits = 0
     max_brightness = 0.0
@@ -185,10 +260,14 @@ def detect_search_failed_popup(stop_event):
             f"Failed-popup detected: {bright_hits} bright gray samples "
             f"(max bright {max_brightness:.1f})."
         )
+        frame_diff.store("detect_search_failed_popup", win, True)
+        templates.learn("failed_popup", win, popup_center, True)
         return True
 
     common.log(
         "DEBUG",
         f"Failed-popup NOT detected (hits={bright_hits}, max bright {max_brightness:.1f})."
     )
+    frame_diff.store("detect_search_failed_popup", win, False)
+    templates.learn("failed_popup", win, popup_center, False)
     return False
@@ -0,0 +1,90 @@
+# base/supervisor.py
+
+import threading
+
+from . import common
+from . import instance
+from .instance import InstanceContext
+
+# ========== MULTI-INSTANCE SUPERVISOR ==========
+#
+# Runs one worker thread per game client, each bound to its own
+# InstanceContext. Workers take turns on mouse/keyboard through the focus
+# lock in base/instance.py; starts are staggered so the clients don't all
+# queue, find a match and finish it in lockstep.
+
+
+class Supervisor:
+
+    def __init__(self, entry, count: int, stagger: float | None = None,
+                 thread_prefix: str = "bot"):
+        self.entry = entry
+        self.count = int(count)
+        self.stagger = common.INSTANCE_STAGGER if stagger is None else float(stagger)
+        self.thread_prefix = thread_prefix
+        self.contexts: list[InstanceContext] = []
+        self.threads: list[threading.Thread] = []
+
+    def start(self) -> int:
+        """Pin windows and start the workers. Returns how many were started."""
+        from .window_helpers import find_game_windows
+
+        windows = find_game_windows()
+        if len(windows) < self.count:
+            common.log(
+                "WARN",
+                f"Supervisor: {self.count} instances requested but {len(windows)} "
+                "game window(s) found; the others will wait for their window."
+            )
+
+        for i in range(self.count):
+            ctx = InstanceContext(name=f"#{i + 1}", window_index=i)
+            if i < len(windows):
+                ctx.hwnd = windows[i]._hWnd
+                ctx.window = windows[i]
+            self.contexts.append(ctx)
+
+        for i, ctx in enumerate(self.contexts):
+            t = threading.Thread(
+                target=self._run_instance,
+                args=(ctx, i * self.stagger),
+                daemon=True,
+                name=f"{self.thread_prefix}_thread_{i + 1}",
+            )
+            self.threads.append(t)
+            t.start()
+
+        common.log(
+            "INFO",
+            f"Supervisor: {self.count} instance(s) started, {self.stagger:g}s apart."
+        )
+        return len(self.threads)
+
+    def _run_instance(self, ctx: InstanceContext, delay: float):
+        with instance.bound(ctx):
+            if delay > 0:
+                common.log("INFO", f"Starting in {delay:g}s (staggered).")
+                if ctx.stop_event.wait(delay):
+                    return
+            try:
+                self.entry(ctx.stop_event)
+            except Exception as e:
+                common.log("ERROR", f"Instance worker crashed: {e}")
+            finally:
+                s = ctx.stats
+                common.log(
+                    "INFO",
+                    f"Instance finished: {s['matches']} match(es), "
+                    f"{s['focus_wait']:.1f}s spent waiting for focus."
+                )
+
+    def stop(self):
+        for ctx in self.contexts:
+            ctx.stop_event.set()
+
+    def is_alive(self) -> bool:
+        return any(t.is_alive() for t in self.threads)
+
+    def join(self, timeout: float | None = None):
+        for t in self.threads:
+            t.join(timeout)
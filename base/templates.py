@@ -0,0 +1,498 @@
+# base/templates.py
+
+import os
+import threading
+import time
+from datetime import datetime
+
+from . import common
+from . import frame_diff
+
+try:  # optional: without NumPy every probe stays on its single-pixel check
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    np = None
+
+# ========== TEMPLATE MATCHING ==========
+#
+# Small grayscale reference crops of the UI elements the bot waits for,
+# matched with normalized cross-correlation (NCC) inside a region of
+# interest around where the element is expected:
+#
+#   1. grab the ROI (template box + TEMPLATE_SEARCH_MARGIN on every side;
+#      only that area is captured, not the whole window),
+#   2. build a 2x mean-pooled pyramid of ROI and template,
+#   3. full NCC map at the coarsest level (a few hundred positions),
+#   4. refine the best hit +-2 px at each finer level.
+#
+# NCC is invariant to brightness/contrast, and the search absorbs a shifted
+# UI, which is what made the single-pixel checks miss.
+#
+# There are no shipped reference images (they depend on resolution, input
+# mode and streaming client), so templates are captured from the live window
+# once the pixel check has confirmed the element TEMPLATE_CONFIRMATIONS times
+# with crops that agree (same shape by NCC, same brightness), so one bad
+# sighting can't become the reference. They are stored per client size in
+# ./templates; delete that folder to re-capture. A window size without its
+# own template borrows one captured at another size, rescaled.
+#
+# NCC ignores brightness and contrast, so it can't tell a greyed or
+# highlighted button from the idle one. Where that state matters (Ranked,
+# Cancel) the probe keeps its pixel/color check, which has the last word;
+# cross_check() counts the disagreements, and a template that disagrees with
+# the pixel check TEMPLATE_RELEARN_DISAGREEMENTS times in a row is dropped
+# and re-captured.
+
+# name -> (width, height) of the reference crop, centered on the probe point
+TEMPLATE_SIZES = {
+    "end_button": (56, 24),
+    "ranked_button": (72, 24),
+    "cancel_button": (56, 20),
+    "failed_popup": (160, 24),
+}
+
+_cache: dict = {}  # (name, frame size) -> grayscale float32 array, or None if missing
+_native: set = set()  # cache keys backed by a capture at exactly that size
+_pending: dict = {}  # cache key -> agreeing crops from positive sightings, not saved yet
+_disagreements: dict = {}  # cache key -> template / pixel check disagreements in a row
+_lock = threading.Lock()
+
+_MAX_MEAN_SHIFT = 16.0  # gray levels two sightings' crops may differ by on average
+
+
+def available() -> bool:
+    return np is not None and common.TEMPLATE_MATCHING
+
+
+def _templates_dir() -> str:
+    from .tools import get_user_dir  # avoid circular at top
+    return get_user_dir("templates")
+
+
+def _path(name: str, frame_size) -> str:
+    w, h = frame_size
+    return os.path.join(_templates_dir(), f"{name}_{w}x{h}.png")
+
+
+def _gray(img):
+    """PIL image -> float32 grayscale array."""
+    return np.asarray(img.convert("L"), dtype=np.float32)
+
+
+def _box(name: str, center):
+    w, h = TEMPLATE_SIZES[name]
+    cx, cy = center
+    return (int(cx - w // 2), int(cy - h // 2), w, h)
+
+
+# ---------- storage ----------
+
+def _saved_sizes(name: str) -> list[tuple[int, int]]:
+    """Frame sizes a template for `name` was captured at."""
+    sizes = []
+    folder = _templates_dir()
+    for fname in os.listdir(folder):
+        stem, ext = os.path.splitext(fname)
+        if ext != ".png" or not stem.startswith(name + "_"):
+            continue
+        try:
+            w, h = (int(v) for v in stem[len(name) + 1:].split("x"))
+        except ValueError:
+            continue
+        sizes.append((w, h))
+    return sizes
+
+
+def _load_scaled(name: str, frame_size):
+    """A template captured at the closest other frame size, resized to this one."""
+    fw, fh = frame_size
+    sizes = _saved_sizes(name)
+    if not sizes:
+        return None
+    sw, sh = min(sizes, key=lambda s: abs(s[0] - fw) + abs(s[1] - fh))
+    from PIL import Image
+    with Image.open(_path(name, (sw, sh))) as img:
+        tw = max(6, round(img.width * fw / sw))
+        th = max(6, round(img.height * fh / sh))
+        tmpl = _gray(img.resize((tw, th), resample=Image.BILINEAR))
+    common.log("DEBUG", f"Template '{name}': using the {sw}x{sh} capture rescaled to {fw}x{fh}.")
+    return tmpl
+
+
+def load(name: str, frame_size, exact: bool = False):
+    """
+    The reference crop for `name` at this frame size, or None. Unless
+    `exact`, fall back to a capture from another window size, rescaled.
+    """
+    key = (name, tuple(frame_size))
+    with _lock:
+        cached = key in _cache
+        tmpl = _cache.get(key)
+    if not cached:
+        path = _path(name, frame_size)
+        if os.path.exists(path):
+            from PIL import Image
+            with Image.open(path) as img:
+                tmpl = _gray(img)
+            with _lock:
+                _native.add(key)
+        else:
+            tmpl = _load_scaled(name, frame_size)
+        with _lock:
+            _cache[key] = tmpl
+    if exact and key not in _native:
+        return None
+    return tmpl
+
+
+def _crop(name: str, frame, center):
+    """(grayscale PIL crop, array) around `center`, or None if off-frame or too uniform."""
+    x, y, w, h = _box(name, center)
+    fw, fh = frame.size
+    if x < 0 or y < 0 or x + w > fw or y + h > fh:
+        common.log("WARN", f"Template '{name}' at {center} falls outside the window, not saved.")
+        return None
+
+    crop = frame.crop((x, y, x + w, y + h)).convert("L")
+    tmpl = _gray(crop)
+    if float(tmpl.std()) < 2.0:
+        # a flat crop matches any flat area equally well
+        common.log("DEBUG", f"Template '{name}' is too uniform to be useful, not saved.")
+        return None
+    return crop, tmpl
+
+
+def _agrees(a, b) -> bool:
+    """Same element in the same state: NCC above TEMPLATE_MIN_SCORE and similar brightness."""
+    if a.shape != b.shape or abs(float(a.mean()) - float(b.mean())) > _MAX_MEAN_SHIFT:
+        return False
+    score = _ncc_map(a, b)
+    return score is not None and float(score[0, 0]) >= common.TEMPLATE_MIN_SCORE
+
+
+def capture(name: str, frame, center) -> bool:
+    """Save the crop of `frame` around `center` as the reference for `name`."""
+    if not available():
+        return False
+    cropped = _crop(name, frame, center)
+    if cropped is None:
+        return False
+    crop, tmpl = cropped
+
+    path = _path(name, frame.size)
+    crop.save(path)
+    with _lock:
+        _cache[(name, tuple(frame.size))] = tmpl
+        _native.add((name, tuple(frame.size)))
+    common.log("INFO", f"Template '{name}' captured from the game window ({path}).")
+    return True
+
+
+def forget(name: str | None = None):
+    """Drop cached (and saved) templates, e.g. after recalibration."""
+    with _lock:
+        for key in [k for k in _cache if name is None or k[0] == name]:
+            del _cache[key]
+            _native.discard(key)
+        for table in (_pending, _disagreements):
+            for key in [k for k in table if name is None or k[0] == name]:
+                del table[key]
+    folder = _templates_dir()
+    for fname in os.listdir(folder):
+        if fname.endswith(".png") and (name is None or fname.startswith(name + "_")):
+            try:
+                os.remove(os.path.join(folder, fname))
+            except OSError:
+                pass
+
+
+# ---------- NCC ----------
+
+def _pool2(a):
+    h, w = a.shape[0] // 2 * 2, a.shape[1] // 2 * 2
+    a = a[:h, :w]
+    return (a[0::2, 0::2] + a[1::2, 0::2] + a[0::2, 1::2] + a[1::2, 1::2]) * 0.25
+
+
+def _ncc_map(image, tmpl):
+    """NCC score of `tmpl` at every position of `image` (valid positions only)."""
+    th, tw = tmpl.shape
+    t = tmpl - tmpl.mean()
+    t_norm = float(np.sqrt((t * t).sum()))
+    if t_norm < 1e-6:
+        return None
+    windows = sliding_window_view(image, (th, tw))
+    n = th * tw
+    # sum(t) == 0, so the window mean drops out of the numerator
+    num = np.einsum("ijkl,kl->ij", windows, t, optimize=True)
+    w_sum = windows.sum(axis=(2, 3))
+    w_sq = np.einsum("ijkl,ijkl->ij", windows, windows, optimize=True)
+    w_var = np.maximum(w_sq - w_sum * w_sum / n, 1e-6)
+    return num / (np.sqrt(w_var) * t_norm)
+
+
+def _peaks(scores, count: int, spacing: tuple[int, int]):
+    """Up to `count` best positions of `scores`, at least `spacing` (h, w) apart."""
+    if count <= 1:
+        return [np.unravel_index(int(np.argmax(scores)), scores.shape)]
+    flat = scores.ravel()
+    top = np.argsort(flat)[::-1][:count * 20]
+    peaks = []
+    for idx in top:
+        y, x = np.unravel_index(int(idx), scores.shape)
+        if all(abs(y - py) >= spacing[0] or abs(x - px) >= spacing[1] for py, px in peaks):
+            peaks.append((y, x))
+            if len(peaks) == count:
+                break
+    return peaks
+
+
+def ncc_search(roi, tmpl, levels: int | None = None, candidates: int = 1):
+    """
+    Best NCC match of `tmpl` inside `roi` (both float32 gray arrays).
+    Returns (score, (x, y)) with x, y the template's top-left in `roi`.
+    With `candidates` > 1 that many coarse peaks are refined, which a
+    whole-window search needs (the true hit isn't always the coarse best).
+    """
+    if levels is None:
+        levels = common.TEMPLATE_PYRAMID_LEVELS
+
+    rois, tmpls = [roi], [tmpl]
+    for _ in range(levels):
+        t = _pool2(tmpls[-1])
+        if min(t.shape) < 6:
+            break
+        rois.append(_pool2(rois[-1]))
+        tmpls.append(t)
+
+    scores = _ncc_map(rois[-1], tmpls[-1])
+    if scores is None or scores.size == 0:
+        return 0.0, (0, 0)
+
+    best = (-1.0, (0, 0))
+    for y, x in _peaks(scores, candidates, tmpls[-1].shape):
+        score, pos = _refine(rois, tmpls, int(x), int(y), float(scores[y, x]))
+        if score > best[0]:
+            best = (score, pos)
+    return best
+
+
+def _refine(rois, tmpls, x, y, best):
+    """Follow a coarse hit (x, y) down the pyramid, +-2 px per level."""
+    for level in range(len(rois) - 2, -1, -1):
+        r, t = rois[level], tmpls[level]
+        th, tw = t.shape
+        x0 = max(0, x * 2 - 2)
+        y0 = max(0, y * 2 - 2)
+        x1 = min(r.shape[1], x * 2 + 2 + tw + 1)
+        y1 = min(r.shape[0], y * 2 + 2 + th + 1)
+        local = _ncc_map(r[y0:y1, x0:x1], t)
+        if local is None or local.size == 0:
+            break
+        ly, lx = np.unravel_index(int(np.argmax(local)), local.shape)
+        best = float(local[ly, lx])
+        x, y = x0 + int(lx), y0 + int(ly)
+    return best, (int(x), int(y))
+
+
+# ---------- probes ----------
+
+def match(name: str, frame, center, margin: int | None = None):
+    """
+    Search the template `name` around `center` (window pixels) in `frame`
+    (a full frame, or a frame_diff.Region covering search_rect()).
+    Returns (score, (x, y) center of the best match) or None if there is no
+    template for this frame size (or NumPy is missing).
+    """
+    if not available():
+        return None
+    tmpl = load(name, frame.size)
+    if tmpl is None:
+        return None
+
+    th, tw = tmpl.shape  # a rescaled template isn't TEMPLATE_SIZES[name]
+    x, y, w, h = search_rect(tmpl, center, margin)
+    fw, fh = frame.size
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(fw, x + w), min(fh, y + h)
+    if x1 - x0 < tw or y1 - y0 < th:
+        return None
+
+    roi = _gray(frame.crop((x0, y0, x1, y1)))
+    score, (mx, my) = ncc_search(roi, tmpl)
+    return score, (x0 + mx + tw // 2, y0 + my + th // 2)
+
+
+def find(name: str, frame, levels: int | None = None, candidates: int = 8):
+    """
+    Search the template `name` over the whole `frame` (no expected position).
+    Returns (score, (x, y) center of the best match) or None without a template.
+    """
+    if not available():
+        return None
+    tmpl = load(name, frame.size)
+    if tmpl is None:
+        return None
+    th, tw = tmpl.shape
+    fw, fh = frame.size
+    if fw < tw or fh < th:
+        return None
+    score, (mx, my) = ncc_search(_gray(frame), tmpl, levels, candidates)
+    return score, (mx + tw // 2, my + th // 2)
+
+
+def detect(name: str, frame, center):
+    """
+    True/False if a template decided, None if the caller should use its
+    pixel fallback. Logs score, position and time at DEBUG level.
+    """
+    start = time.perf_counter()
+    result = match(name, frame, center)
+    if result is None:
+        return None
+    score, pos = result
+    found = score >= common.TEMPLATE_MIN_SCORE
+    common.log(
+        "DEBUG",
+        f"Template '{name}': score={score:.3f} at {pos} (expected {tuple(center)}), "
+        f"found={found}, {(time.perf_counter() - start) * 1000:.2f} ms"
+    )
+    return found
+
+
+def _current_frame(win):
+    """The whole window (RECORD_FRAMES samples only)."""
+    try:
+        frame_diff.tick(win)
+    except Exception as e:
+        common.log("DEBUG", f"Template capture failed: {e}")
+        return None
+    return frame_diff.latest_frame(win)
+
+
+def _grab(win, rect):
+    """Just `rect` of the window (frame_diff.Region, used like a frame by match / capture)."""
+    try:
+        return frame_diff.grab(win, rect)
+    except Exception as e:
+        common.log("DEBUG", f"Template capture failed: {e}")
+        return None
+
+
+def search_rect(tmpl, center, margin: int | None = None):
+    """(x, y, w, h) match() searches for `tmpl` around `center`."""
+    if margin is None:
+        margin = common.TEMPLATE_SEARCH_MARGIN
+    th, tw = tmpl.shape
+    bx, by = int(center[0] - tw // 2), int(center[1] - th // 2)
+    return bx - margin, by - margin, tw + 2 * margin, th + 2 * margin
+
+
+def check(name: str, win, center):
+    """
+    Template verdict for `name` around the window-relative point `center`:
+    True/False, or None when there is no template yet (use the pixel check).
+    Only the search area is captured, not the whole window.
+    """
+    if win is None or not available():
+        return None
+    tmpl = load(name, frame_diff.window_size(win))
+    if tmpl is None:
+        return None
+    region = _grab(win, search_rect(tmpl, center))
+    if region is None:
+        return None
+    return detect(name, region, center)
+
+
+def learn(name: str, win, center, positive: bool):
+    """
+    Feed back a pixel-check verdict: TEMPLATE_CONFIRMATIONS agreeing positive
+    sightings become the template, and with RECORD_FRAMES every verdict is
+    saved as a sample.
+    """
+    if win is None:
+        return
+    if common.RECORD_FRAMES:
+        record(name, _current_frame(win), center, positive)
+    if not positive or not available() or load(name, frame_diff.window_size(win), exact=True) is not None:
+        return
+    region = _grab(win, _box(name, center))
+    if region is not None:
+        _sighting(name, region, center)
+
+
+def _sighting(name: str, frame, center):
+    """One more positive sighting; capture once enough of them agree."""
+    cropped = _crop(name, frame, center)
+    if cropped is None:
+        return
+    key = (name, tuple(frame.size))
+    with _lock:
+        seen = _pending.setdefault(key, [])
+        if seen and not _agrees(seen[0], cropped[1]):
+            common.log("DEBUG", f"Template '{name}': sighting differs from the previous ones, starting over.")
+            seen.clear()
+        seen.append(cropped[1])
+        confirmed = len(seen) >= max(1, int(common.TEMPLATE_CONFIRMATIONS))
+        if confirmed:
+            del _pending[key]
+    if confirmed:
+        capture(name, frame, center)
+
+
+def cross_check(name: str, win, template_found: bool, pixel_found: bool) -> bool:
+    """
+    Verdict for an element checked both by its template (shape) and its
+    pixel/color (state): the pixel check's. A disagreement is only counted
+    (a suspect template must not turn 'still searching' into 'opponent
+    found'); after TEMPLATE_RELEARN_DISAGREEMENTS in a row the template for
+    this window size is dropped, to be captured again.
+    """
+    size = frame_diff.window_size(win)
+    key = (name, size)
+    if template_found == pixel_found:
+        _disagreements.pop(key, None)
+        return pixel_found
+
+    count = _disagreements[key] = _disagreements.get(key, 0) + 1
+    common.log(
+        "DEBUG",
+        f"Template '{name}' says found={template_found}, the pixel check {pixel_found} ({count} in a row)."
+    )
+    if count >= common.TEMPLATE_RELEARN_DISAGREEMENTS:
+        _reject(name, size)
+    return pixel_found
+
+
+def _reject(name: str, frame_size):
+    """Stop using the template for `name` at this size until it is captured again."""
+    key = (name, tuple(frame_size))
+    with _lock:
+        _cache[key] = None  # not even a rescaled borrow: learn() captures a native one
+        _native.discard(key)
+        _pending.pop(key, None)
+        _disagreements.pop(key, None)
+    try:
+        os.remove(_path(name, frame_size))
+    except OSError:
+        pass
+    common.log("INFO", f"Template '{name}' keeps disagreeing with the pixel check, capturing it again.")
+
+
+# ---------- frame recording (benchmark corpora) ----------
+
+def record(name: str, frame, center, positive: bool):
+    """With RECORD_FRAMES on, save `frame` as a labelled sample for benchmarks."""
+    if not common.RECORD_FRAMES or frame is None:
+        return
+    from .tools import get_user_dir
+    folder = get_user_dir(os.path.join("logs", "frames"))
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    label = "pos" if positive else "neg"
+    cx, cy = center
+    try:
+        frame.save(os.path.join(folder, f"{name}__{label}__{int(cx)}x{int(cy)}__{stamp}.png"))
+    except Exception as e:
+        common.log("DEBUG", f"Could not record frame for '{name}': {e}")
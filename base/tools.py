@@ -2,9 +2,10 @@
 import threading
 
 from . import common
-from .window_helpers import get_game_window, focus_game_window, screen_point_from_offset
-from .actions import click_play_button
-import pyautogui
+
+# NOTE: window_helpers / actions (and with them pyautogui, pygetwindow, win32gui)
+# are imported inside the test helpers below. common imports this module for
+# resource_path(), so keeping the top level light keeps app startup fast.
 
 def resource_path(relative):
     import sys, os
@@ -12,7 +13,27 @@ def resource_path(relative):
         return os.path.join(sys._MEIPASS, relative)
     return os.path.join(os.path.abspath("."), relative)
 
+def get_user_dir(name):
+    """
+    Writable folder `name` next to the exe when frozen, ./name otherwise.
+    Created on first use.
+    """
+    import sys, os
+    if getattr(sys, "frozen", False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.abspath(".")
+    path = os.path.join(base, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_logs_dir():
+    """Folder for trace / profile dumps (see get_user_dir)."""
+    return get_user_dir("logs")
+
 def gui_test_focus():
+    from .window_helpers import get_game_window, focus_game_window
+
     win = get_game_window()
     if win:
         focus_game_window()
@@ -22,6 +43,8 @@ def gui_test_focus():
 
 
 def gui_test_play_click():
+    from .actions import click_play_button
+
     if common.PLAY_BUTTON_OFFSET is None:
         common.log("WARN", "Play button offset not set. Run calibration first.")
         return
@@ -31,6 +54,9 @@ def gui_test_play_click():
 
 
 def gui_test_search_pixel():
+    from .window_helpers import screen_point_from_offset
+    pyautogui = common.get_pyautogui()
+
     if common.ANNUL_PIXEL_OFFSET is None:
         common.log("WARN", "Search pixel offset not set. Run calibration first.")
         return
@@ -43,6 +69,12 @@ def gui_test_search_pixel():
     except Exception as e:
         common.log("WARN", f"Search pixel test failed: {e}")
         return
-    diff = tuple(pixel[i] - common.ANNUL_PIXEL_COLOR[i] for i in range(3))
-    dist = sum(abs(d) for d in diff)
-    common.log("INFO", f"Search pixel test: current {pixel}, expected {common.ANNUL_PIXEL_COLOR}, |Δ| sum = {dist}.")
+    from .colors import tolerance
+    from .status_checks import rgb_dist
+    dist = rgb_dist(pixel, common.ANNUL_PIXEL_COLOR)
+    tol = tolerance(common.ANNUL_PIXEL_SPREAD, "euclidean", 80.0)
+    common.log(
+        "INFO",
+        f"Search pixel test: current {pixel}, expected {common.ANNUL_PIXEL_COLOR}, "
+        f"distance {dist:.1f} (searching if <= {tol:.0f})."
+    )
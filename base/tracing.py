@@ -0,0 +1,188 @@
+# base/tracing.py
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# ========== SPAN RING BUFFER ==========
+#
+# Every span is stored as a Chrome trace "complete" event (ph="X"), which
+# carries both the begin timestamp and the duration. A single record per span
+# means the ring can drop old entries without leaving unmatched begin/end
+# pairs behind, and the dump opens as-is in chrome://tracing or Perfetto.
+
+_enabled = True
+_events: deque = deque(maxlen=50_000)
+_t0 = time.perf_counter()
+_pid = os.getpid()
+_dump_on_exit_registered = False
+_span_listeners: list = []  # fn(name, cat) on every span start, even with tracing off
+
+
+def configure(enabled: bool | None = None, capacity: int | None = None, dump_on_exit: bool | None = None):
+    """
+    Apply tracing settings. Called once by common after settings load,
+    safe to call again later (e.g. from the Settings tab).
+    """
+    global _enabled, _events, _dump_on_exit_registered
+
+    if enabled is not None:
+        _enabled = bool(enabled)
+
+    if capacity is not None and capacity != _events.maxlen:
+        _events = deque(_events, maxlen=max(1000, int(capacity)))
+
+    if dump_on_exit and not _dump_on_exit_registered:
+        atexit.register(_dump_on_exit)
+        _dump_on_exit_registered = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _now_us() -> float:
+    return (time.perf_counter() - _t0) * 1_000_000.0
+
+
+def _record(name: str, cat: str, start_us: float, args: dict | None):
+    event = {
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "ts": round(start_us, 1),
+        "dur": round(_now_us() - start_us, 1),
+        "pid": _pid,
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    _events.append(event)
+
+
+@contextmanager
+def span(name: str, cat: str = "bot", **args):
+    """
+    Record a begin/end span around a block:
+
+        with tracing.span("queue", cat="state"):
+            click_play_button(stop_event)
+    """
+    for listener in _span_listeners:
+        listener(name, cat)
+
+    if not _enabled:
+        yield
+        return
+
+    start = _now_us()
+    try:
+        yield
+    finally:
+        _record(name, cat, start, args)
+
+
+def traced(cat: str, name: str | None = None):
+    """Decorator version of span(); the span name defaults to the function name."""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*a, **kw):
+            if not _enabled:
+                return fn(*a, **kw)
+            start = _now_us()
+            try:
+                return fn(*a, **kw)
+            finally:
+                _record(label, cat, start, None)
+
+        return wrapper
+    return decorator
+
+
+def add_span_listener(fn):
+    """fn(name, cat) is called on the entering thread each time a span() starts."""
+    global _span_listeners
+    _span_listeners = _span_listeners + [fn]
+
+
+def remove_span_listener(fn):
+    global _span_listeners
+    _span_listeners = [f for f in _span_listeners if f is not fn]
+
+
+def instant(name: str, cat: str = "bot", **args):
+    """Zero-length marker (e.g. 'stop requested')."""
+    if not _enabled:
+        return
+    event = {
+        "name": name,
+        "cat": cat,
+        "ph": "i",
+        "s": "t",
+        "ts": round(_now_us(), 1),
+        "pid": _pid,
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    _events.append(event)
+
+
+def clear():
+    _events.clear()
+
+
+# ========== EXPORT ==========
+
+def _thread_name_events() -> list[dict]:
+    return [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": _pid,
+            "tid": t.ident,
+            "args": {"name": t.name},
+        }
+        for t in threading.enumerate()
+        if t.ident is not None
+    ]
+
+
+def dump_chrome_trace(path: str | None = None) -> str:
+    """
+    Write the current ring contents as Chrome trace JSON.
+    Defaults to logs/trace_YYYYmmdd_HHMMSS.json. Returns the path written.
+    """
+    if path is None:
+        from .tools import get_logs_dir  # avoid circular at top
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(get_logs_dir(), f"trace_{stamp}.json")
+
+    events = list(_events)
+    payload = {
+        "traceEvents": _thread_name_events() + events,
+        "displayTimeUnit": "ms",
+    }
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+
+    return path
+
+
+def _dump_on_exit():
+    if not _events:
+        return
+    try:
+        path = dump_chrome_trace()
+        print(f"Trace written to: {path}")
+    except Exception as e:
+        print(f"Failed to write trace on exit: {e}")
@@ -0,0 +1,341 @@
+# base/tuner.py
+
+import json
+import math
+import os
+import platform
+import queue
+import threading
+import time
+from datetime import datetime
+
+from . import common
+from . import config
+from . import stages
+
+# ========== DELAY TUNER ==========
+#
+#   python -m base.cli blue --tune [--steps BLUE_A1_DELAY,BLUE_S1_DELAY]
+#
+# Runs the mode normally and, between cycles, shrinks one delay at a time by
+# bisection between TUNER_MIN_DELAY and its current (known good) value:
+#
+#   - each candidate is published for this session only (common.apply_settings)
+#     and picked up by the worker at its next cycle (config.refresh),
+#   - TUNER_TRIALS cycles run with it; a cycle counts as a success when
+#     every checked step showed up on screen (stages.report_cycle: the
+#     trainers' closed loop, lobby/end screen for Ranked; a re-queue before
+#     the match isn't a cycle),
+#   - candidates reaching TUNER_SUCCESS_RATE become the new upper bound,
+#     the others the lower bound, until the range is under TUNER_RESOLUTION.
+#     After a failed candidate, cycles run at the good value until one
+#     succeeds (the trainers resynchronize on screen), so the next candidate
+#     starts in step.
+#
+# A step whose stage is blind or not learned sleeps its delay without
+# checking anything, so a trainer delay is only tuned if a stage at or after
+# it in the cycle is confirmed on screen (STAGES); the others are skipped.
+#
+# The smallest good delay plus TUNER_MARGIN is kept, and the next delay is
+# tuned on top of it. After a final check at the tuned values, they're
+# saved to settings.json and, as this machine's timing profile, to
+# profiles/timing.json. Stopping early keeps the delays finished so far.
+#
+# Whenever a mode starts (CLI, GUI, isolated child), the profile matching
+# this machine, mode and input mode is applied for the session
+# (apply_profile), the way profiles.py loads the calibration of a setup:
+# a settings.json shared between PCs or input modes keeps each one's delays.
+
+# mode -> tunable delays, in sequence order
+TUNABLE = {
+    "ranked": ("FIRST_WAIT", "NAV_SETTLE"),
+    "blue": (
+        "BLUE_ENTER1_DELAY", "BLUE_ENTER2_DELAY", "BLUE_UP_DELAY", "BLUE_ENTER3_DELAY",
+        "BLUE_ENTER4_DELAY", "BLUE_A1_DELAY", "BLUE_S1_DELAY", "BLUE_A2_DELAY",
+        "BLUE_S2_DELAY", "BLUE_A3_DELAY", "BLUE_S3_DELAY", "BLUE_A4_DELAY",
+        "BLUE_ENTER5_DELAY", "BLUE_COOLDOWN_DELAY",
+    ),
+    "pink": (
+        "PINK_ENTER1_DELAY", "PINK_ENTER2_DELAY", "PINK_UP_DELAY", "PINK_ENTER3_DELAY",
+        "PINK_ENTER4_DELAY", "PINK_ESC_AFTER_DELAY", "PINK_V_AFTER_DELAY",
+        "PINK_V_HOLD_DURATION", "PINK_AFTER_HOLD_DELAY", "PINK_DOWN_DELAY",
+        "PINK_FINAL_ENTER_DELAY",
+    ),
+    "ramen": (
+        "RAMEN_FIRST_ENTER_DELAY", "RAMEN_AFTER_FIRST_WAIT", "RAMEN_W_DELAY",
+        "RAMEN_LONG_WAIT_MAX", "RAMEN_FINAL_ENTER_DELAY", "RAMEN_AFTER_FINAL_WAIT",
+    ),
+}
+
+# trainer modes: (stages.Stage trainer label, {delay: stage its step waits for})
+STAGES = {
+    "blue": ("Blue Beans", {
+        "BLUE_ENTER1_DELAY": "menu_open", "BLUE_ENTER4_DELAY": "training_started",
+        "BLUE_A4_DELAY": "result_shown", "BLUE_COOLDOWN_DELAY": "training_ready",
+    }),
+    "pink": ("Pink Beans", {
+        "PINK_ENTER1_DELAY": "menu_open", "PINK_ENTER4_DELAY": "training_started",
+        "PINK_V_AFTER_DELAY": "v_pressed", "PINK_V_HOLD_DURATION": "hold_done",
+        "PINK_AFTER_HOLD_DELAY": "hold_result", "PINK_FINAL_ENTER_DELAY": "cycle_done",
+    }),
+    "ramen": ("Ramen", {
+        "RAMEN_FIRST_ENTER_DELAY": "dialog", "RAMEN_AFTER_FIRST_WAIT": "after_dialog",
+        "RAMEN_LONG_WAIT_MAX": "eating_done",
+    }),
+}
+
+# modes that only tell a good cycle from a bad one (and use their shortened
+# delays as intended) in closed loop
+CLOSED_LOOP = {
+    "ranked": "NAV_CLOSED_LOOP",
+    "blue": "BLUE_CLOSED_LOOP",
+    "pink": "PINK_CLOSED_LOOP",
+    "ramen": "RAMEN_CLOSED_LOOP",
+}
+
+
+class TuningAborted(Exception):
+    pass
+
+
+# ---------- timing profiles ----------
+
+def _profile_path() -> str:
+    from .tools import get_user_dir  # avoid circular at top
+    return os.path.join(get_user_dir("profiles"), "timing.json")
+
+
+def profile_key(mode: str) -> str:
+    from .profiles import input_mode
+    return f"{platform.node()}@{mode}@{input_mode()}"
+
+
+def load_profiles() -> dict:
+    """{profile key: {"values": {setting: delay}, ...}} ({} if missing or unreadable)."""
+    path = _profile_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("profiles", {})
+    except (OSError, ValueError) as e:
+        common.log("WARN", f"Could not read timing profiles ({path}): {e}")
+        return {}
+
+
+def save_profile(mode: str, values: dict, before: float | None, after: float | None):
+    profiles = load_profiles()
+    key = profile_key(mode)
+    entry = profiles.get(key, {})
+    entry.setdefault("values", {}).update(values)
+    entry["updated"] = datetime.now().isoformat(timespec="seconds")
+    entry["cycles_per_hour_before"] = before
+    entry["cycles_per_hour_after"] = after
+    profiles[key] = entry
+
+    path = _profile_path()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "profiles": profiles}, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return key
+
+
+def apply_profile(mode: str) -> bool:
+    """Publish this setup's tuned delays for `mode` for the session. False if it has none."""
+    key = profile_key(mode)
+    entry = load_profiles().get(key) or {}
+    values = {name: value for name, value in entry.get("values", {}).items() if name in config.FIELDS}
+    if not values:
+        return False
+    common.apply_settings(values)
+    common.log("INFO", f"Timing profile '{key}' loaded ({len(values)} delays, {entry.get('updated', 'unknown date')}).")
+    return True
+
+
+def _per_hour(durations) -> float | None:
+    if not durations:
+        return None
+    return 3600.0 / (sum(durations) / len(durations))
+
+
+# ---------- tuner ----------
+
+class Tuner:
+
+    def __init__(self, mode: str, entry, stop_event: threading.Event, names=None):
+        self.mode = mode
+        self.entry = entry
+        self.stop_event = stop_event
+        self.names = tuple(names or TUNABLE.get(mode, ()))
+        self.results: queue.Queue = queue.Queue()
+        self.forced = {}
+        if mode in CLOSED_LOOP:
+            # keep the stages learned on the original delays while shrinking them
+            self.forced = {CLOSED_LOOP[mode]: True, "STAGE_RELEARN_MISSES": 1_000_000}
+        self.tuned = {}           # setting -> tuned delay
+        self.original = None
+        self.worker = None
+
+    # ---- plumbing ----
+
+    def _on_cycle(self, item):
+        self.results.put(item)
+
+    def _apply(self, extra: dict | None = None) -> int:
+        values = dict(self.forced)
+        values.update(self.tuned)
+        values.update(extra or {})
+        if "RAMEN_LONG_WAIT_MAX" in values:
+            values["RAMEN_LONG_WAIT_MIN"] = min(self.original.RAMEN_LONG_WAIT_MIN, values["RAMEN_LONG_WAIT_MAX"])
+        return common.apply_settings(values)
+
+    def _next_result(self, version: int) -> dict:
+        """The next finished cycle that ran with settings `version` or newer."""
+        deadline = time.monotonic() + common.TUNER_CYCLE_TIMEOUT
+        while True:
+            if self.stop_event.is_set():
+                raise TuningAborted("stop requested")
+            if not self.worker.is_alive():
+                raise TuningAborted("the worker stopped")
+            if time.monotonic() > deadline:
+                raise TuningAborted(f"no cycle finished in {common.TUNER_CYCLE_TIMEOUT:.0f}s")
+            try:
+                item = self.results.get(timeout=0.25)
+            except queue.Empty:
+                continue
+            if item["version"] >= version:
+                return item
+
+    def _run_cycles(self, version: int, count: int):
+        """(successes, durations of the successful cycles), stopping once the rate can't be met."""
+        need = math.ceil(common.TUNER_SUCCESS_RATE * count)
+        ok, durations = 0, []
+        for done in range(1, count + 1):
+            result = self._next_result(version)
+            if result["ok"]:
+                ok += 1
+                durations.append(result["duration"])
+            if ok + (count - done) < need:
+                break
+        return ok >= need, durations
+
+    def _back_in_step(self, name: str, good: float):
+        """After a failed candidate: cycles at the good value until one succeeds."""
+        version = self._apply({name: good})
+        for _ in range(max(1, int(common.TUNER_TRIALS))):
+            if self._next_result(version)["ok"]:
+                return
+        raise TuningAborted(f"no good cycle at {name} = {good:.2f}s after a failed candidate")
+
+    # ---- bisection ----
+
+    def _checked(self, name: str) -> bool:
+        """Would a too short `name` fail a cycle? A stage at or after it has to be confirmed on screen."""
+        if self.mode not in STAGES:
+            return True
+        trainer, stage_of = STAGES[self.mode]
+        sequence = TUNABLE[self.mode]
+        later = sequence[sequence.index(name):]
+        return any(stages.checks(trainer, stage_of[d]) for d in later if d in stage_of)
+
+    def _tune(self, name: str):
+        if not self._checked(name):
+            common.log(
+                "WARN",
+                f"Tuner: skipping {name}, no step after it is checked on screen "
+                "(stages blind or not learned), a too short value would go unnoticed."
+            )
+            return
+        good = float(getattr(self.original, name))
+        low = float(common.TUNER_MIN_DELAY)
+        trials = max(1, int(common.TUNER_TRIALS))
+        common.log("STATE", f"Tuner: {name} (now {good:.2f}s), bisecting down to {low:.2f}s.")
+
+        while good - low > common.TUNER_RESOLUTION and not self.stop_event.is_set():
+            candidate = round((low + good) / 2.0, 3)
+            passed, _ = self._run_cycles(self._apply({name: candidate}), trials)
+            common.log("INFO", f"Tuner: {name} = {candidate:.2f}s {'passed' if passed else 'failed'}.")
+            if passed:
+                good = candidate
+            else:
+                low = candidate
+                self._back_in_step(name, good)
+
+        value = min(float(getattr(self.original, name)), round(good * (1.0 + common.TUNER_MARGIN), 2))
+        self.tuned[name] = value
+        common.log(
+            "STATE",
+            f"Tuner: {name} {getattr(self.original, name):.2f}s -> {value:.2f}s "
+            f"(smallest good {good:.2f}s + {common.TUNER_MARGIN:.0%})."
+        )
+
+    # ---- run ----
+
+    def _save(self, before, after):
+        common.save_settings_to_file(self.tuned)
+        try:
+            key = save_profile(self.mode, self.tuned, before, after)
+            common.log("INFO", f"Tuner: timing profile '{key}' saved.")
+        except OSError as e:
+            common.log("WARN", f"Tuner: could not save the timing profile: {e}")
+
+    def run(self) -> int:
+        if not self.names:
+            common.log("ERROR", f"Tuner: nothing to tune for mode '{self.mode}'.")
+            return 1
+        unknown = [name for name in self.names if name not in TUNABLE.get(self.mode, ())]
+        if unknown:
+            common.log(
+                "ERROR",
+                f"Tuner: {', '.join(unknown)} can't be tuned in '{self.mode}' "
+                f"(choose from {', '.join(TUNABLE.get(self.mode, ()))})."
+            )
+            return 1
+        if self.mode in CLOSED_LOOP and not stages.available():
+            common.log("ERROR", "Tuner: checking cycles on screen needs NumPy.")
+            return 1
+
+        self.original = config.current()
+        session = common.session_settings()
+        common.cycle_channel.add_sink(self._on_cycle)
+        self.worker = threading.Thread(target=self.entry, args=(self.stop_event,), daemon=True, name=f"{self.mode}_tuner")
+        common.log("STATE", f"Tuner: tuning {', '.join(self.names)} for '{self.mode}'.")
+
+        before = after = None
+        aborted = None
+        try:
+            version = self._apply()
+            self.worker.start()
+
+            # warm-up: the trainers learn their stages on the current delays
+            warmup = 1 + (int(common.STAGE_LEARN_CYCLES) if self.mode in CLOSED_LOOP else 0)
+            durations = [r["duration"] for r in (self._next_result(version) for _ in range(warmup)) if r["ok"]]
+            before = _per_hour(durations)
+
+            for name in self.names:
+                self._tune(name)
+
+            passed, durations = self._run_cycles(self._apply(), max(1, int(common.TUNER_TRIALS)))
+            after = _per_hour(durations)
+            if not passed:
+                common.log("WARN", "Tuner: the tuned delays failed their final check, nothing saved.")
+                self.tuned = {}
+        except TuningAborted as e:
+            aborted = str(e)
+        finally:
+            common.cycle_channel.remove_sink(self._on_cycle)
+            self.stop_event.set()
+            if self.worker.is_alive():
+                self.worker.join(10.0)
+            common.restore_session_settings(session)
+
+        if aborted:
+            common.log("WARN", f"Tuner: stopped early ({aborted}).")
+        if self.tuned:
+            self._save(before, after)
+            if before and after:
+                common.log("STATE", f"Tuner: {before:.1f} -> {after:.1f} cycles/hour.")
+        else:
+            common.log("INFO", "Tuner: no delay changed.")
+        return 0 if not aborted else 1
@@ -0,0 +1,232 @@
+# base/watchdog.py
+
+import threading
+import time
+from collections import Counter
+
+from . import common
+from . import frame_diff
+from . import tracing
+
+# ========== WATCHDOG ==========
+#
+# Watches one worker thread for two kinds of progress:
+#   - state transitions: every tracing.span() of a bot state or trainer step
+#     started on the worker thread (cat in PROGRESS_CATS),
+#   - frame changes: any cell of the window's frame_diff grid changing, from
+#     our own capture every WATCHDOG_CHECK_INTERVAL seconds or a probe's.
+#
+# When neither moved for WATCHDOG_STALL_SECONDS, or a state outlives its
+# entry in WATCHDOG_STATE_LIMITS, a recovery playbook is run from the
+# watchdog thread. Playbooks escalate while the stall lasts
+# (esc_chain -> lobby_return -> window_restore, then round again); a missing/minimized window
+# goes straight to window_restore. Every recovery is counted, and the time
+# between the last progress and the next one is added to `lost_seconds`.
+
+PROGRESS_CATS = {"state", "ramen", "blue", "pink"}
+
+ESCALATION = ("esc_chain", "lobby_return", "window_restore")
+
+
+# ---------- playbooks ----------
+
+def esc_chain(stop_event, presses: int = 3, delay: float = 0.8):
+    """Back out of menus / popups."""
+    from .window_helpers import ensure_game_window, sleep_with_stop
+
+    if not ensure_game_window(stop_event, timeout=10):
+        return
+    backend = common.get_input_backend()
+    for _ in range(presses):
+        if stop_event.is_set():
+            return
+        backend.press_key("esc")
+        sleep_with_stop(delay, stop_event)
+
+
+def lobby_return(stop_event, clicks: int = 5, interval: float = 1.0):
+    """Advance result screens / dialogs (like post-match clicks), then back out."""
+    from .window_helpers import ensure_game_window, screen_point_from_offset, sleep_with_stop
+
+    if not ensure_game_window(stop_event, timeout=10):
+        return
+
+    offset = common.get_value("PLAY_BUTTON_OFFSET")
+    pos = screen_point_from_offset(offset) if offset is not None else None
+    backend = common.get_input_backend()
+    for _ in range(clicks):
+        if stop_event.is_set():
+            return
+        if pos is not None:
+            backend.click_at(pos[0], pos[1], button="left")
+        else:
+            backend.press_key("enter")
+        sleep_with_stop(interval, stop_event)
+
+    esc_chain(stop_event)
+
+
+def window_restore(stop_event):
+    """Restore a minimized / unfocused game window."""
+    from .window_helpers import ensure_game_window
+
+    ensure_game_window(stop_event, timeout=30)
+
+
+PLAYBOOKS = {
+    "esc_chain": esc_chain,
+    "lobby_return": lobby_return,
+    "window_restore": window_restore,
+}
+
+
+# ---------- watchdog thread ----------
+
+class Watchdog(threading.Thread):
+
+    def __init__(self, worker: threading.Thread, stop_event, label: str | None = None):
+        super().__init__(name=f"watchdog-{label or worker.name}", daemon=True)
+        self.worker = worker
+        self.stop_event = stop_event
+        self.stall_seconds = float(common.WATCHDOG_STALL_SECONDS)
+        self.interval = float(common.WATCHDOG_CHECK_INTERVAL)
+        self.state_limits = dict(common.WATCHDOG_STATE_LIMITS or {})
+
+        now = time.monotonic()
+        self.state = "start"
+        self.state_since = now
+        self.last_progress = now
+        self.last_frame_change = now
+        self._frame_version = None
+
+        self.recoveries = Counter()
+        self.lost_seconds = 0.0
+        self._stall_started = None  # last progress before the current stall
+        self._escalation = 0
+        self._next_recovery = 0.0
+
+    # ---------- progress ----------
+
+    def _on_span(self, name, cat):
+        if cat not in PROGRESS_CATS or threading.get_ident() != self.worker.ident:
+            return
+        now = time.monotonic()
+        if name != self.state:
+            self.state = name
+            self.state_since = now
+        self._progress(now)
+
+    def _progress(self, now):
+        if self._stall_started is not None:
+            lost = now - self._stall_started
+            self.lost_seconds += lost
+            common.log("INFO", f"Watchdog: progress again after {lost:.0f}s ({self.state}).")
+            self._stall_started = None
+            self._escalation = 0
+        self.last_progress = now
+
+    def _sample_frame(self, now) -> bool:
+        """Returns False if the game window isn't visible."""
+        from .window_helpers import get_game_window
+
+        win = get_game_window()
+        if win is None or getattr(win, "isMinimized", False) or win.width <= 0 or win.height <= 0:
+            self._frame_version = None
+            return False
+
+        try:
+            frame_diff.tick(win)
+        except Exception as e:
+            common.log("DEBUG", f"Watchdog: frame sample failed: {e}")
+            return True  # don't blame the window for a capture error
+
+        # versions only move when a cell changed, whoever captured the frame
+        version = sum(frame_diff.tracker_for(win).versions)
+        if version != self._frame_version:
+            self.last_frame_change = now
+        self._frame_version = version
+        return True
+
+    # ---------- stall handling ----------
+
+    def _stall_reason(self, now, window_ok: bool) -> str | None:
+        idle = now - self.last_progress
+        if not window_ok and idle > self.stall_seconds:
+            return "game window missing or minimized"
+
+        limit = self.state_limits.get(self.state)
+        if limit is not None and now - self.state_since > limit:
+            return f"state '{self.state}' exceeded {limit:g}s"
+
+        frozen = now - self.last_frame_change
+        if idle > self.stall_seconds and frozen > self.stall_seconds:
+            return f"no state change for {idle:.0f}s and no frame change for {frozen:.0f}s"
+        return None
+
+    def _recover(self, now, reason: str, window_ok: bool):
+        if self._stall_started is None:
+            self._stall_started = self.last_progress
+
+        if not window_ok:
+            playbook = "window_restore"
+        else:
+            playbook = ESCALATION[self._escalation % len(ESCALATION)]
+            self._escalation += 1
+
+        self.recoveries[playbook] += 1
+        common.log("WARN", f"Watchdog: stall in '{self.state}' ({reason}). Running recovery: {playbook}.")
+        tracing.instant("recovery", cat="watchdog", playbook=playbook, state=self.state)
+
+        try:
+            PLAYBOOKS[playbook](self.stop_event)
+        except Exception as e:
+            common.log("ERROR", f"Watchdog: recovery '{playbook}' failed: {e}")
+
+        # give the worker time to notice before escalating
+        self._next_recovery = time.monotonic() + common.WATCHDOG_RECOVERY_COOLDOWN
+        # a hard state limit restarts its clock, otherwise it would fire every tick
+        self.state_since = time.monotonic()
+
+    # ---------- thread ----------
+
+    def run(self):
+        tracing.add_span_listener(self._on_span)
+        try:
+            while not self.stop_event.is_set() and self.worker.is_alive():
+                if self.stop_event.wait(self.interval):
+                    break
+                now = time.monotonic()
+                window_ok = self._sample_frame(now)
+
+                if now < self._next_recovery:
+                    continue
+                reason = self._stall_reason(now, window_ok)
+                if reason is not None and not self.stop_event.is_set():
+                    self._recover(now, reason, window_ok)
+        finally:
+            tracing.remove_span_listener(self._on_span)
+            if self._stall_started is not None:
+                self.lost_seconds += time.monotonic() - self._stall_started
+            if self.recoveries:
+                common.log("INFO", f"Watchdog: {self.summary_text()}")
+
+    def summary(self) -> dict:
+        return {
+            "recoveries": dict(self.recoveries),
+            "recovery_count": sum(self.recoveries.values()),
+            "lost_seconds": round(self.lost_seconds, 1),
+        }
+
+    def summary_text(self) -> str:
+        parts = ", ".join(f"{name} x{n}" for name, n in self.recoveries.most_common())
+        total = sum(self.recoveries.values())
+        return f"{total} recoveries ({parts}), {self.lost_seconds / 60.0:.1f} min lost to stalls."
+
+
+def watch(worker: threading.Thread, stop_event, label: str | None = None) -> Watchdog | None:
+    """Start a watchdog for `worker` if WATCHDOG_ENABLED. Returns it (or None)."""
+    if not common.WATCHDOG_ENABLED:
+        return None
+    dog = Watchdog(worker, stop_event, label=label)
+    dog.start()
+    return dog
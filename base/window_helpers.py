@@ -5,10 +5,20 @@ import time
 import pyautogui
 import pygetwindow as gw
 
+from . import colors
 from . import common
+from . import geometry
+from . import instance
+from . import profiles
+from . import tracing
+from . import window_watcher
 import win32gui
 from ctypes import windll, wintypes, byref
 
+# common imports pyautogui lazily; make sure FAILSAFE / PAUSE are applied
+# before any worker code calls into it.
+common.get_pyautogui()
+
 def get_client_size(hwnd):
     """
     Ritorna (client_width, client_height) dell’area interna della finestra.
@@ -20,7 +30,44 @@ def get_client_size(hwnd):
     height = rect.bottom - rect.top
     return width, height
 
+def find_game_windows():
+    """All windows matching GAME_WINDOW_TITLE, in a stable order (by handle)."""
+    wins = [w for w in gw.getAllWindows() if common.GAME_WINDOW_TITLE.lower() in w.title.lower()]
+    return sorted(wins, key=lambda w: w._hWnd)
+
+
+def _instance_window(ctx):
+    """The window pinned to `ctx`, re-resolved (by window_index) if its handle died."""
+    if ctx.window is not None and ctx.hwnd and win32gui.IsWindow(ctx.hwnd):
+        return ctx.window
+
+    if ctx.hwnd:
+        common.log("WARN", "Game window handle went stale, looking for it again...")
+    ctx.hwnd = None
+    ctx.window = None
+
+    taken = instance.claimed_hwnds(exclude=ctx)
+    free = [w for w in find_game_windows() if w._hWnd not in taken]
+    if not free:
+        return None
+    win = free[min(ctx.window_index, len(free) - 1)]
+    ctx.hwnd = win._hWnd
+    ctx.window = win
+    return win
+
+
 def get_game_window():
+    # Multi-instance: each bound context owns one specific window.
+    ctx = instance.current()
+    if ctx is not None:
+        return _instance_window(ctx)
+
+    # If the window watcher is running (GUI / CLI start it), reuse its cached
+    # handle instead of enumerating every top-level window again.
+    watcher = window_watcher.running_watcher()
+    if watcher is not None:
+        return watcher.window()
+
     for w in gw.getAllWindows():
         if common.GAME_WINDOW_TITLE.lower() in w.title.lower():
             return w
@@ -36,11 +83,10 @@ def focus_game_window():
         except Exception as e:
             common.log("WARN", f"Could not activate game window: {e}")
     else:
-        common.log("WARN", "Game window not found. Check GAME_WINDOW_TITLE in settings.py.")
+        common.log("WARN", "Game window not found. Check GAME_WINDOW_TITLE in the settings.")
 
 
-def sleep_with_stop(seconds, stop_event, step=0.25):
-    """Sleep in small chunks so we can react to 'Stop' quickly."""
+def _wait(seconds, stop_event, step=0.25):
     end = time.time() + seconds
     while time.time() < end:
         if stop_event.is_set():
@@ -48,6 +94,17 @@ def sleep_with_stop(seconds, stop_event, step=0.25):
         time.sleep(step)
 
 
+def sleep_with_stop(seconds, stop_event, step=0.25):
+    """Sleep in small chunks so we can react to 'Stop' quickly."""
+    # multi-instance: another client may use mouse/keyboard while we wait,
+    # then we take the focus back before returning to the caller
+    released = instance.release_focus()
+    _wait(seconds, stop_event, step)
+    if released and not stop_event.is_set():
+        ensure_game_window(stop_event)
+
+
+@tracing.traced("window")
 def ensure_game_window(stop_event, timeout=None, check_interval=2.0):
     """
     Wait until the game window exists and is focused, then move mouse inside it.
@@ -63,6 +120,8 @@ def ensure_game_window(stop_event, timeout=None, check_interval=2.0):
     while not stop_event.is_set():
         win = get_game_window()
         if win:
+            if not instance.acquire_focus(stop_event):
+                return False
             try:
                 if hasattr(win, "isMinimized") and win.isMinimized:
                     win.restore()
@@ -79,7 +138,8 @@ def ensure_game_window(stop_event, timeout=None, check_interval=2.0):
                 return True
             except Exception as e:
                 common.log("WARN", f"ensure_game_window: failed to activate window: {e}")
-                sleep_with_stop(check_interval, stop_event)
+                instance.release_focus()
+                _wait(check_interval, stop_event)
                 continue
 
         if not start_logged:
@@ -92,27 +152,47 @@ def ensure_game_window(stop_event, timeout=None, check_interval=2.0):
             common.log("ERROR", "Timed out waiting for the game window.")
             return False
 
-        sleep_with_stop(check_interval, stop_event)
+        _wait(check_interval, stop_event)
 
     return False
 
 
 def screen_point_from_offset(offset):
-    """Convert a window-relative offset (dx, dy) into absolute screen coordinates."""
+    """Convert a probe point (normalized client coords, see geometry.py) into absolute screen coordinates."""
     win = get_game_window()
     if not win:
         common.log("WARN", "Game window not found when converting offset to screen coords.")
         return None
-    dx, dy = offset
-    return (win.left + dx, win.top + dy)
+    return geometry.to_screen(offset, win)
+
+
+def _calibrated(key: str):
+    """Calibration setting `key` in the current input mode (the _CHIAKI variant with CHIAKI4DECK)."""
+    return common.get_value(common.mode_setting(key))
+
+
+def _set_calibrated(key: str, value):
+    common.set_value(common.mode_setting(key), value)
 
 
 def capture_offsets_if_needed(stop_event):
     """
-    Calibrate PLAY_BUTTON_OFFSET and ANNUL_PIXEL_OFFSET/COLOR if they are None.
-    Persists to settings.py via common.save_settings_to_file.
+    Load the calibration profile of this setup (profiles.py), then calibrate
+    PLAY_BUTTON_OFFSET and ANNUL_PIXEL_OFFSET/COLOR (their _CHIAKI variants
+    with CHIAKI4DECK) if they are None.
+    Persists to settings.json (save_calibration) and to the profile.
     """
-    from .common import save_settings_to_file  # avoid circular at top
+    if instance.current() is not None:
+        if not ensure_game_window(stop_event, timeout=None):
+            return False
+        win = get_game_window()
+        if win is not None:
+            profiles.activate(win)
+        # countdown calibration needs the user's mouse on one window
+        if common.get_play_button_offset() is None or common.get_annul_pixel()[0] is None:
+            common.log("ERROR", "Offsets are not calibrated. Calibrate once in single-instance mode first.")
+            return False
+        return True
 
     if not ensure_game_window(stop_event, timeout=None):
         common.log("ERROR", "Game window NOT found. Start the game and try again.")
@@ -125,21 +205,27 @@ def capture_offsets_if_needed(stop_event):
 
     common.log("INFO", f"Game window found: '{win.title}'")
     common.log("DEBUG", f"Window position (left, top) = ({win.left}, {win.top})")
+    profiles.activate(win)
+
+    if _auto_calibrate_offsets(win, stop_event):
+        return True
+    if stop_event.is_set():
+        return False
 
     # 1) Ranked match button offset
-    if common.PLAY_BUTTON_OFFSET is None:
+    if _calibrated("PLAY_BUTTON_OFFSET") is None:
         common.log("STATE", "In 10 seconds I will record the 'Ranked Match' button position.")
         common.log("INFO", "Place your cursor over the button to queue for a ranked match.")
         sleep_with_stop(10, stop_event)
         if stop_event.is_set():
             return False
         pos = pyautogui.position()
-        common.PLAY_BUTTON_OFFSET = (pos.x - win.left, pos.y - win.top)
-        common.log("INFO", f"PLAY_BUTTON_OFFSET captured = {common.PLAY_BUTTON_OFFSET}")
+        _set_calibrated("PLAY_BUTTON_OFFSET", geometry.from_screen(pos.x, pos.y, win))
+        common.log("INFO", f"{common.mode_setting('PLAY_BUTTON_OFFSET')} captured = {_calibrated('PLAY_BUTTON_OFFSET')}")
         pyautogui.click(button="left")
 
     # 2) Cancel button offset + color
-    if common.ANNUL_PIXEL_OFFSET is None:
+    if _calibrated("ANNUL_PIXEL_OFFSET") is None:
         common.log("STATE", "In 10 seconds I will record the 'Cancel' button position (while searching).")
         common.log("INFO", "Place your cursor on the CANCEL button (don't click).")
         sleep_with_stop(10, stop_event)
@@ -150,55 +236,109 @@ def capture_offsets_if_needed(stop_event):
         sample_x = mouse.x
         sample_y = mouse.y + 5
 
-        common.ANNUL_PIXEL_OFFSET = (sample_x - win.left, sample_y - win.top)
-        common.ANNUL_PIXEL_COLOR = pyautogui.pixel(sample_x, sample_y)
+        color, spread = colors.sample(sample_x, sample_y, stop_event)
+        _set_calibrated("ANNUL_PIXEL_OFFSET", geometry.from_screen(sample_x, sample_y, win))
+        _set_calibrated("ANNUL_PIXEL_COLOR", color)
+        _set_calibrated("ANNUL_PIXEL_SPREAD", spread)
 
-        common.log("INFO", f"ANNUL_PIXEL_OFFSET captured = {common.ANNUL_PIXEL_OFFSET}")
-        common.log("INFO", f"ANNUL_PIXEL_COLOR  captured = {common.ANNUL_PIXEL_COLOR}")
+        common.log("INFO", f"{common.mode_setting('ANNUL_PIXEL_OFFSET')} captured = {_calibrated('ANNUL_PIXEL_OFFSET')}")
+        common.log("INFO", f"{common.mode_setting('ANNUL_PIXEL_COLOR')} captured = {color} (spread {spread})")
         common.log("DEBUG", f"Calibrated CANCEL at abs=({sample_x}, {sample_y}) in window '{win.title}'")
 
     common.log(
         "INFO",
         "Offsets configured for this run. "
-        "If you want them permanent, copy these values into settings.py."
+        "They are saved to settings.json."
     )
 
-    cancel_abs = screen_point_from_offset(common.ANNUL_PIXEL_OFFSET)
+    cancel_abs = screen_point_from_offset(_calibrated("ANNUL_PIXEL_OFFSET"))
     if cancel_abs is not None:
         common.log("ACTION", f"Clicking calibrated CANCEL at {cancel_abs} to stop search.")
         pyautogui.click(cancel_abs[0], cancel_abs[1], button="left")
 
-    save_settings_to_file({
-        "GAME_WINDOW_TITLE": common.GAME_WINDOW_TITLE,
-        "AUTO_MODE_KEY": common.AUTO_MODE_KEY,
-        "DELAY_BEFORE_START": common.DELAY_BEFORE_START,
-        "FIRST_WAIT": common.FIRST_WAIT,
-        "SECOND_WAIT": common.SECOND_WAIT,
-        "MATCH_DURATION": common.MATCH_DURATION,
-        "POST_MATCH_CLICKS": common.POST_MATCH_CLICKS,
-        "POST_MATCH_CLICK_INTERVAL": common.POST_MATCH_CLICK_INTERVAL,
-        "SEARCH_CHECK_INTERVAL": common.SEARCH_CHECK_INTERVAL,
-        "PLAY_BUTTON_OFFSET": common.PLAY_BUTTON_OFFSET,
-        "ANNUL_PIXEL_OFFSET": common.ANNUL_PIXEL_OFFSET,
-        "ANNUL_PIXEL_COLOR": common.ANNUL_PIXEL_COLOR,
-        "END_BUTTON_OFFSET": common.END_BUTTON_OFFSET,
-        "END_BUTTON_COLOR": common.END_BUTTON_COLOR,
-        "LVL_75_PLUS": common.LVL_75_PLUS,
-        "CHIAKI4DECK": common.CHIAKI4DECK,
-        "MATCH_TIMEOUT_MARGIN": common.MATCH_TIMEOUT_MARGIN,
-        "MAX_MATCHES_PER_RUN": common.MAX_MATCHES_PER_RUN,
-        "MAX_RUNTIME_MINUTES": common.MAX_RUNTIME_MINUTES,
-    })
+    # only the calibration: the rest may hold session values (timing profile)
+    save_calibration(common.mode_setting(key) for key in sorted(common.CHIAKI_VARIANTS))
+
+    return True
+
+def _auto_calibrate_offsets(win, stop_event) -> bool:
+    """
+    Try to find the missing Ranked / Cancel offsets from their templates
+    (base/autocalib.py) before falling back to the hover countdowns.
+    Returns True if nothing is left to calibrate by hand.
+    """
+    from . import autocalib
 
+    if _calibrated("PLAY_BUTTON_OFFSET") is None:
+        if not autocalib.calibrate(win, ["ranked_button"]).get(common.mode_setting("PLAY_BUTTON_OFFSET")):
+            return False
+        if _calibrated("ANNUL_PIXEL_OFFSET") is None:
+            # queue, so the Cancel button shows up
+            pos = screen_point_from_offset(_calibrated("PLAY_BUTTON_OFFSET"))
+            if pos is None:
+                return False
+            common.log("ACTION", f"Clicking located 'Ranked Match' at {pos}.")
+            pyautogui.click(pos[0], pos[1], button="left")
+
+    if _calibrated("ANNUL_PIXEL_OFFSET") is None:
+        found = autocalib.wait_for(win, "cancel_button", stop_event, timeout=8.0)
+        if not found.get(common.mode_setting("ANNUL_PIXEL_OFFSET")):
+            return False
+        cancel_abs = screen_point_from_offset(_calibrated("ANNUL_PIXEL_OFFSET"))
+        if cancel_abs is not None:
+            common.log("ACTION", f"Clicking located CANCEL at {cancel_abs} to stop search.")
+            pyautogui.click(cancel_abs[0], cancel_abs[1], button="left")
+
+    save_calibration(common.mode_setting(key) for key in (
+        "PLAY_BUTTON_OFFSET", "ANNUL_PIXEL_OFFSET", "ANNUL_PIXEL_COLOR", "ANNUL_PIXEL_SPREAD"
+    ))
     return True
 
+
+def save_calibration(keys):
+    """
+    Write the current values of `keys` (setting names as stored, e.g. from
+    common.mode_setting) into settings.json, keeping every other setting.
+    """
+    common.save_settings_to_file({key: common.get_value(key) for key in keys})
+    profiles.store(get_game_window())
+
+
+def auto_calibrate_via_gui():
+    """Locate whatever calibrated elements are on screen right now and save them."""
+    from . import autocalib
+
+    win = get_game_window()
+    if win is None:
+        common.log("ERROR", "Game window NOT found. Start the game and try again.")
+        return False
+    if not autocalib.available():
+        common.log("WARN", "Auto-calibration needs numpy and TEMPLATE_MATCHING / AUTOCALIB_ENABLED on.")
+        return False
+
+    found = autocalib.calibrate(win)
+    if not found:
+        common.log(
+            "WARN",
+            "Auto-calibration found no known element on screen. Open the lobby, the search "
+            "or the results screen and try again (elements are learned during normal runs)."
+        )
+        return False
+    save_calibration(found.keys())
+    return True
+
+
 def recalibrate_offsets_via_gui():
     """Reset offsets and run the capture flow again."""
     temp_event = threading.Event()
-    common.PLAY_BUTTON_OFFSET = None
-    common.ANNUL_PIXEL_OFFSET = None
-    # reset to original settings.py default (could be None)
-    common.ANNUL_PIXEL_COLOR = common.cfg.ANNUL_PIXEL_COLOR
+    _set_calibrated("PLAY_BUTTON_OFFSET", None)
+    _set_calibrated("ANNUL_PIXEL_OFFSET", None)
+    # reset to the saved setting (could be None)
+    _set_calibrated("ANNUL_PIXEL_COLOR", getattr(common.cfg, common.mode_setting("ANNUL_PIXEL_COLOR")))
+    _set_calibrated("ANNUL_PIXEL_SPREAD", None)
+    # templates were cut around the old offsets
+    from .templates import forget
+    forget()
     common.log("INFO", "Recalibration started. Follow the instructions in the log.")
     if capture_offsets_if_needed(temp_event):
         common.log("INFO", "Recalibration finished. New offsets are now active for this session.")
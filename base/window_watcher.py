@@ -0,0 +1,196 @@
+# base/window_watcher.py
+
+import threading
+from dataclasses import dataclass
+
+from . import common
+
+# ========== GAME WINDOW WATCHER ==========
+#
+# One background thread owns the "where is the game window" question.
+# Enumerating every top-level window (pygetwindow.getAllWindows) only happens
+# when we don't know the window yet or its handle went stale; otherwise each
+# tick is a handful of cheap Win32 calls on the cached HWND. Subscribers
+# (the GUI, workers) are notified only when something actually changed.
+
+
+@dataclass(frozen=True)
+class GameWindowState:
+    exists: bool
+    active: bool = False
+    minimized: bool = False
+    left: int = 0
+    top: int = 0
+    width: int = 0
+    height: int = 0
+    client_width: int = 0
+    client_height: int = 0
+    hwnd: int | None = None
+    title: str = ""
+
+
+MISSING = GameWindowState(exists=False)
+
+
+def _title_matches(title: str) -> bool:
+    return common.GAME_WINDOW_TITLE.lower() in (title or "").lower()
+
+
+class GameWindowWatcher(threading.Thread):
+
+    def __init__(self, interval: float = 0.5):
+        super().__init__(name="window-watcher", daemon=True)
+        self.interval = float(interval)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._subscribers: list = []
+        self._state: GameWindowState = MISSING
+        self._window = None  # pygetwindow object for the current hwnd
+
+    # ---------- public API ----------
+
+    @property
+    def state(self) -> GameWindowState:
+        return self._state
+
+    def subscribe(self, callback):
+        """
+        Call `callback(state)` on every change (from the watcher thread),
+        starting with the current state. Returns an unsubscribe function.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            state = self._state
+        self._notify_one(callback, state)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def window(self):
+        """
+        The game window as a pygetwindow object, or None. Re-validates the
+        cached handle and falls back to a synchronous poll if it went stale.
+        """
+        win = self._window
+        if win is not None and self._handle_alive(self._state.hwnd):
+            return win
+        self.poll()
+        return self._window
+
+    def poll(self) -> GameWindowState:
+        """Refresh now (any thread). Notifies subscribers if the state changed."""
+        with self._lock:
+            new_state, new_window = self._read_state()
+            changed = new_state != self._state
+            self._state = new_state
+            self._window = new_window
+            subscribers = list(self._subscribers) if changed else []
+
+        for cb in subscribers:
+            self._notify_one(cb, new_state)
+        return new_state
+
+    def wake(self):
+        """Poll on the next loop iteration instead of waiting out the interval."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    # ---------- thread ----------
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                common.log("DEBUG", f"Window watcher poll failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    # ---------- internals ----------
+
+    @staticmethod
+    def _notify_one(callback, state):
+        try:
+            callback(state)
+        except Exception as e:
+            common.log("DEBUG", f"Window watcher subscriber failed: {e}")
+
+    @staticmethod
+    def _handle_alive(hwnd) -> bool:
+        if not hwnd:
+            return False
+        import win32gui
+        try:
+            return bool(win32gui.IsWindow(hwnd)) and _title_matches(win32gui.GetWindowText(hwnd))
+        except Exception:
+            return False
+
+    def _find_window(self):
+        import pygetwindow as gw
+        for w in gw.getAllWindows():
+            if _title_matches(w.title):
+                return w
+        return None
+
+    def _read_state(self):
+        import win32gui
+
+        win = self._window
+        hwnd = self._state.hwnd
+        if win is None or not self._handle_alive(hwnd):
+            win = self._find_window()
+            if win is None:
+                return MISSING, None
+            hwnd = win._hWnd
+
+        try:
+            left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+            c_left, c_top, c_right, c_bottom = win32gui.GetClientRect(hwnd)
+            state = GameWindowState(
+                exists=True,
+                active=win32gui.GetForegroundWindow() == hwnd,
+                minimized=bool(win32gui.IsIconic(hwnd)),
+                left=left,
+                top=top,
+                width=right - left,
+                height=bottom - top,
+                client_width=c_right - c_left,
+                client_height=c_bottom - c_top,
+                hwnd=hwnd,
+                title=win32gui.GetWindowText(hwnd),
+            )
+        except Exception:
+            # window vanished between lookup and query
+            return MISSING, None
+
+        return state, win
+
+
+# ---------- shared instance ----------
+
+_watcher: GameWindowWatcher | None = None
+_watcher_lock = threading.Lock()
+
+
+def get_watcher() -> GameWindowWatcher:
+    """The process-wide watcher, started on first use."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = GameWindowWatcher(interval=common.WINDOW_WATCH_INTERVAL)
+            _watcher.start()
+        return _watcher
+
+
+def running_watcher() -> GameWindowWatcher | None:
+    """The watcher if something already started it, else None (never starts one)."""
+    w = _watcher
+    return w if w is not None and w.is_alive() else None
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Headless micro-benchmarks for IEVR Helper hot paths. Run: python -m benchmarks.run
@@ -0,0 +1,88 @@
+# benchmarks/bench_detection.py
+
+import threading
+from contextlib import contextmanager
+
+from base import common, frame_diff, status_checks, window_helpers
+from base.status_checks import rgb_dist
+
+from .fakes import fake_window_list
+from .harness import benchmark, patched, quiet_logs
+
+
+@benchmark("detection.rgb_dist", number=200_000)
+@contextmanager
+def _rgb_dist():
+    a, b = (250, 253, 254), (0, 174, 206)
+    yield lambda: rgb_dist(a, b)
+
+
+@contextmanager
+def _probe_env(pixel):
+    """Fake game window + constant screen pixel; no focus, no clicks."""
+    wins = fake_window_list(common.GAME_WINDOW_TITLE)
+    with quiet_logs(), patched(
+        (status_checks, "ensure_game_window", lambda *a, **k: True),
+        (status_checks.pyautogui, "pixel", lambda x, y: pixel),
+        (status_checks.pyautogui, "click", lambda *a, **k: None),
+        (window_helpers.gw, "getAllWindows", lambda: wins),
+        (common, "PLAY_BUTTON_IDLE_COLOR", (40, 90, 200)),
+        # raw pixel-probe cost; frame-diff / templates are measured separately
+        (common, "FRAME_DIFF_ENABLED", False),
+        (common, "TEMPLATE_MATCHING", False),
+    ):
+        yield threading.Event()
+
+
+@benchmark("detection.is_still_searching", number=5_000)
+@contextmanager
+def _is_still_searching():
+    _, color = common.get_annul_pixel()
+    with _probe_env(color) as stop:
+        yield lambda: status_checks.is_still_searching(stop)
+
+
+@benchmark("detection.is_back_in_lobby", number=5_000)
+@contextmanager
+def _is_back_in_lobby():
+    with _probe_env((40, 90, 200)) as stop:
+        yield lambda: status_checks.is_back_in_lobby(stop)
+
+
+@benchmark("detection.detect_search_failed_popup", number=2_000)
+@contextmanager
+def _detect_search_failed_popup():
+    with _probe_env((250, 250, 250)) as stop:
+        yield lambda: status_checks.detect_search_failed_popup(stop)
+
+
+@benchmark("detection.is_match_over", number=5_000)
+@contextmanager
+def _is_match_over():
+    _, color = common.get_end_button()
+    with _probe_env(color) as stop:
+        yield lambda: status_checks.is_match_over(stop)
+
+
+@benchmark("detection.is_still_searching[frame-diff cached]", number=5_000)
+@contextmanager
+def _cached_probe():
+    # the search pixel never changes: after the first call every probe grabs
+    # its small rect (no fresh full frame around), finds the same checksum
+    # and is answered from the cache
+    from PIL import Image
+    still = Image.new("RGB", (1040, 615), (30, 60, 120))
+    wins = fake_window_list(common.GAME_WINDOW_TITLE)
+    _, color = common.get_annul_pixel()
+    frame_diff.clear()
+    with quiet_logs(), patched(
+        (status_checks, "ensure_game_window", lambda *a, **k: True),
+        (status_checks.pyautogui, "pixel", lambda x, y: color),
+        (window_helpers.gw, "getAllWindows", lambda: wins),
+        (frame_diff, "capture", lambda win, box=None: still if box is None else still.crop(box)),
+        (common, "FRAME_DIFF_ENABLED", True),
+        (common, "TEMPLATE_MATCHING", False),
+    ):
+        stop = threading.Event()
+        yield lambda: status_checks.is_still_searching(stop)
+    frame_diff.clear()
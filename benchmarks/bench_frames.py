@@ -0,0 +1,52 @@
+# benchmarks/bench_frames.py
+
+from contextlib import contextmanager
+
+from PIL import Image
+
+from base import frame_diff
+
+from .harness import benchmark
+
+SIZE = (1024, 576)
+
+
+def _frames():
+    """A static lobby-like frame and one with a small animated corner."""
+    still = Image.new("RGB", SIZE, (30, 60, 120))
+    moving = still.copy()
+    moving.paste((240, 240, 240), (900, 500, 1000, 560))
+    return still, moving
+
+
+@benchmark("frames.update[static]", number=500)
+@contextmanager
+def _update_static():
+    still, _ = _frames()
+    fd = frame_diff.FrameDiff()
+    fd.update(still)
+    yield lambda: fd.update(still)
+
+
+@benchmark("frames.update[changing corner]", number=500)
+@contextmanager
+def _update_changing():
+    still, moving = _frames()
+    fd = frame_diff.FrameDiff()
+    frames = [still, moving]
+    state = {"i": 0}
+
+    def fn():
+        state["i"] ^= 1
+        fd.update(frames[state["i"]])
+    yield fn
+
+
+@benchmark("frames.signature", number=50_000)
+@contextmanager
+def _signature():
+    still, _ = _frames()
+    fd = frame_diff.FrameDiff()
+    fd.update(still)
+    rect = frame_diff.point_rect((499, 375))
+    yield lambda: fd.signature(rect)
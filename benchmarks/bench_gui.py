@@ -0,0 +1,75 @@
+# benchmarks/bench_gui.py
+
+import os
+import time
+from contextlib import contextmanager
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from base import qt_gui  # noqa: E402
+
+from .harness import benchmark, quiet_logs  # noqa: E402
+
+_app = None
+
+
+@contextmanager
+def _window():
+    global _app
+    _app = QApplication.instance() or QApplication([])
+    with quiet_logs():
+        win = qt_gui.IEVRMainWindow()
+        try:
+            yield win
+        finally:
+            win.close()
+            win.deleteLater()
+
+
+@benchmark("gui.append_log", number=2_000, repeat=5)
+@contextmanager
+def _append_log():
+    with _window() as win:
+        line = "[12:00:00] [DEBUG] 🔍 Search pixel check single: (250, 253, 254), dist=3.2\n"
+        yield lambda: win.append_log("DEBUG", line)
+
+
+@benchmark("gui.append_logs[batch of 50]", number=100, repeat=5)
+@contextmanager
+def _append_logs_batch():
+    # what one coalesced drain costs during a DEBUG burst
+    with _window() as win:
+        line = "[12:00:00] [DEBUG] 🔍 Search pixel check single: (250, 253, 254), dist=3.2\n"
+        batch = [("DEBUG", line)] * 50
+        yield lambda: win.append_logs(batch)
+
+
+def _fill_history(win, n: int):
+    now = time.time()
+    for i in range(n):
+        win.matches_played += 1
+        win.total_match_time += 600.0
+        win.match_history.append({
+            "index": i + 1,
+            "timestamp": now + i * 600.0,
+            "duration": 600.0,
+            "avg": 600.0,
+        })
+
+
+@benchmark("gui._refresh_stats_tab[50 matches]", number=200, repeat=5)
+@contextmanager
+def _refresh_stats_50():
+    with _window() as win:
+        _fill_history(win, 50)
+        yield win._refresh_stats_tab
+
+
+@benchmark("gui._refresh_stats_tab[500 matches]", number=20, repeat=5)
+@contextmanager
+def _refresh_stats_500():
+    with _window() as win:
+        _fill_history(win, 500)
+        yield win._refresh_stats_tab
@@ -0,0 +1,56 @@
+# benchmarks/bench_input.py
+
+from contextlib import contextmanager
+
+from base import common, tracing
+
+from .fakes import NoSleepTime, fake_pyautogui, null_pad_backend
+from .harness import benchmark, patched, quiet_logs
+
+
+@contextmanager
+def _kbmouse_backend():
+    backend = common.InputBackend(False)
+    with quiet_logs(), patched((common, "pyautogui", fake_pyautogui)):
+        yield backend
+
+
+@contextmanager
+def _pad_backend(pad_type: str):
+    with quiet_logs(), patched((common, "time", NoSleepTime(common.time))):
+        yield null_pad_backend(common.InputBackend, pad_type)
+
+
+@benchmark("input.press_key[kbmouse]", number=50_000)
+@contextmanager
+def _press_key_kbmouse():
+    with _kbmouse_backend() as backend:
+        yield lambda: backend.press_key("enter")
+
+
+@benchmark("input.press_key[kbmouse, tracing off]", number=50_000)
+@contextmanager
+def _press_key_kbmouse_untraced():
+    with _kbmouse_backend() as backend, patched((tracing, "_enabled", False)):
+        yield lambda: backend.press_key("enter")
+
+
+@benchmark("input.press_key[ds4 enter]", number=20_000)
+@contextmanager
+def _press_key_ds4_enter():
+    with _pad_backend("ds4") as backend:
+        yield lambda: backend.press_key("enter")
+
+
+@benchmark("input.press_key[ds4 dpad up]", number=20_000)
+@contextmanager
+def _press_key_ds4_up():
+    with _pad_backend("ds4") as backend:
+        yield lambda: backend.press_key("up")
+
+
+@benchmark("input.press_key[xinput enter]", number=20_000)
+@contextmanager
+def _press_key_xinput_enter():
+    with _pad_backend("xinput") as backend:
+        yield lambda: backend.press_key("enter")
@@ -0,0 +1,54 @@
+# benchmarks/bench_logging.py
+
+import os
+import sys
+from contextlib import contextmanager
+
+from base import common
+
+from .harness import benchmark, patched
+
+
+@benchmark("logging.log[no sinks]", number=50_000)
+@contextmanager
+def _log_no_sinks():
+    # print() is a no-op when sys.stdout is None; the channel is drained afterwards.
+    with patched((sys, "stdout", None)):
+        yield lambda: common.log("DEBUG", "Search pixel check single: (250, 253, 254), dist=3.2")
+    common.log_channel.drain()
+
+
+@benchmark("logging.log[console + GUI channel]", number=50_000)
+@contextmanager
+def _log_with_sinks():
+    # a ready listener is registered like the GUI does; it fires once per drain
+    def listener():
+        pass
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull, patched((sys, "stdout", devnull)):
+        common.log_channel.on_ready(listener)
+
+        def fn():
+            common.log("DEBUG", "Search pixel check single: (250, 253, 254), dist=3.2")
+        try:
+            yield fn
+        finally:
+            common.log_channel.off_ready(listener)
+    common.log_channel.drain()
+
+
+@benchmark("logging.log[console + file sink]", number=50_000)
+@contextmanager
+def _log_with_file_sink():
+    # what `python -m base.cli --log-file` pays per line
+    with open(os.devnull, "w", encoding="utf-8") as devnull, patched((sys, "stdout", devnull)):
+        def sink(item):
+            devnull.write(item[1])
+            devnull.flush()
+
+        common.log_channel.add_sink(sink)
+        try:
+            yield lambda: common.log("DEBUG", "Search pixel check single: (250, 253, 254), dist=3.2")
+        finally:
+            common.log_channel.remove_sink(sink)
+    common.log_channel.drain()
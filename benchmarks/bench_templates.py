@@ -0,0 +1,95 @@
+# benchmarks/bench_templates.py
+
+from contextlib import contextmanager
+
+import numpy  # noqa: F401  (suite is skipped without it, like the feature)
+
+from base import common, frame_diff, templates
+
+from .fakes import FakeWindow
+from .frames import BUTTON_CENTER, reference_frame, synthetic_cases
+from .harness import benchmark, patched, quiet_logs
+
+
+@contextmanager
+def _with_reference_template(name: str = "end_button"):
+    """Template cropped from the synthetic reference frame, nothing read from disk."""
+    ref = reference_frame()
+    x, y, w, h = templates._box(name, BUTTON_CENTER)
+    tmpl = templates._gray(ref.crop((x, y, x + w, y + h)))
+    with quiet_logs(), patched(
+        (common, "TEMPLATE_MATCHING", True),
+        (templates, "load", lambda n, size, exact=False: tmpl if n == name else None),
+    ):
+        yield name
+
+
+@benchmark("templates.match[shifted button]", number=500)
+@contextmanager
+def _match_hit():
+    frame = synthetic_cases(2)[0][0]
+    with _with_reference_template() as name:
+        yield lambda: templates.match(name, frame, BUTTON_CENTER)
+
+
+@benchmark("templates.match[no button]", number=500)
+@contextmanager
+def _match_miss():
+    frame = synthetic_cases(2)[1][0]
+    with _with_reference_template() as name:
+        yield lambda: templates.match(name, frame, BUTTON_CENTER)
+
+
+@benchmark("templates.match[no pyramid]", number=200)
+@contextmanager
+def _match_flat():
+    # full-resolution NCC over the whole ROI, to show what the pyramid saves
+    frame = synthetic_cases(2)[0][0]
+    with _with_reference_template() as name, patched((common, "TEMPLATE_PYRAMID_LEVELS", 0)):
+        yield lambda: templates.match(name, frame, BUTTON_CENTER)
+
+
+@benchmark("templates.find[whole window, auto-calibration]", number=50)
+@contextmanager
+def _find_whole_frame():
+    frame = synthetic_cases(2)[0][0]
+    with _with_reference_template() as name:
+        yield lambda: templates.find(name, frame)
+
+
+# ---------- capture + match (what a probe pays per check) ----------
+
+@contextmanager
+def _live_window():
+    """
+    A fake game window whose "screenshots" copy the requested pixels out of
+    a synthetic frame, so the capture cost scales with the area grabbed
+    (a real screenshot adds its fixed per-call overhead on top).
+    """
+    screen = synthetic_cases(2)[0][0]
+    win = FakeWindow(common.GAME_WINDOW_TITLE, width=screen.width, height=screen.height, hwnd=7)
+    frame_diff.clear()
+    with _with_reference_template() as name, patched(
+        (frame_diff, "capture", lambda w, box=None: screen.copy() if box is None else screen.crop(box)),
+        (common, "FRAME_DIFF_MAX_AGE", 0.0),
+    ):
+        yield name, win
+    frame_diff.clear()
+
+
+@benchmark("templates.check[grab search area + match]", number=500)
+@contextmanager
+def _check_search_area():
+    with _live_window() as (name, win):
+        yield lambda: templates.check(name, win, BUTTON_CENTER)
+
+
+@benchmark("templates.check[grab whole window + match]", number=200)
+@contextmanager
+def _check_whole_window():
+    # how check() used to work: a full-window capture for every check
+    with _live_window() as (name, win):
+        def check():
+            frame_diff.tick(win, max_age=0.0)
+            return templates.detect(name, frame_diff.latest_frame(win), BUTTON_CENTER)
+        yield check
@@ -0,0 +1,37 @@
+# benchmarks/bench_window.py
+
+from contextlib import contextmanager
+
+from base import common, window_helpers
+
+from .fakes import fake_window_list
+from .harness import benchmark, patched, quiet_logs
+
+
+@contextmanager
+def _fake_desktop(others: int):
+    wins = fake_window_list(common.GAME_WINDOW_TITLE, others=others)
+    with quiet_logs(), patched((window_helpers.gw, "getAllWindows", lambda: wins)):
+        yield
+
+
+@benchmark("window.get_game_window[40 windows]", number=20_000)
+@contextmanager
+def _get_game_window_40():
+    with _fake_desktop(40):
+        yield window_helpers.get_game_window
+
+
+@benchmark("window.get_game_window[200 windows]", number=5_000)
+@contextmanager
+def _get_game_window_200():
+    with _fake_desktop(200):
+        yield window_helpers.get_game_window
+
+
+@benchmark("window.screen_point_from_offset", number=20_000)
+@contextmanager
+def _screen_point_from_offset():
+    offset = common.get_play_button_offset()
+    with _fake_desktop(40):
+        yield lambda: window_helpers.screen_point_from_offset(offset)
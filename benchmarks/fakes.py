@@ -0,0 +1,107 @@
+# benchmarks/fakes.py
+
+from types import SimpleNamespace
+
+
+class FakeWindow:
+    """Stand-in for a pygetwindow Win32Window with fixed geometry."""
+
+    def __init__(self, title: str, left: int = 100, top: int = 100,
+                 width: int = 1040, height: int = 615, hwnd: int = 0):
+        self.title = title
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.isMinimized = False
+        self.isActive = True
+        self._hWnd = hwnd
+
+    def activate(self):
+        pass
+
+    def restore(self):
+        pass
+
+
+def fake_window_list(game_title: str, others: int = 40) -> list[FakeWindow]:
+    """A desktop with `others` unrelated windows and the game window last (worst case)."""
+    wins = [FakeWindow(f"Some other window #{i}", hwnd=1000 + i) for i in range(others)]
+    wins.append(FakeWindow(game_title, hwnd=42))
+    return wins
+
+
+class NullGamepad:
+    """vgamepad-compatible pad that accepts every call and does nothing."""
+
+    def press_button(self, button=None):
+        pass
+
+    def release_button(self, button=None):
+        pass
+
+    def directional_pad(self, direction=None):
+        pass
+
+    def left_joystick(self, x_value=0, y_value=0):
+        pass
+
+    def update(self):
+        pass
+
+
+def _const_namespace(*names):
+    return SimpleNamespace(**{n: i + 1 for i, n in enumerate(names)})
+
+
+# Just enough of the vgamepad module surface for InputBackend._init_maps().
+fake_vg_module = SimpleNamespace(
+    DS4_BUTTONS=_const_namespace(
+        "DS4_BUTTON_CROSS", "DS4_BUTTON_CIRCLE", "DS4_BUTTON_SQUARE", "DS4_BUTTON_TRIANGLE",
+        "DS4_BUTTON_SHOULDER_LEFT", "DS4_BUTTON_SHOULDER_RIGHT",
+        "DS4_BUTTON_THUMB_LEFT", "DS4_BUTTON_THUMB_RIGHT",
+        "DS4_BUTTON_SHARE", "DS4_BUTTON_OPTIONS",
+    ),
+    DS4_DPAD_DIRECTIONS=_const_namespace(
+        "DS4_BUTTON_DPAD_NORTH", "DS4_BUTTON_DPAD_SOUTH", "DS4_BUTTON_DPAD_WEST",
+        "DS4_BUTTON_DPAD_EAST", "DS4_BUTTON_DPAD_NONE",
+    ),
+    DS4_SPECIAL_BUTTONS=_const_namespace("DS4_SPECIAL_BUTTON_PS"),
+    XUSB_BUTTON=_const_namespace(
+        "XUSB_GAMEPAD_A", "XUSB_GAMEPAD_B", "XUSB_GAMEPAD_X", "XUSB_GAMEPAD_Y",
+        "XUSB_GAMEPAD_LEFT_SHOULDER", "XUSB_GAMEPAD_RIGHT_SHOULDER",
+        "XUSB_GAMEPAD_LEFT_THUMB", "XUSB_GAMEPAD_RIGHT_THUMB",
+        "XUSB_GAMEPAD_START", "XUSB_GAMEPAD_BACK",
+        "XUSB_GAMEPAD_DPAD_UP", "XUSB_GAMEPAD_DPAD_DOWN",
+        "XUSB_GAMEPAD_DPAD_LEFT", "XUSB_GAMEPAD_DPAD_RIGHT",
+    ),
+)
+
+
+# Stands in for pyautogui (a Windows-only dependency) in the kb/mouse benchmarks;
+# the real press() is patched out there anyway.
+fake_pyautogui = SimpleNamespace(press=lambda *a, **k: None)
+
+
+def null_pad_backend(input_backend_cls, pad_type: str = "ds4"):
+    """Build an InputBackend in gamepad mode wired to a NullGamepad."""
+    backend = input_backend_cls(False)
+    backend.mode = "gamepad"
+    backend.pad_type = pad_type
+    backend.gamepad = NullGamepad()
+    backend.vg_mod = fake_vg_module
+    backend._init_maps()
+    return backend
+
+
+class NoSleepTime:
+    """Proxy for the `time` module whose sleep() returns immediately."""
+
+    def __init__(self, real_time):
+        self._real = real_time
+
+    def sleep(self, seconds):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
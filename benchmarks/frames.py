@@ -0,0 +1,76 @@
+# benchmarks/frames.py
+
+import glob
+import os
+import random
+
+from PIL import Image, ImageDraw
+
+# ========== TEST FRAMES ==========
+#
+# Synthetic game-window frames with a textured "button" at a known spot,
+# plus recorded ones from RECORD_FRAMES (logs/frames/<name>__<pos|neg>__<x>x<y>__*.png).
+
+SIZE = (1024, 576)
+BUTTON_CENTER = (512, 400)
+
+
+def _background(seed: int = 0):
+    rnd = random.Random(seed)
+    img = Image.new("RGB", SIZE, (24, 40, 72))
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        x, y = rnd.randrange(SIZE[0]), rnd.randrange(SIZE[1])
+        w, h = rnd.randrange(20, 200), rnd.randrange(10, 80)
+        shade = rnd.randrange(20, 90)
+        draw.rectangle((x, y, x + w, y + h), fill=(shade, shade + 20, shade + 50))
+    return img
+
+
+def draw_button(img, center, scale: float = 1.0):
+    """A 64x26 button with a border and 'text' strokes; `scale` changes brightness."""
+    def c(v):
+        return max(0, min(255, int(v * scale)))
+
+    draw = ImageDraw.Draw(img)
+    cx, cy = center
+    draw.rectangle((cx - 32, cy - 13, cx + 32, cy + 13), fill=(c(200), c(170), c(40)), outline=(c(250), c(240), c(200)))
+    for i, x in enumerate(range(cx - 22, cx + 22, 7)):
+        top = cy - 6 if i % 2 else cy - 3
+        draw.rectangle((x, top, x + 3, cy + 6), fill=(c(40), c(30), c(10)))
+    return img
+
+
+def reference_frame():
+    return draw_button(_background(), BUTTON_CENTER)
+
+
+def synthetic_cases(count: int = 40, seed: int = 1):
+    """[(frame, expected_center, is_positive)]: shifted/brightened buttons and empty frames."""
+    rnd = random.Random(seed)
+    cases = []
+    for i in range(count):
+        bg = _background(seed=100 + i)
+        if i % 2 == 0:
+            dx, dy = rnd.randint(-12, 12), rnd.randint(-8, 8)
+            scale = rnd.uniform(0.75, 1.2)
+            center = (BUTTON_CENTER[0] + dx, BUTTON_CENTER[1] + dy)
+            cases.append((draw_button(bg, center, scale), BUTTON_CENTER, True))
+        else:
+            cases.append((bg, BUTTON_CENTER, False))
+    return cases
+
+
+def recorded_cases(name: str, folder: str | None = None):
+    """Frames saved by RECORD_FRAMES for probe `name`: [(frame, center, is_positive)]."""
+    folder = folder or os.path.join("logs", "frames")
+    cases = []
+    for path in sorted(glob.glob(os.path.join(folder, f"{name}__*.png"))):
+        try:
+            _, label, pos, _ = os.path.basename(path).split("__", 3)
+            x, y = (int(v) for v in pos.split("x"))
+        except ValueError:
+            continue
+        with Image.open(path) as img:
+            cases.append((img.convert("RGB"), (x, y), label == "pos"))
+    return cases
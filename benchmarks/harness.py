@@ -0,0 +1,94 @@
+# benchmarks/harness.py
+
+import statistics
+import timeit
+from contextlib import contextmanager
+from dataclasses import dataclass
+from unittest import mock
+
+# ========== REGISTRY ==========
+
+
+@dataclass
+class Benchmark:
+    name: str
+    factory: object  # context manager factory yielding the zero-arg callable to time
+    number: int
+    repeat: int
+
+
+BENCHMARKS: list[Benchmark] = []
+
+
+def benchmark(name: str, number: int = 1000, repeat: int = 7):
+    """
+    Register a benchmark. The decorated function must be a context manager
+    that sets up fakes/state and yields the callable to time:
+
+        @benchmark("detection.rgb_dist", number=100_000)
+        @contextmanager
+        def _rgb_dist():
+            yield lambda: rgb_dist(a, b)
+    """
+    def deco(factory):
+        BENCHMARKS.append(Benchmark(name, factory, number, repeat))
+        return factory
+    return deco
+
+
+# ========== HELPERS ==========
+
+@contextmanager
+def patched(*patches):
+    """
+    Apply several (target, attribute, value) patches for the duration
+    of a benchmark, restoring them afterwards.
+    """
+    ctxs = [mock.patch.object(target, attr, value) for target, attr, value in patches]
+    for c in ctxs:
+        c.start()
+    try:
+        yield
+    finally:
+        for c in reversed(ctxs):
+            c.stop()
+
+
+def run_one(b: Benchmark) -> dict:
+    with b.factory() as fn:
+        fn()  # warm-up (imports, caches)
+        totals = timeit.Timer(fn).repeat(repeat=b.repeat, number=b.number)
+
+    per_call = [t / b.number * 1_000_000.0 for t in totals]
+    return {
+        "number": b.number,
+        "repeat": b.repeat,
+        "per_call_us_min": round(min(per_call), 4),
+        "per_call_us_median": round(statistics.median(per_call), 4),
+        "per_call_us_mean": round(statistics.fmean(per_call), 4),
+        "ops_per_sec": round(1_000_000.0 / min(per_call), 1) if min(per_call) > 0 else None,
+    }
+
+
+class _NullChannel:
+    def publish(self, item):
+        pass
+
+    def drain(self):
+        return []
+
+    def on_ready(self, callback):
+        pass
+
+
+@contextmanager
+def quiet_logs():
+    """Silence common.log(): no console print, no log channel growth."""
+    import sys
+    from base import common
+
+    with patched(
+        (sys, "stdout", None),
+        (common, "log_channel", _NullChannel()),
+    ):
+        yield
@@ -0,0 +1,94 @@
+# benchmarks/probe_cache.py
+"""
+Hit rate of the probe result cache (frame_diff.lookup / store) the way the
+bot hits it: one probe call at a time, no fresh full frame around, so every
+lookup grabs the probe's own rect.
+
+    python -m benchmarks.probe_cache
+    python -m benchmarks.probe_cache --calls 1000
+
+Screens: static, an animation elsewhere in the window, and the probe's own
+rect changing every 10th call (each change must be a miss).
+"""
+
+import argparse
+import time
+
+from PIL import ImageDraw
+
+from base import common, frame_diff
+
+from .fakes import FakeWindow
+from .frames import BUTTON_CENTER, reference_frame
+from .harness import patched, quiet_logs
+
+
+def _static(screen, i):
+    pass
+
+
+def _animation_elsewhere(screen, i):
+    ImageDraw.Draw(screen).rectangle((40, 40, 140, 90), fill=(i * 7 % 256, 90, 200))
+
+
+def _own_rect_every_10(screen, i):
+    if i % 10 == 0:
+        x, y = BUTTON_CENTER
+        ImageDraw.Draw(screen).point((x + 2, y + 1), fill=(i % 256, 0, 0))
+
+
+SCREENS = {
+    "static": _static,
+    "animation elsewhere": _animation_elsewhere,
+    "own rect every 10th": _own_rect_every_10,
+}
+
+
+def _run(change, calls: int) -> dict:
+    screen = reference_frame()
+    win = FakeWindow(common.GAME_WINDOW_TITLE, width=screen.width, height=screen.height, hwnd=7)
+    grabs = [0]
+
+    def capture(w, box=None):
+        grabs[0] += 1
+        return screen.copy() if box is None else screen.crop(box)
+
+    rect = frame_diff.point_rect(BUTTON_CENTER)
+    hits = 0
+    frame_diff.clear()
+    with quiet_logs(), patched(
+        (frame_diff, "capture", capture),
+        (common, "FRAME_DIFF_ENABLED", True),
+    ):
+        start = time.perf_counter()
+        for i in range(calls):
+            change(screen, i)
+            cached = frame_diff.lookup("probe", win, rect)
+            if cached is not frame_diff.MISS:
+                hits += 1
+                continue
+            frame_diff.store("probe", win, screen.getpixel(BUTTON_CENTER))
+        elapsed = time.perf_counter() - start
+    frame_diff.clear()
+    return {
+        "hit_rate": hits / calls,
+        "grabs_per_call": grabs[0] / calls,
+        "us_per_call": elapsed / calls * 1_000_000.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.probe_cache")
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    print(f"{args.calls} probe calls per screen, probe rect {frame_diff.point_rect(BUTTON_CENTER)}")
+    print(f"{'screen':<22} {'hit rate':>9} {'grabs/call':>11} {'us/call':>9}")
+    for label, change in SCREENS.items():
+        r = _run(change, args.calls)
+        print(f"{label:<22} {r['hit_rate']:>9.1%} {r['grabs_per_call']:>11.2f} {r['us_per_call']:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
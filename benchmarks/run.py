@@ -0,0 +1,110 @@
+# benchmarks/run.py
+"""
+Run the benchmark suite and save results as JSON.
+
+    python -m benchmarks.run                       # everything
+    python -m benchmarks.run --only detection,input
+    python -m benchmarks.run --compare benchmarks/results/v1.0.3a_20260101_120000.json
+
+Results go to benchmarks/results/<version>_<timestamp>.json unless --out is given.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+from .harness import BENCHMARKS, run_one
+
+SUITES = ("detection", "frames", "templates", "window", "input", "logging", "gui")
+
+# flag a benchmark as a regression when it gets this much slower
+REGRESSION_THRESHOLD = 1.10
+
+
+def _load_suites(names) -> dict[str, str]:
+    """Import bench modules (registering their benchmarks). Returns {suite: skip reason}."""
+    skipped = {}
+    for name in names:
+        try:
+            importlib.import_module(f".bench_{name}", __package__)
+        except Exception as e:
+            skipped[name] = f"{type(e).__name__}: {e}"
+    return skipped
+
+
+def _meta() -> dict:
+    try:
+        from base import common
+        version = common.APP_VERSION
+    except Exception:
+        version = "unknown"
+    return {
+        "app_version": version,
+        "python": sys.version.split()[0],
+        "platform": f"{platform.system()} {platform.release()}",
+        "machine": platform.machine(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _compare(results: dict, old_path: str) -> int:
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f).get("results", {})
+
+    regressions = 0
+    print(f"\nCompared with {old_path}:")
+    for name, res in results.items():
+        prev = old.get(name)
+        if not prev:
+            print(f"  {name:<45} (new)")
+            continue
+        ratio = res["per_call_us_min"] / prev["per_call_us_min"] if prev["per_call_us_min"] else 0.0
+        flag = ""
+        if ratio > REGRESSION_THRESHOLD:
+            flag = "  <-- REGRESSION"
+            regressions += 1
+        print(f"  {name:<45} {prev['per_call_us_min']:>10.3f} -> {res['per_call_us_min']:>10.3f} us  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="IEVR Helper benchmark suite")
+    parser.add_argument("--only", help=f"comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--out", help="output JSON path")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    suites = [s.strip() for s in args.only.split(",")] if args.only else list(SUITES)
+    skipped = _load_suites(suites)
+    for name, reason in skipped.items():
+        print(f"[skip] {name}: {reason}")
+
+    results = {}
+    for b in BENCHMARKS:
+        res = run_one(b)
+        results[b.name] = res
+        print(f"{b.name:<45} {res['per_call_us_min']:>10.3f} us/call  (median {res['per_call_us_median']:.3f})")
+
+    meta = _meta()
+    out = args.out
+    if out is None:
+        results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+        os.makedirs(results_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out = os.path.join(results_dir, f"{meta['app_version']}_{stamp}.json")
+
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "skipped": skipped, "results": results}, f, indent=2)
+    print(f"\nResults saved to: {out}")
+
+    if args.compare:
+        return 1 if _compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# benchmarks/template_accuracy.py
+"""
+Accuracy + latency of template matching vs the old single-pixel check:
+
+    python -m benchmarks.template_accuracy
+    python -m benchmarks.template_accuracy --recorded end_button --frames logs/frames
+
+Synthetic frames shift the button by up to +-12/8 px and change its
+brightness by -25%..+20%; half of them have no button at all. Recorded frames
+come from RECORD_FRAMES (the first positive one is used as the template).
+"""
+
+import argparse
+import statistics
+import time
+
+from base import common, templates
+
+from .frames import BUTTON_CENTER, recorded_cases, reference_frame, synthetic_cases
+from .harness import patched, quiet_logs
+
+
+def _pixel_verdict(frame, center, color, tol: int = 22) -> bool:
+    pixel = frame.getpixel(tuple(center))
+    return all(abs(pixel[i] - color[i]) <= tol for i in range(3))
+
+
+def _score(cases, name, tmpl, ref_color) -> dict:
+    out = {}
+    with quiet_logs(), patched(
+        (common, "TEMPLATE_MATCHING", True),
+        (templates, "load", lambda n, size: tmpl if n == name else None),
+    ):
+        for method in ("template", "pixel"):
+            hits = misses = false_pos = negatives = 0
+            times = []
+            for frame, center, positive in cases:
+                start = time.perf_counter()
+                if method == "template":
+                    found = templates.detect(name, frame, center)
+                else:
+                    found = _pixel_verdict(frame, center, ref_color)
+                times.append((time.perf_counter() - start) * 1000.0)
+                if positive:
+                    hits += bool(found)
+                    misses += not found
+                else:
+                    negatives += 1
+                    false_pos += bool(found)
+            positives = hits + misses
+            times.sort()
+            out[method] = {
+                "recall": round(hits / positives, 3) if positives else None,
+                "false_positive_rate": round(false_pos / negatives, 3) if negatives else None,
+                "ms_mean": round(statistics.fmean(times), 3),
+                "ms_p95": round(times[int(0.95 * (len(times) - 1))], 3),
+            }
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.template_accuracy")
+    parser.add_argument("--recorded", metavar="NAME", help="use recorded frames of this probe (e.g. end_button)")
+    parser.add_argument("--frames", metavar="DIR", help="recorded frames folder (default logs/frames)")
+    args = parser.parse_args(argv)
+
+    if args.recorded:
+        name = args.recorded
+        cases = recorded_cases(name, args.frames)
+        first_pos = next((c for c in cases if c[2]), None)
+        if first_pos is None:
+            print(f"No positive recorded frames for '{name}'.")
+            return 1
+        ref, center, _ = first_pos
+        cases = [c for c in cases if c is not first_pos]
+    else:
+        name = "end_button"
+        ref, center = reference_frame(), BUTTON_CENTER
+        cases = synthetic_cases()
+
+    x, y, w, h = templates._box(name, center)
+    tmpl = templates._gray(ref.crop((x, y, x + w, y + h)))
+    ref_color = ref.getpixel(tuple(center))
+
+    results = _score(cases, name, tmpl, ref_color)
+    print(f"{len(cases)} frames, template '{name}', min score {common.TEMPLATE_MIN_SCORE}")
+    print(f"{'method':<10} {'recall':>8} {'false+':>8} {'mean ms':>9} {'p95 ms':>9}")
+    for method, r in results.items():
+        print(
+            f"{method:<10} {r['recall']!s:>8} {r['false_positive_rate']!s:>8} "
+            f"{r['ms_mean']:>9.3f} {r['ms_p95']:>9.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,9 @@
-import time
 import pyautogui
 import pygetwindow as gw
 
-GAME_WINDOW_TITLE = "INAZUMA ELEVEN: Victory Road"  # same as in settings.py
+from base import colors, geometry
+
+GAME_WINDOW_TITLE = "INAZUMA ELEVEN: Victory Road"  # same as in settings.json
 
 print("Make sure the RESULT screen is visible.")
 print("Place your mouse EXACTLY on the yellow cup you want to detect.")
@@ -18,10 +19,12 @@ if not wins:
     raise SystemExit("Game window not found – check GAME_WINDOW_TITLE.")
 win = wins[0]
 
-dx = mx - win.left
-dy = my - win.top
-r, g, b = pyautogui.pixel(mx, my)
+# normalized client-area coordinates
+u, v = geometry.transform_for(win).from_screen(mx, my)
+# patch over several frames: median color + spread
+(r, g, b), spread = colors.sample(mx, my)
 
-print("\nPut these into settings.py:")
-print(f"END_BUTTON_OFFSET = ({dx}, {dy})")
-print(f"END_BUTTON_COLOR = ({r}, {g}, {b})")
\ No newline at end of file
+print("\nPut these into base/settings.json:")
+print(f'"END_BUTTON_OFFSET": [{u}, {v}],')
+print(f'"END_BUTTON_COLOR": [{r}, {g}, {b}],')
+print(f'"END_BUTTON_SPREAD": [{spread[0]}, {spread[1]}, {spread[2]}]')
\ No newline at end of file
@@ -1,6 +1,18 @@
 # source/main.py
 
-from base.qt_gui import run_app
+import multiprocessing
+
+from base import startup
 
 if __name__ == "__main__":
+    # ISOLATED_WORKERS children re-import this file: keep Qt out of them,
+    # and let the frozen exe act as a worker when it is spawned as one
+    multiprocessing.freeze_support()
+
+    if startup.import_timing_requested():
+        startup.install_import_timer()
+
+    with startup.phase("import base.qt_gui"):
+        from base.qt_gui import run_app
+
     run_app()